@@ -0,0 +1,206 @@
+# attack_tables.py
+
+from . import bitboard
+
+# Precomputed attack tables, indexed by square index (see bitboard.py).
+#
+# Knight, king and pawn attacks don't depend on the other pieces, so they are
+# looked up directly. Sliding piece attacks are split into the four lines
+# through a square (rank, file, diagonal and anti-diagonal). The occupancy of
+# the six inner squares of a line is gathered into a 6-bit index with a shift
+# or a multiplication ("kindergarten" bitboards, a multiplication-based cousin
+# of rotated bitboards), which selects the precomputed attacks along the line
+# from a flat table at offset square * 64 + index.
+
+_FILE_B = bitboard.FILE_A << 1
+# The c2-h7 diagonal, which maps the bits of the a-file onto the 8th rank
+_DIAGONAL_C2_H7 = 0x0080402010080400
+
+_KNIGHT_STEPS = ((1, 2), (2, 1), (2, -1), (1, -2),
+                 (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+_KING_STEPS = ((0, 1), (1, 1), (1, 0), (1, -1),
+               (0, -1), (-1, -1), (-1, 0), (-1, 1))
+# (rank step, file step) of the captures for each color in ChessColor.ORDER
+_PAWN_CAPTURE_STEPS = (((1, -1), (1, 1)), ((-1, -1), (-1, 1)))
+
+_RANK_DIRECTIONS = ((0, 1), (0, -1))
+_FILE_DIRECTIONS = ((1, 0), (-1, 0))
+_DIAGONAL_DIRECTIONS = ((1, 1), (-1, -1))
+_ANTI_DIAGONAL_DIRECTIONS = ((1, -1), (-1, 1))
+
+
+def _step_targets(square: int, steps: tuple[tuple[int, int], ...]) -> int:
+    """Get the bitboard of the squares one step away from a square."""
+    rank, file = divmod(square, 8)
+    targets = bitboard.EMPTY
+    for rank_step, file_step in steps:
+        target_rank, target_file = rank + rank_step, file + file_step
+        if 0 <= target_rank < 8 and 0 <= target_file < 8:
+            targets |= 1 << (target_rank * 8 + target_file)
+    return targets
+
+
+def _ray_attacks(square: int, occupied: int,
+                 directions: tuple[tuple[int, int], ...]) -> int:
+    """Get the squares attacked by a slider by walking along its rays.
+
+    Each ray stops at the first occupied square, which is included as it can
+    be captured.
+    """
+    rank, file = divmod(square, 8)
+    attacks = bitboard.EMPTY
+    for rank_step, file_step in directions:
+        target_rank, target_file = rank + rank_step, file + file_step
+        while 0 <= target_rank < 8 and 0 <= target_file < 8:
+            target_bit = 1 << (target_rank * 8 + target_file)
+            attacks |= target_bit
+            if occupied & target_bit:
+                break
+            target_rank += rank_step
+            target_file += file_step
+    return attacks
+
+
+def _line_masks(directions: tuple[tuple[int, int], ...]) -> list[int]:
+    """Get the masks of the lines through each square, excluding the square
+    itself."""
+    return [_ray_attacks(square, bitboard.EMPTY, directions)
+            for square in range(64)]
+
+
+def _build_line_attacks(masks: list[int], inner_mask: int,
+                        directions: tuple[tuple[int, int], ...],
+                        index_function) -> list[int]:
+    """Build the flat table of attacks along one kind of line.
+
+    Args:
+        masks: The masks of the lines through each square.
+        inner_mask: The squares that can block the line, i.e. the board
+          without the edges the line runs into.
+        directions: The two opposite directions of the line.
+        index_function: A function of the square and the occupancy that
+          returns the 6-bit table index of the occupancy along the line.
+
+    Returns:
+        The attacks along the lines, at offset square * 64 + index.
+    """
+    attacks = [bitboard.EMPTY] * (64 * 64)
+
+    for square in range(64):
+        square_bit = 1 << square
+        inner = masks[square] & inner_mask
+
+        # Enumerate the subsets of the blocking squares with the
+        # Carry-Rippler trick
+        subset = bitboard.EMPTY
+        while True:
+            line_attacks = _ray_attacks(square, subset, directions)
+            # The occupancy normally includes the attacking piece itself, so
+            # the line attacks are stored both with and without it
+            for occupied in (subset, subset | square_bit):
+                index = index_function(square, occupied)
+                attacks[square * 64 + index] = line_attacks
+
+            subset = (subset - inner) & inner
+            if not subset:
+                break
+
+    return attacks
+
+
+def _rank_index(square: int, occupied: int) -> int:
+    return (occupied >> ((square & 56) + 1)) & 63
+
+
+def _file_index(square: int, occupied: int) -> int:
+    return ((((occupied >> (square & 7)) & bitboard.FILE_A) *
+             _DIAGONAL_C2_H7) >> 58) & 63
+
+
+def _diagonal_index(square: int, occupied: int) -> int:
+    return (((occupied & _DIAGONAL_INNER_MASKS[square]) * _FILE_B) >> 58) & 63
+
+
+def _anti_diagonal_index(square: int, occupied: int) -> int:
+    return (((occupied & _ANTI_DIAGONAL_INNER_MASKS[square]) * _FILE_B) >> 58
+            ) & 63
+
+
+_EDGES = (bitboard.FILE_A | bitboard.FILE_H |
+          bitboard.RANK_1 | bitboard.RANK_8)
+
+KNIGHT_ATTACKS = [_step_targets(square, _KNIGHT_STEPS) for square in range(64)]
+KING_ATTACKS = [_step_targets(square, _KING_STEPS) for square in range(64)]
+# Indexed by the color of the attacking pawn (see ChessColor.ORDER), then by
+# the square of the pawn
+PAWN_ATTACKS = [[_step_targets(square, steps) for square in range(64)]
+                for steps in _PAWN_CAPTURE_STEPS]
+
+_RANK_MASKS = _line_masks(_RANK_DIRECTIONS)
+_FILE_MASKS = _line_masks(_FILE_DIRECTIONS)
+_DIAGONAL_MASKS = _line_masks(_DIAGONAL_DIRECTIONS)
+_ANTI_DIAGONAL_MASKS = _line_masks(_ANTI_DIAGONAL_DIRECTIONS)
+# The diagonals without the edges of the board. The diagonals are gathered into
+# the index by file, and may end on an inner file, so their last squares are
+# masked out as they never block anything.
+_DIAGONAL_INNER_MASKS = [mask & ~_EDGES for mask in _DIAGONAL_MASKS]
+_ANTI_DIAGONAL_INNER_MASKS = [mask & ~_EDGES for mask in _ANTI_DIAGONAL_MASKS]
+
+_RANK_ATTACKS = _build_line_attacks(
+    _RANK_MASKS, ~(bitboard.FILE_A | bitboard.FILE_H), _RANK_DIRECTIONS,
+    _rank_index)
+_FILE_ATTACKS = _build_line_attacks(
+    _FILE_MASKS, ~(bitboard.RANK_1 | bitboard.RANK_8), _FILE_DIRECTIONS,
+    _file_index)
+_DIAGONAL_ATTACKS = _build_line_attacks(
+    _DIAGONAL_MASKS, ~_EDGES, _DIAGONAL_DIRECTIONS, _diagonal_index)
+_ANTI_DIAGONAL_ATTACKS = _build_line_attacks(
+    _ANTI_DIAGONAL_MASKS, ~_EDGES, _ANTI_DIAGONAL_DIRECTIONS,
+    _anti_diagonal_index)
+
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    """Get the squares attacked by a bishop.
+
+    Args:
+        square: The index of the square the bishop is on.
+        occupied: The bitboard of the occupied squares.
+
+    Returns:
+        A bitboard of the attacked squares, including any occupied squares
+        the bishop could capture on regardless of the color of their piece.
+    """
+    offset = square << 6
+    return (
+        _DIAGONAL_ATTACKS[
+            offset | ((((occupied & _DIAGONAL_INNER_MASKS[square]) *
+                        _FILE_B) >> 58) & 63)] |
+        _ANTI_DIAGONAL_ATTACKS[
+            offset | ((((occupied & _ANTI_DIAGONAL_INNER_MASKS[square]) *
+                        _FILE_B) >> 58) & 63)]
+    )
+
+
+def rook_attacks(square: int, occupied: int) -> int:
+    """Get the squares attacked by a rook.
+
+    Args:
+        square: The index of the square the rook is on.
+        occupied: The bitboard of the occupied squares.
+
+    Returns:
+        A bitboard of the attacked squares, including any occupied squares
+        the rook could capture on regardless of the color of their piece.
+    """
+    offset = square << 6
+    return (
+        _RANK_ATTACKS[offset | ((occupied >> ((square & 56) + 1)) & 63)] |
+        _FILE_ATTACKS[offset | (((((occupied >> (square & 7)) &
+                                   bitboard.FILE_A) * _DIAGONAL_C2_H7) >> 58)
+                                 & 63)]
+    )
+
+
+def queen_attacks(square: int, occupied: int) -> int:
+    """Get the squares attacked by a queen, see rook_attacks."""
+    return bishop_attacks(square, occupied) | rook_attacks(square, occupied)
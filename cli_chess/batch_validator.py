@@ -0,0 +1,192 @@
+# batch_validator.py
+#
+# This module requires NumPy, which the rest of the package doesn't.
+
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+
+from .attack_tables import KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS
+from .gameboard import Gameboard
+from .piece import ChessColor
+from .square import BETWEEN, DIAGONAL, ORTHOGONAL, SQUARE_INDICES
+
+
+class PositionBatch(NamedTuple):
+    """A batch of positions stored as NumPy arrays."""
+    # The piece bitboards of each position, with shape (positions, 12) and
+    # columns in the order of Piece.index
+    bitboards: np.ndarray
+    # The ChessColor.ORDER index of the player to move in each position
+    turns: np.ndarray
+    # The index of the en passant square of each position, or -1 if none
+    en_passant: np.ndarray
+
+    @staticmethod
+    def from_gameboards(gameboards: Iterable[Gameboard]) -> 'PositionBatch':
+        """Create a batch from Gameboard objects."""
+        bitboards = []
+        turns = []
+        en_passant = []
+        for gameboard in gameboards:
+            board = gameboard.view()
+            bitboards.append(board.get_piece_bitboards(ChessColor.WHITE) +
+                             board.get_piece_bitboards(ChessColor.BLACK))
+            turns.append(ChessColor.ORDER.index(gameboard.turn))
+            en_passant.append(-1 if board.en_passant is None else
+                              board.en_passant)
+
+        return PositionBatch(
+            np.array(bitboards, dtype=np.uint64).reshape(-1, 12),
+            np.array(turns, dtype=np.int8),
+            np.array(en_passant, dtype=np.int8))
+
+
+def parse_squares(squares: Sequence[str]) -> np.ndarray:
+    """Convert square coordinates, e.g. 'e4', to square indices.
+
+    Returns:
+        An array of the square indices, with -1 for invalid coordinates.
+    """
+    return np.fromiter((SQUARE_INDICES.get(square, -1) for square in squares),
+                       dtype=np.int8, count=len(squares))
+
+
+def validate_moves(positions: PositionBatch, position_indices: np.ndarray,
+                   starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Check many moves at once, with the same rules as
+    move_validator.is_legal_move.
+
+    Each move is played by the player to move in its position. Moves with
+    square indices outside 0-63 are illegal.
+
+    Args:
+        positions: The positions the moves are played in.
+        position_indices: The index of the position of each move.
+        starts: The index of the start square of each move.
+        ends: The index of the end square of each move.
+
+    Returns:
+        A boolean array that is True where the move is legal.
+    """
+    position_indices = np.asarray(position_indices, dtype=np.intp)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    valid_squares = ((starts >= 0) & (starts < 64) &
+                     (ends >= 0) & (ends < 64))
+    starts = np.where(valid_squares, starts, 0)
+    ends = np.where(valid_squares, ends, 0)
+
+    bitboards = positions.bitboards[position_indices]
+    turns = positions.turns[position_indices].astype(np.int64)
+    en_passant = positions.en_passant[position_indices].astype(np.int64)
+
+    white = np.bitwise_or.reduce(bitboards[:, :6], axis=1)
+    black = np.bitwise_or.reduce(bitboards[:, 6:], axis=1)
+    occupied = white | black
+    own = np.where(turns == 0, white, black)
+
+    start_bits = np.left_shift(_ONE, starts.astype(np.uint64))
+    end_bits = np.left_shift(_ONE, ends.astype(np.uint64))
+
+    # Find the piece on the start square, which must belong to the player
+    on_start = (bitboards & start_bits[:, None]) != 0
+    has_piece = on_start.any(axis=1)
+    piece_indices = on_start.argmax(axis=1)
+    piece_types = piece_indices % 6
+    own_piece = has_piece & (piece_indices // 6 == turns)
+    # The end square must not be occupied by one of the player's pieces
+    free_end = (own & end_bits) == 0
+
+    path_clear = (_BETWEEN[starts, ends] & occupied) == 0
+    end_occupied = (occupied & end_bits) != 0
+
+    knight_moves = (_KNIGHT_ATTACKS[starts] & end_bits) != 0
+    king_moves = (_KING_ATTACKS[starts] & end_bits) != 0
+    bishop_moves = _DIAGONAL[starts, ends] & path_clear
+    rook_moves = _ORTHOGONAL[starts, ends] & path_clear
+    queen_moves = bishop_moves | rook_moves
+
+    # Pawns push forward onto empty squares, two squares from their starting
+    # rank, and capture diagonally forward, possibly en passant
+    forward = np.where(turns == 0, 8, -8)
+    start_ranks = starts >> 3
+    single_pushes = (ends == starts + forward) & ~end_occupied
+    double_pushes = ((ends == starts + 2 * forward) & ~end_occupied &
+                     path_clear &
+                     (start_ranks == np.where(turns == 0, 1, 6)))
+    pawn_captures = (((_PAWN_ATTACKS[turns, starts] & end_bits) != 0) &
+                     (end_occupied | (ends == en_passant)))
+    pawn_moves = single_pushes | double_pushes | pawn_captures
+
+    geometry = np.choose(piece_types, (pawn_moves, knight_moves, bishop_moves,
+                                       rook_moves, queen_moves, king_moves))
+
+    # The move must not leave the player's king attacked, so the enemy pieces
+    # are looked for around the king square with the board as it is after the
+    # move, without a captured piece, which en passant takes from beside the
+    # end square
+    captured_bits = end_bits.copy()
+    en_passant_captures = ((piece_types == 0) & (ends == en_passant) &
+                           ((starts & 7) != (ends & 7)))
+    captured_bits[en_passant_captures] = np.left_shift(
+        _ONE, ((starts & 56) | (ends & 7))[en_passant_captures].astype(
+            np.uint64))
+    occupied_after = (occupied & ~start_bits & ~captured_bits) | end_bits
+    enemy_pieces = (np.where(turns[:, None] == 0, bitboards[:, 6:],
+                             bitboards[:, :6]) & ~captured_bits[:, None])
+
+    own_kings = np.where(turns == 0, bitboards[:, 5], bitboards[:, 11])
+    has_king = own_kings != 0
+    # The bit of a square is found among the ascending square bits, as an
+    # exact integer index
+    king_squares = np.searchsorted(_SQUARE_BITS,
+                                   np.where(has_king, own_kings, _ONE))
+    targets = np.where(piece_types == 5, ends, king_squares)
+    return (valid_squares & own_piece & free_end & geometry &
+            ~(has_king & _is_attacked(targets, turns, occupied_after,
+                                      enemy_pieces)))
+
+
+def _is_attacked(targets: np.ndarray, turns: np.ndarray,
+                 occupied: np.ndarray, enemy_pieces: np.ndarray) -> np.ndarray:
+    """Check if squares are attacked by enemy pieces.
+
+    Args:
+        targets: The index of each square.
+        turns: The ChessColor.ORDER index of each defending player.
+        occupied: The bitboard of the occupied squares of each board.
+        enemy_pieces: The bitboards of the enemy pieces in Piece.ORDER of each
+          board, with shape (boards, 6).
+
+    Returns:
+        A boolean array that is True where the square is attacked.
+    """
+    attacks = ((_PAWN_ATTACKS[turns, targets] & enemy_pieces[:, 0]) |
+               (_KNIGHT_ATTACKS[targets] & enemy_pieces[:, 1]) |
+               (_KING_ATTACKS[targets] & enemy_pieces[:, 5])) != 0
+
+    # A slider on any square attacks the target if they share a line of its
+    # kind and there is nothing between them
+    diagonal_sliders = enemy_pieces[:, 2] | enemy_pieces[:, 4]
+    orthogonal_sliders = enemy_pieces[:, 3] | enemy_pieces[:, 4]
+    clear = (_BETWEEN[targets] & occupied[:, None]) == 0
+    slider_attacks = (
+        (((diagonal_sliders[:, None] >> _SQUARES) & _ONE) != 0) &
+        _DIAGONAL[targets] |
+        (((orthogonal_sliders[:, None] >> _SQUARES) & _ONE) != 0) &
+        _ORTHOGONAL[targets])
+    return attacks | (slider_attacks & clear).any(axis=1)
+
+
+_ONE = np.uint64(1)
+_SQUARES = np.arange(64, dtype=np.uint64)
+_SQUARE_BITS = np.left_shift(_ONE, _SQUARES)
+_KNIGHT_ATTACKS = np.array(KNIGHT_ATTACKS, dtype=np.uint64)
+_KING_ATTACKS = np.array(KING_ATTACKS, dtype=np.uint64)
+_PAWN_ATTACKS = np.array(PAWN_ATTACKS, dtype=np.uint64)
+# The square pair tables of square.py as 64x64 arrays
+_BETWEEN = np.array(BETWEEN, dtype=np.uint64).reshape(64, 64)
+_DIAGONAL = np.array(DIAGONAL, dtype=bool).reshape(64, 64)
+_ORTHOGONAL = np.array(ORTHOGONAL, dtype=bool).reshape(64, 64)
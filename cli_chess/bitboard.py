@@ -0,0 +1,85 @@
+# bitboard.py
+
+from typing import Iterator
+
+from .board_info import BoardInfo
+from .square import BETWEEN, SQUARE_INDICES, SQUARE_NAMES
+
+# A bitboard is a 64-bit integer where each bit corresponds to a square. The
+# squares are indexed from 0 to 63 starting at a1 and going along the ranks,
+# i.e. a1 = 0, b1 = 1, ..., h1 = 7, a2 = 8, ..., h8 = 63.
+EMPTY = 0
+FULL = (1 << 64) - 1
+
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_8 = RANK_1 << 56
+
+NUM_SQUARES = BoardInfo.LENGTH * BoardInfo.LENGTH
+
+
+def square_to_index(square_coords: str) -> int:
+    """Map square coordinates, e.g. 'e4', to the square index (0-63).
+
+    Raises:
+        KeyError: If the coordinates for the square are invalid.
+    """
+    return SQUARE_INDICES[square_coords]
+
+
+def index_to_square(index: int) -> str:
+    """Map a square index (0-63) to the square coordinates, e.g. 'e4'."""
+    return SQUARE_NAMES[index]
+
+
+def row_col_to_index(row: int, col: int) -> int:
+    """Map a row and column of the 2D board array to the square index."""
+    # Row 0 holds the 8th rank, so the rows are in reverse order of the ranks
+    return (BoardInfo.LENGTH - 1 - row) * BoardInfo.LENGTH + col
+
+
+def index_to_row_col(index: int) -> tuple[int, int]:
+    """Map a square index to the row and column of the 2D board array."""
+    row = BoardInfo.LENGTH - 1 - index // BoardInfo.LENGTH
+    col = index % BoardInfo.LENGTH
+    return row, col
+
+
+def square_bit(index: int) -> int:
+    """Get the bitboard with only the square with the given index set."""
+    return 1 << index
+
+
+def popcount(bitboard: int) -> int:
+    """Count the number of set squares in a bitboard."""
+    return bitboard.bit_count()
+
+
+def lsb(bitboard: int) -> int:
+    """Get the index of the least significant set square of a non-empty
+    bitboard."""
+    return (bitboard & -bitboard).bit_length() - 1
+
+
+def iter_squares(bitboard: int) -> Iterator[int]:
+    """Iterate over the indices of the set squares in a bitboard, from the
+    least to the most significant."""
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+
+def ray_between(start: int, end: int) -> int:
+    """Get the squares strictly between two squares on a shared line.
+
+    Args:
+        start: The index of the first square.
+        end: The index of the second square.
+
+    Returns:
+        A bitboard of the squares between the two squares if they share a
+        rank, file or diagonal, otherwise an empty bitboard.
+    """
+    return BETWEEN[start << 6 | end]
@@ -1,9 +1,6 @@
 # board_info.py
 
-from dataclasses import dataclass
 
-
-@dataclass
 class BoardInfo:
     """Information about the chess board."""
     # NOTE: The files and ranks are ordered from the white player's perspective.
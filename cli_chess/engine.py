@@ -0,0 +1,420 @@
+# engine.py
+
+import time
+from threading import Event
+from typing import Callable, List, NamedTuple, Sequence
+
+from .evaluation import MIDGAME_PIECE_VALUES, PawnHashTable, evaluate
+from .gameboard import Gameboard
+from .move import NULL_MOVE
+from .move_generator import (generate_legal_captures, generate_legal_moves,
+                             is_in_check)
+from .piece import Piece
+from .transposition_table import TranspositionTable
+
+# Scores are in centipawns from the point of view of the player to move. A
+# mate is scored as MATE_SCORE minus the number of plies until the mate, so
+# that faster mates score higher.
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+MAX_PLY = 100
+
+# The number of nodes between checks of the time and node limits
+_LIMIT_CHECK_INTERVAL = 1024
+
+# Move ordering scores, by kind of move. Captures are scored within their
+# band by MVV-LVA, and quiet moves by the history heuristic.
+_TT_MOVE_SCORE = 1 << 30
+_CAPTURE_SCORE = 1 << 28
+_PROMOTION_SCORE = 1 << 27
+_KILLER_SCORES = (1 << 26, (1 << 26) - 1)
+
+
+class SearchResult(NamedTuple):
+    """The result of a (possibly partial) search."""
+    # The best move, encoded as in move.py, or NULL_MOVE if there is none
+    best_move: int
+    score: int
+    depth: int
+    nodes: int
+    # The principal variation, i.e. the expected line of play
+    pv: List[int]
+    seconds: float
+
+
+class _SearchAborted(Exception):
+    """Raised to unwind the search when it runs out of time or nodes, or is
+    stopped."""
+    pass
+
+
+class Engine:
+    """A chess engine that searches for the best move with alpha-beta.
+
+    The search is a principal variation search (PVS) under iterative
+    deepening, with a quiescence search at the leaves, a transposition table,
+    and MVV-LVA, killer and history move ordering. It can be limited by depth,
+    time and nodes, and stopped at any time, e.g. from another thread.
+    """
+
+    def __init__(self, hash_mb: float = 16,
+                 transposition_table: TranspositionTable | None = None,
+                 stop_event: Event | None = None) -> None:
+        """Initialize the engine.
+
+        Args:
+            hash_mb: The memory budget of the transposition table in megabytes.
+            transposition_table: A transposition table to use instead of a new
+              one, e.g. one shared with other engines.
+            stop_event: An event that stops the search when it is set, in
+              addition to stop(), e.g. a multiprocessing.Event shared with
+              other processes.
+        """
+        self.transposition_table = (transposition_table or
+                                    TranspositionTable(hash_mb))
+        self._stop_event = stop_event
+        self._pawn_table = PawnHashTable()
+        self._history = [0] * (64 * 64)
+        self._killers = [[NULL_MOVE, NULL_MOVE] for _ in range(MAX_PLY + 1)]
+        self._pv: List[List[int]] = [[] for _ in range(MAX_PLY + 2)]
+        self._stop_requested = False
+
+        self._gameboard: Gameboard | None = None
+        self._nodes = 0
+        self._deadline: float | None = None
+        self._node_limit: int | None = None
+        self._can_abort = False
+        # The Zobrist hashes of the positions on the current search path
+        self._path_hashes: List[int] = []
+
+    def new_game(self) -> None:
+        """Forget everything learned from previous searches."""
+        self.transposition_table.clear()
+        self._pawn_table.clear()
+        self._history = [0] * (64 * 64)
+        self._killers = [[NULL_MOVE, NULL_MOVE] for _ in range(MAX_PLY + 1)]
+
+    def stop(self) -> None:
+        """Stop the current search as soon as possible.
+
+        The search then returns the result of the last completed iteration.
+        """
+        self._stop_requested = True
+
+    def search(self, gameboard: Gameboard, depth: int | None = None,
+               time_limit: float | None = None,
+               node_limit: int | None = None,
+               on_iteration: Callable[[SearchResult], None] | None = None,
+               first_depth: int = 1,
+               history: Sequence[int] = ()) -> SearchResult:
+        """Search for the best move for the player to move.
+
+        The search deepens one ply at a time until a limit is reached. The
+        first iteration always completes, so a move is returned if there is
+        one, however tight the limits are.
+
+        Args:
+            gameboard: The Gameboard object, which is left unchanged.
+            depth: The maximum depth in plies, or None for no limit.
+            time_limit: The maximum search time in seconds, or None for no
+              limit.
+            node_limit: The maximum number of nodes, or None for no limit.
+            on_iteration: Called with the result of each completed iteration.
+            first_depth: The depth of the first iteration. Starting deeper
+              than 1 is used to make parallel searches diverge.
+            history: The Zobrist hashes of the positions of the game before
+              the position searched, e.g. GameRecord.history(), so that
+              lines repeating them are scored as draws.
+
+        Returns:
+            The result of the deepest completed iteration.
+        """
+        start_time = time.perf_counter()
+        self._gameboard = gameboard
+        self._nodes = 0
+        self._deadline = (start_time + time_limit
+                          if time_limit is not None else None)
+        self._node_limit = node_limit
+        self._stop_requested = False
+        self._can_abort = False
+        # Positions of the game before the last capture or pawn move can't
+        # repeat
+        self._path_hashes = list(history[max(
+            0, len(history) - gameboard.halfmove_clock):])
+        self.transposition_table.new_search()
+        root_ply = gameboard.ply
+
+        max_depth = min(depth or MAX_PLY, MAX_PLY)
+        result = SearchResult(NULL_MOVE, 0, 0, 0, [], 0.0)
+
+        for iteration_depth in range(min(first_depth, max_depth),
+                                     max_depth + 1):
+            try:
+                score = self._search(iteration_depth, -INFINITY, INFINITY, 0,
+                                     True)
+            except _SearchAborted:
+                # Take back the moves of the interrupted search
+                while gameboard.ply > root_ply:
+                    gameboard.unmake_move()
+                self._path_hashes = []
+                break
+            finally:
+                self._can_abort = True
+
+            pv = list(self._pv[0])
+            result = SearchResult(pv[0] if pv else NULL_MOVE, score,
+                                  iteration_depth, self._nodes, pv,
+                                  time.perf_counter() - start_time)
+            if on_iteration:
+                on_iteration(result)
+
+            # There is no point in searching deeper without moves or after
+            # finding a mate, and the next iteration would most likely not
+            # finish in the time left
+            if not pv or abs(score) >= MATE_THRESHOLD:
+                break
+            if (time_limit is not None and
+                    result.seconds > time_limit / 2):
+                break
+            if self._stop_requested:
+                break
+
+        self._gameboard = None
+        return result._replace(nodes=self._nodes,
+                               seconds=time.perf_counter() - start_time)
+
+    def _check_limits(self) -> None:
+        if not self._can_abort:
+            return
+        if (self._stop_requested or
+                (self._stop_event is not None and self._stop_event.is_set()) or
+                (self._node_limit is not None and
+                 self._nodes >= self._node_limit) or
+                (self._deadline is not None and
+                 time.perf_counter() >= self._deadline)):
+            raise _SearchAborted
+
+    def _is_draw(self) -> bool:
+        """Check for a draw by the fifty-move rule or by repetition on the
+        search path."""
+        gameboard = self._gameboard
+        halfmove_clock = gameboard.halfmove_clock
+        if halfmove_clock >= 100:
+            return True
+
+        # Only positions since the last capture or pawn move can repeat
+        path_hashes = self._path_hashes
+        return gameboard.zobrist_hash in path_hashes[
+            max(0, len(path_hashes) - halfmove_clock):]
+
+    def _search(self, depth: int, alpha: int, beta: int, ply: int,
+                is_pv_node: bool) -> int:
+        """Search a position with principal variation search.
+
+        Returns:
+            The score of the position, which is exact if it's between alpha
+            and beta, and otherwise a bound.
+        """
+        self._pv[ply] = []
+        self._nodes += 1
+        if self._nodes % _LIMIT_CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        gameboard = self._gameboard
+        if ply:
+            if self._is_draw():
+                return 0
+            if ply >= MAX_PLY:
+                return evaluate(gameboard, self._pawn_table)
+
+        color = gameboard.turn
+        in_check = is_in_check(gameboard, color)
+        # Look further into forcing lines by extending checks
+        if in_check:
+            depth += 1
+        if depth <= 0:
+            return self._quiescence(alpha, beta, ply)
+
+        table = self.transposition_table
+        key = gameboard.zobrist_hash
+        entry = table.probe(key)
+        tt_move = NULL_MOVE
+        if entry:
+            tt_move = entry.move
+            if entry.depth >= depth and not is_pv_node:
+                score = _score_from_table(entry.score, ply)
+                if (entry.bound == TranspositionTable.EXACT or
+                        (entry.bound == TranspositionTable.LOWER_BOUND and
+                         score >= beta) or
+                        (entry.bound == TranspositionTable.UPPER_BOUND and
+                         score <= alpha)):
+                    return score
+
+        moves = generate_legal_moves(gameboard, color)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = NULL_MOVE
+        path_hashes = self._path_hashes
+        path_hashes.append(key)
+
+        for index, move in enumerate(self._order_moves(moves, tt_move, ply)):
+            gameboard.make_move(move)
+            if index == 0:
+                score = -self._search(depth - 1, -beta, -alpha, ply + 1,
+                                      is_pv_node)
+            else:
+                # Try to prove that the move is worse than the best one with
+                # a null window, and search it fully only if that fails
+                score = -self._search(depth - 1, -alpha - 1, -alpha, ply + 1,
+                                      False)
+                if alpha < score < beta:
+                    score = -self._search(depth - 1, -beta, -alpha, ply + 1,
+                                          True)
+            gameboard.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self._pv[ply] = [move] + self._pv[ply + 1]
+                    if score >= beta:
+                        if not self._is_capture(move):
+                            self._update_quiet_move_stats(move, depth, ply)
+                        break
+
+        path_hashes.pop()
+
+        if best_score >= beta:
+            bound = TranspositionTable.LOWER_BOUND
+        elif best_score > original_alpha:
+            bound = TranspositionTable.EXACT
+        else:
+            bound = TranspositionTable.UPPER_BOUND
+        table.store(key, min(depth, 255), _score_to_table(best_score, ply),
+                    bound, best_move)
+
+        return best_score
+
+    def _quiescence(self, alpha: int, beta: int, ply: int) -> int:
+        """Search only captures and promotions until the position is quiet,
+        so that the static evaluation isn't taken in the middle of an
+        exchange."""
+        self._pv[ply] = []
+        self._nodes += 1
+        if self._nodes % _LIMIT_CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        gameboard = self._gameboard
+        # The player to move can usually do at least as well as the static
+        # evaluation by not capturing ("standing pat")
+        best_score = evaluate(gameboard, self._pawn_table)
+        if best_score >= beta or ply >= MAX_PLY:
+            return best_score
+        if best_score > alpha:
+            alpha = best_score
+
+        captures = generate_legal_captures(gameboard, gameboard.turn)
+        for move in self._order_moves(captures, NULL_MOVE, ply):
+            gameboard.make_move(move)
+            score = -self._quiescence(-beta, -alpha, ply + 1)
+            gameboard.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        break
+
+        return best_score
+
+    def _is_capture(self, move: int) -> bool:
+        board = self._gameboard.view()
+        end = move >> 6 & 63
+        return (board.get_piece_index_at(end) is not None or
+                (end == board.en_passant and
+                 board.get_piece_index_at(move & 63) % len(Piece.ORDER) ==
+                 _PAWN))
+
+    def _order_moves(self, moves: List[int], tt_move: int,
+                     ply: int) -> List[int]:
+        """Sort moves so that the ones most likely to be best come first.
+
+        The order is: the transposition table move, captures by most
+        valuable victim and then least valuable attacker (MVV-LVA),
+        promotions, killer moves, and other moves by history score.
+        """
+        board = self._gameboard.view()
+        history = self._history
+        killers = self._killers[ply]
+        en_passant = board.en_passant
+
+        scored_moves = []
+        for move in moves:
+            start = move & 63
+            end = move >> 6 & 63
+            if move == tt_move:
+                score = _TT_MOVE_SCORE
+            else:
+                victim = board.get_piece_index_at(end)
+                attacker = board.get_piece_index_at(start) % len(Piece.ORDER)
+                if victim is None and end == en_passant and attacker == _PAWN:
+                    victim = _PAWN
+                if victim is not None:
+                    victim_value = MIDGAME_PIECE_VALUES[
+                        victim % len(Piece.ORDER)]
+                    score = _CAPTURE_SCORE + victim_value * 16 - attacker
+                elif move >> 12:
+                    score = _PROMOTION_SCORE + (move >> 12)
+                elif move == killers[0]:
+                    score = _KILLER_SCORES[0]
+                elif move == killers[1]:
+                    score = _KILLER_SCORES[1]
+                else:
+                    score = history[start << 6 | end]
+            scored_moves.append((score, move))
+
+        scored_moves.sort(reverse=True)
+        return [move for _, move in scored_moves]
+
+    def _update_quiet_move_stats(self, move: int, depth: int,
+                                 ply: int) -> None:
+        """Remember a quiet move that caused a beta cutoff, as it is likely to
+        be good in sibling positions too."""
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+        index = (move & 63) << 6 | (move >> 6 & 63)
+        self._history[index] += depth * depth
+        # Keep the history scores below the killer scores
+        if self._history[index] >= _KILLER_SCORES[1]:
+            self._history = [score // 2 for score in self._history]
+
+
+_PAWN = Piece.ORDER.index(Piece.PAWN)
+
+
+def _score_to_table(score: int, ply: int) -> int:
+    """Convert a mate score to be relative to the stored position rather than
+    the root."""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score: int, ply: int) -> int:
+    """Convert a stored mate score back to be relative to the root."""
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
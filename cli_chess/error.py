@@ -2,3 +2,11 @@
 
 class InvalidSquareError (Exception):
     pass
+
+
+class InvalidFenError (Exception):
+    pass
+
+
+class InvalidPgnError (Exception):
+    pass
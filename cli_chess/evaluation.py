@@ -0,0 +1,272 @@
+# evaluation.py
+
+from typing import TYPE_CHECKING
+
+from . import bitboard
+from .piece import ChessColor, Piece
+
+if TYPE_CHECKING:
+    from .gameboard import Gameboard
+
+# The static evaluation is the sum of material, piece-square and pawn
+# structure terms. Each term has a middlegame and an endgame value, which are
+# blended by the game phase, i.e. the amount of material other than pawns
+# left on the board ("tapered evaluation").
+#
+# The material and piece-square scores of a position are sums over its
+# pieces, so Gameboard keeps them up to date as pieces are placed and removed,
+# like its Zobrist hash, and evaluating doesn't need to scan the board. The
+# pawn structure terms only depend on the pawns, so they are cached by the
+# hash of the pawns in a PawnHashTable.
+
+# The material values of the pieces, in the order of Piece.ORDER
+MIDGAME_PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+ENDGAME_PIECE_VALUES = (120, 300, 320, 530, 950, 0)
+
+# The phase is the sum of the weights of the pieces on the board, capped at
+# MAX_PHASE, the phase of the starting position
+PHASE_WEIGHTS_BY_TYPE = (0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+# Pawn structure penalties and bonuses: per extra pawn on a file, per pawn
+# without pawns of the same color on the adjacent files, and per passed pawn
+# by its rank counted from its own side
+DOUBLED_PAWN_PENALTY = (10, 20)
+ISOLATED_PAWN_PENALTY = (10, 15)
+MIDGAME_PASSED_PAWN_BONUS = (0, 5, 10, 15, 25, 40, 60, 0)
+ENDGAME_PASSED_PAWN_BONUS = (0, 10, 20, 35, 60, 90, 130, 0)
+
+
+class PawnHashTable:
+    """A fixed-size cache of pawn structure scores, keyed by pawn hash.
+
+    Positions in a search mostly share their pawn structure, so nearly every
+    lookup is a hit. Colliding entries simply replace each other.
+    """
+
+    def __init__(self, num_entries: int = 1 << 14) -> None:
+        """Initialize an empty table.
+
+        Args:
+            num_entries: The number of entries, rounded down to a power of two.
+        """
+        self._mask = (1 << (num_entries.bit_length() - 1)) - 1
+        # Each entry is a tuple of the pawn hash and the middlegame and
+        # endgame scores, or None
+        self._entries: list[tuple[int, int, int] | None] = (
+            [None] * (self._mask + 1))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._mask + 1
+
+    def clear(self) -> None:
+        self._entries = [None] * (self._mask + 1)
+        self.hits = 0
+        self.misses = 0
+
+    def scores(self, gameboard: 'Gameboard') -> tuple[int, int]:
+        """Get the pawn structure scores of a position, computing them if they
+        aren't in the table.
+
+        Returns:
+            The middlegame and endgame scores from white's point of view.
+        """
+        key = gameboard.pawn_hash
+        entry = self._entries[key & self._mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1], entry[2]
+
+        self.misses += 1
+        midgame, endgame = pawn_structure_scores(gameboard)
+        self._entries[key & self._mask] = (key, midgame, endgame)
+        return midgame, endgame
+
+
+def evaluate(gameboard: 'Gameboard',
+             pawn_table: PawnHashTable | None = None) -> int:
+    """Evaluate a position statically.
+
+    Args:
+        gameboard: The Gameboard object.
+        pawn_table: A cache of pawn structure scores. If None, they are
+          computed from scratch.
+
+    Returns:
+        The score in centipawns from the point of view of the player to move.
+    """
+    if pawn_table is not None:
+        pawn_midgame, pawn_endgame = pawn_table.scores(gameboard)
+    else:
+        pawn_midgame, pawn_endgame = pawn_structure_scores(gameboard)
+
+    phase = min(gameboard.phase, MAX_PHASE)
+    score = ((gameboard.midgame_score + pawn_midgame) * phase +
+             (gameboard.endgame_score + pawn_endgame) * (MAX_PHASE - phase)
+             ) // MAX_PHASE
+    return score if gameboard.turn == ChessColor.WHITE else -score
+
+
+def pawn_structure_scores(gameboard: 'Gameboard') -> tuple[int, int]:
+    """Compute the pawn structure scores of a position.
+
+    Returns:
+        The middlegame and endgame scores from white's point of view.
+    """
+    board = gameboard.view()
+    pawns = [board.get_bitboard(Piece.PAWN, color)
+             for color in ChessColor.ORDER]
+    midgame = endgame = 0
+
+    for color_index, sign in enumerate((1, -1)):
+        own_pawns = pawns[color_index]
+        enemy_pawns = pawns[1 - color_index]
+        for file, file_mask in enumerate(_FILE_MASKS):
+            count = (own_pawns & file_mask).bit_count()
+            if count > 1:
+                midgame -= sign * DOUBLED_PAWN_PENALTY[0] * (count - 1)
+                endgame -= sign * DOUBLED_PAWN_PENALTY[1] * (count - 1)
+            if count and not own_pawns & _ADJACENT_FILE_MASKS[file]:
+                midgame -= sign * ISOLATED_PAWN_PENALTY[0] * count
+                endgame -= sign * ISOLATED_PAWN_PENALTY[1] * count
+
+        passed_pawn_masks = _PASSED_PAWN_MASKS[color_index]
+        for square in bitboard.iter_squares(own_pawns):
+            if not enemy_pawns & passed_pawn_masks[square]:
+                rank = square >> 3 if color_index == 0 else 7 - (square >> 3)
+                midgame += sign * MIDGAME_PASSED_PAWN_BONUS[rank]
+                endgame += sign * ENDGAME_PASSED_PAWN_BONUS[rank]
+
+    return midgame, endgame
+
+
+# The piece-square tables from white's point of view, with the rows from rank 8
+# down to rank 1 as on a printed board, in the order of Piece.ORDER
+_MIDGAME_SQUARE_TABLES = (
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     10, 10, 20, 30, 30, 20, 10, 10,
+     5, 5, 10, 25, 25, 10, 5, 5,
+     0, 0, 0, 20, 20, 0, 0, 0,
+     5, -5, -10, 0, 0, -10, -5, 5,
+     5, 10, 10, -20, -20, 10, 10, 5,
+     0, 0, 0, 0, 0, 0, 0, 0),
+    (-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20, 0, 0, 0, 0, -20, -40,
+     -30, 0, 10, 15, 15, 10, 0, -30,
+     -30, 5, 15, 20, 20, 15, 5, -30,
+     -30, 0, 15, 20, 20, 15, 0, -30,
+     -30, 5, 10, 15, 15, 10, 5, -30,
+     -40, -20, 0, 5, 5, 0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50),
+    (-20, -10, -10, -10, -10, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 5, 5, 10, 10, 5, 5, -10,
+     -10, 0, 10, 10, 10, 10, 0, -10,
+     -10, 10, 10, 10, 10, 10, 10, -10,
+     -10, 5, 0, 0, 0, 0, 5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20),
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     5, 10, 10, 10, 10, 10, 10, 5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     0, 0, 0, 5, 5, 0, 0, 0),
+    (-20, -10, -10, -5, -5, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -5, 0, 5, 5, 5, 5, 0, -5,
+     0, 0, 5, 5, 5, 5, 0, -5,
+     -10, 5, 5, 5, 5, 5, 0, -10,
+     -10, 0, 5, 0, 0, 0, 0, -10,
+     -20, -10, -10, -5, -5, -10, -10, -20),
+    (-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+     20, 20, 0, 0, 0, 0, 20, 20,
+     20, 30, 10, 0, 0, 10, 30, 20),
+)
+
+# In the endgame pawns gain value as they advance, and the king belongs in the
+# center. The other pieces use their middlegame tables.
+_ENDGAME_SQUARE_TABLES = (
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     80, 80, 80, 80, 80, 80, 80, 80,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     30, 30, 30, 30, 30, 30, 30, 30,
+     20, 20, 20, 20, 20, 20, 20, 20,
+     10, 10, 10, 10, 10, 10, 10, 10,
+     10, 10, 10, 10, 10, 10, 10, 10,
+     0, 0, 0, 0, 0, 0, 0, 0),
+    *_MIDGAME_SQUARE_TABLES[1:-1],
+    (-50, -40, -30, -20, -20, -30, -40, -50,
+     -30, -20, -10, 0, 0, -10, -20, -30,
+     -30, -10, 20, 30, 30, 20, -10, -30,
+     -30, -10, 30, 40, 40, 30, -10, -30,
+     -30, -10, 30, 40, 40, 30, -10, -30,
+     -30, -10, 20, 30, 30, 20, -10, -30,
+     -30, -30, 0, 0, 0, 0, -30, -30,
+     -50, -30, -30, -30, -30, -30, -30, -50),
+)
+
+
+def _build_score_table(piece_values: tuple[int, ...],
+                       square_tables: tuple[tuple[int, ...], ...]
+                       ) -> tuple[int, ...]:
+    """Build a table of the material plus piece-square scores of each piece on
+    each square, from white's point of view, indexed by
+    Piece.index << 6 | square index."""
+    scores = []
+    for color_index, sign in enumerate((1, -1)):
+        for piece_value, square_table in zip(piece_values, square_tables):
+            for square in range(bitboard.NUM_SQUARES):
+                # Black's tables are white's mirrored along the middle ranks
+                if color_index:
+                    square ^= 56
+                row = 7 - (square >> 3)
+                scores.append(sign * (piece_value +
+                                      square_table[row * 8 + (square & 7)]))
+    return tuple(scores)
+
+
+# The scores that Gameboard adds up as pieces are placed, see
+# Gameboard.midgame_score, endgame_score and phase
+MIDGAME_SCORES = _build_score_table(MIDGAME_PIECE_VALUES,
+                                    _MIDGAME_SQUARE_TABLES)
+ENDGAME_SCORES = _build_score_table(ENDGAME_PIECE_VALUES,
+                                    _ENDGAME_SQUARE_TABLES)
+# Indexed by Piece.index
+PHASE_WEIGHTS = PHASE_WEIGHTS_BY_TYPE * len(ChessColor.ORDER)
+
+_FILE_MASKS = tuple(bitboard.FILE_A << file for file in range(8))
+_ADJACENT_FILE_MASKS = tuple(
+    (_FILE_MASKS[file - 1] if file > 0 else 0) |
+    (_FILE_MASKS[file + 1] if file < 7 else 0) for file in range(8))
+
+
+def _build_passed_pawn_masks(color_index: int) -> tuple[int, ...]:
+    """Build the masks of the squares in front of each square on its own and
+    the adjacent files, from the point of view of a color. A pawn is passed if
+    there are no enemy pawns on them."""
+    masks = []
+    for square in range(bitboard.NUM_SQUARES):
+        files = _FILE_MASKS[square & 7] | _ADJACENT_FILE_MASKS[square & 7]
+        rank = square >> 3
+        if color_index == 0:
+            in_front = bitboard.FULL << (8 * (rank + 1)) & bitboard.FULL
+        else:
+            in_front = (1 << (8 * rank)) - 1
+        masks.append(files & in_front)
+    return tuple(masks)
+
+
+_PASSED_PAWN_MASKS = (_build_passed_pawn_masks(0),
+                      _build_passed_pawn_masks(1))
@@ -0,0 +1,206 @@
+# game_record.py
+
+import collections
+from array import array
+from typing import Iterable
+
+from .gameboard import Gameboard
+
+# The largest halfmove clock that is stored. Later clocks are clamped, which
+# is well past any draw rule, and taking back a move restores the clamped
+# clock.
+_MAX_CLOCK = 0xFFFF
+
+# The undo data of a move, i.e. what the move changes on the board besides
+# moving pieces, is packed into 15 bits: the index of the captured piece in
+# bits 0-3, or _NO_CAPTURE, the castling rights before the move in bits 4-7
+# and the en passant square before the move in bits 8-14, or _NO_EN_PASSANT
+_NO_CAPTURE = 15
+_NO_EN_PASSANT = 64
+
+
+class GameRecord:
+    """The moves of a game, played on a Gameboard.
+
+    Moves are stored as 16-bit integers encoded as in move.py, in parallel
+    with the Zobrist hash and the halfmove clock of every position of the
+    game, starting with the initial position. Together with a count of the
+    occurrences of each position, this makes checking for a threefold
+    repetition or for the fifty-move rule a constant-time operation.
+
+    The moves aren't kept on the undo stack of the board, which takes a tuple
+    per move, but their undo data is packed into 16 bits, so a game takes
+    14 bytes per move. Only the positions since the last capture or pawn
+    move can repeat, so only those are counted, at about 80 bytes each.
+    """
+    __slots__ = ('_gameboard', '_start_fen', '_moves', '_undo_data',
+                 '_hashes', '_clocks', '_counts')
+
+    def __init__(self, gameboard: Gameboard | None = None) -> None:
+        """Start recording a game.
+
+        Args:
+            gameboard: The Gameboard object the moves are played on, whose
+              current position is the initial position of the game. Defaults
+              to a new board in the starting position.
+        """
+        self._gameboard = gameboard if gameboard is not None else Gameboard()
+        self._start_fen = self._gameboard.to_fen()
+        self._moves = array('H')
+        self._undo_data = array('H')
+        self._hashes = array('Q', [self._gameboard.zobrist_hash])
+        self._clocks = array('H', [min(self._gameboard.halfmove_clock,
+                                       _MAX_CLOCK)])
+        # The number of occurrences of each position since the last capture or
+        # pawn move, by hash
+        self._counts = {self._gameboard.zobrist_hash: 1}
+
+    @classmethod
+    def from_moves(cls, moves: Iterable[int],
+                   fen: str | None = None) -> 'GameRecord':
+        """Replay the moves of a game, e.g. of an archived game.
+
+        Args:
+            moves: The moves, encoded as in move.py. They aren't validated.
+            fen: The FEN of the initial position. Defaults to the starting
+              position.
+
+        Raises:
+            InvalidFenError: If the FEN isn't valid.
+        """
+        record = cls(Gameboard.from_fen(fen) if fen is not None else None)
+        for move in moves:
+            record.play(move)
+        return record
+
+    @property
+    def gameboard(self) -> Gameboard:
+        """The board in the current position of the game."""
+        return self._gameboard
+
+    @property
+    def start_fen(self) -> str:
+        """The FEN of the initial position of the game."""
+        return self._start_fen
+
+    @property
+    def moves(self) -> array:
+        """The moves played, encoded as in move.py. The array must not be
+        modified."""
+        return self._moves
+
+    @property
+    def hashes(self) -> array:
+        """The Zobrist hashes of the positions of the game, from the initial
+        position to the current one. The array must not be modified."""
+        return self._hashes
+
+    @property
+    def ply(self) -> int:
+        """The number of moves played."""
+        return len(self._moves)
+
+    def __len__(self) -> int:
+        return len(self._moves)
+
+    def play(self, move: int) -> None:
+        """Play a move and record it.
+
+        Args:
+            move: The move, encoded as in move.py. It isn't validated.
+        """
+        gameboard = self._gameboard
+        gameboard.make_move(move)
+        _, captured, castling_rights, en_passant, _ = (
+            gameboard.pop_undo_record())
+        key = gameboard.zobrist_hash
+        clock = min(gameboard.halfmove_clock, _MAX_CLOCK)
+        self._moves.append(move)
+        self._undo_data.append(
+            (_NO_CAPTURE if captured is None else captured) |
+            castling_rights << 4 |
+            (_NO_EN_PASSANT if en_passant is None else en_passant) << 8)
+        self._hashes.append(key)
+        self._clocks.append(clock)
+        if clock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+        else:
+            # The earlier positions can't occur again
+            self._counts = {key: 1}
+
+    def undo(self) -> int:
+        """Take back the last move.
+
+        Returns:
+            The move that was taken back, encoded as in move.py.
+
+        Raises:
+            IndexError: If there are no moves to take back.
+        """
+        if not self._moves:
+            raise IndexError('no moves to take back')
+        key = self._hashes.pop()
+        if self._clocks.pop():
+            count = self._counts[key] - 1
+            if count:
+                self._counts[key] = count
+            else:
+                del self._counts[key]
+        else:
+            # Count the positions since the capture or pawn move before
+            self._counts = collections.Counter(
+                self._hashes[max(0, len(self._hashes) - 1 -
+                                 self._clocks[-1]):])
+
+        move = self._moves.pop()
+        undo_data = self._undo_data.pop()
+        captured = undo_data & 15
+        en_passant = undo_data >> 8
+        self._gameboard.push_undo_record((
+            move, None if captured == _NO_CAPTURE else captured,
+            undo_data >> 4 & 15,
+            None if en_passant == _NO_EN_PASSANT else en_passant,
+            self._clocks[-1]))
+        self._gameboard.unmake_move()
+        return move
+
+    def undo_to(self, ply: int) -> None:
+        """Take back moves until the given number of moves have been played.
+
+        Raises:
+            ValueError: If the ply is negative or later than the current one.
+        """
+        if not 0 <= ply <= len(self._moves):
+            raise ValueError(f'ply {ply} is out of range 0 to '
+                             f'{len(self._moves)}')
+        while len(self._moves) > ply:
+            self.undo()
+
+    def repetitions(self) -> int:
+        """Get the number of times the current position occurred in the game,
+        including the current occurrence."""
+        return self._counts[self._hashes[-1]]
+
+    def is_threefold_repetition(self) -> bool:
+        """Check if the current position occurred at least three times."""
+        return self._counts[self._hashes[-1]] >= 3
+
+    def is_fifty_move_draw(self) -> bool:
+        """Check if fifty moves by each player were played without a capture
+        or a pawn move."""
+        return self._clocks[-1] >= 100
+
+    def history(self) -> array:
+        """Get the hashes of the positions before the current one that can
+        still repeat, i.e. those since the last capture or pawn move, in the
+        order they occurred."""
+        end = len(self._hashes) - 1
+        return self._hashes[max(0, end - self._clocks[-1]):end]
+
+    def nbytes(self) -> int:
+        """Get the size of the recorded moves, undo data, hashes and clocks in
+        bytes, i.e. of everything recorded per move, but not of the counts of
+        the positions."""
+        return sum(len(values) * values.itemsize
+                   for values in (self._moves, self._undo_data, self._hashes,
+                                  self._clocks))
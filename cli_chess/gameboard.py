@@ -1,16 +1,41 @@
 # gameboard.py
 
 
-import copy
+import struct
 from typing import List
 
+from . import bitboard
 from .board_info import BoardInfo
-from .error import InvalidSquareError
-from .piece import Piece
-from .square import Square
+from .error import InvalidFenError, InvalidSquareError
+from .evaluation import ENDGAME_SCORES, MIDGAME_SCORES, PHASE_WEIGHTS
+from .move import encode_move
+from .piece import ChessColor, Piece
+from .square import (FILE_INDICES, RANK_INDICES, SQUARE_INDICES,
+                     SQUARE_RANKS)
+from .zobrist import (BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS,
+                      PAWN_KEYS, PIECE_KEYS)
+
+_PAWN = Piece.ORDER.index(Piece.PAWN)
+_ROOK = Piece.ORDER.index(Piece.ROOK)
+_KING = Piece.ORDER.index(Piece.KING)
+
+# The layout of a packed position: the occupied squares, the pieces on them at
+# 4 bits each, the player to move and the castling rights, the en passant
+# square and the move counters
+_PACKED_POSITION = struct.Struct('<Q16sBBHH')
+_PACKED_MAX_PIECES = 32
+_PACKED_NO_EN_PASSANT = 0xFF
 
 
 class Gameboard:
+    # The board is kept in a fixed set of slots rather than an instance dict,
+    # since servers hold many idle boards at once
+    __slots__ = ('_bitboards', '_occupancy', '_occupied', '_mailbox', '_hash',
+                 '_pawn_hash', '_midgame_score', '_endgame_score', '_phase',
+                 '_castling_rights', '_en_passant', '_turn',
+                 '_halfmove_clock', '_fullmove_number', '_undo_stack',
+                 '_view')
+
     # Note: whitespace strings have been added for formatting purposes
     STARTING_BOARD = [
         ['R_b', 'N_b', 'B_b', 'Q_b', 'K_b', 'B_b', 'N_b', 'R_b'],
@@ -23,8 +48,27 @@ class Gameboard:
         ['R_w', 'N_w', 'B_w', 'Q_w', 'K_w', 'B_w', 'N_w', 'R_w']
     ]
 
+    # Castling rights, stored as bit flags
+    WHITE_KINGSIDE = 1
+    WHITE_QUEENSIDE = 2
+    BLACK_KINGSIDE = 4
+    BLACK_QUEENSIDE = 8
+    NO_CASTLING = 0
+    WHITE_CASTLING = 3
+    ALL_CASTLING = 15
+    CASTLING_SYMBOLS = {'K': WHITE_KINGSIDE, 'Q': WHITE_QUEENSIDE,
+                        'k': BLACK_KINGSIDE, 'q': BLACK_QUEENSIDE}
+
+    # The size of a position packed with pack()
+    PACKED_SIZE = _PACKED_POSITION.size
+
     def __init__(self,
-                 board_state: List[List[str]] = STARTING_BOARD) -> None:
+                 board_state: List[List[str]] = STARTING_BOARD,
+                 castling_rights: str = 'KQkq',
+                 en_passant: str | None = None,
+                 turn: str = ChessColor.WHITE,
+                 halfmove_clock: int = 0,
+                 fullmove_number: int = 1) -> None:
         """Initialize the chess board with an optional board state.
 
         If no board state is given, the board is initialized as the starting 
@@ -36,116 +80,792 @@ class Gameboard:
               separator, and a color, e.g. 'K_w' for the white king. If a board 
               square is empty, the corresponding string is denoted by three 
               whitespace characters.
+            castling_rights: The castling rights as in FEN, e.g. 'KQkq', or '-'
+              if neither player may castle. Rights for which the king or rook
+              isn't on its starting square are dropped.
+            en_passant: The coordinates of the square a pawn skipped over with
+              a double push on the previous move, if any.
+            turn: The color of the player to move.
+            halfmove_clock: The number of moves by either player since the last
+              capture or pawn move.
+            fullmove_number: The number of the current move, which starts at 1
+              and is incremented after each move by black.
         """
-        self._board = Gameboard._initialize_board(board_state)
+        self._clear_board()
+        self._initialize_board(board_state)
+        self._initialize_state(
+            self._parse_castling_rights(castling_rights),
+            bitboard.square_to_index(en_passant) if en_passant else None,
+            ChessColor.ORDER.index(turn), halfmove_clock, fullmove_number)
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'Gameboard':
+        """Create a game board from a position in Forsyth-Edwards Notation.
 
-    def _initialize_board(
-            board_state: List[List[str]]) -> List[List[Piece | None]]:
-        """Return the initialized board.
+        The halfmove clock and fullmove number may be left out, in which case
+        they default to 0 and 1.
+
+        Args:
+            fen: The FEN string, e.g.
+              'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'.
 
         Returns:
-            A 2D list representation of the board which contains Piece objects
-            or None where there are none.
+            The Gameboard object set up with the position.
+
+        Raises:
+            InvalidFenError: If the FEN string is malformed.
         """
-        def piece_repr_to_piece(piece_repr: str) -> Piece | None:
-            piece_symbol = Piece.extract_symbol_from_repr(piece_repr)
-            if piece_symbol in Piece.PIECES:
-                return Piece(piece_repr)
-            return None
+        fields = fen.split()
+        if len(fields) not in (4, 6):
+            raise InvalidFenError(f"expected 4 or 6 fields: '{fen}'")
+        placement, turn, castling_rights, en_passant = fields[:4]
+
+        gameboard = cls.__new__(cls)
+        gameboard._clear_board()
+
+        ranks = placement.split('/')
+        if len(ranks) != BoardInfo.LENGTH:
+            raise InvalidFenError(f"expected 8 ranks: '{placement}'")
+        for row, rank in enumerate(ranks):
+            col = 0
+            for char in rank:
+                if char in _FEN_EMPTY_SQUARES:
+                    col += int(char)
+                    continue
+                piece_index = _FEN_PIECE_INDICES.get(char)
+                if piece_index is None or col >= BoardInfo.LENGTH:
+                    raise InvalidFenError(f"invalid rank: '{rank}'")
+                gameboard._put_piece(piece_index,
+                                     bitboard.row_col_to_index(row, col))
+                col += 1
+            if col != BoardInfo.LENGTH:
+                raise InvalidFenError(f"invalid rank: '{rank}'")
+
+        if turn not in ChessColor.ORDER:
+            raise InvalidFenError(f"invalid side to move: '{turn}'")
+        if castling_rights != '-' and (
+                len(set(castling_rights)) != len(castling_rights) or
+                not set(castling_rights) <= Gameboard.CASTLING_SYMBOLS.keys()):
+            raise InvalidFenError(
+                f"invalid castling rights: '{castling_rights}'")
+        # The en passant square is on the 3rd or 6th rank
+        en_passant_index = SQUARE_INDICES.get(en_passant)
+        if en_passant != '-' and (
+                en_passant_index is None or
+                SQUARE_RANKS[en_passant_index] not in (2, 5)):
+            raise InvalidFenError(
+                f"invalid en passant square: '{en_passant}'")
+        try:
+            halfmove_clock, fullmove_number = (
+                (int(fields[4]), int(fields[5])) if len(fields) == 6 else
+                (0, 1))
+        except ValueError:
+            raise InvalidFenError(f"invalid move counters: '{fen}'") from None
+
+        gameboard._initialize_state(
+            cls._parse_castling_rights(castling_rights),
+            en_passant_index,
+            ChessColor.ORDER.index(turn), halfmove_clock, fullmove_number)
+        return gameboard
+
+    def to_fen(self) -> str:
+        """Get the position in Forsyth-Edwards Notation.
+
+        Returns:
+            The FEN string with all six fields, e.g.
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'.
+        """
+        ranks = []
+        for row in range(BoardInfo.LENGTH):
+            rank = ''
+            empty_squares = 0
+            for col in range(BoardInfo.LENGTH):
+                piece_index = self._mailbox[bitboard.row_col_to_index(row, col)]
+                if piece_index is None:
+                    empty_squares += 1
+                    continue
+                if empty_squares:
+                    rank += str(empty_squares)
+                    empty_squares = 0
+                rank += _FEN_PIECE_SYMBOLS[piece_index]
+            if empty_squares:
+                rank += str(empty_squares)
+            ranks.append(rank)
+
+        castling_rights = ''.join(
+            symbol for symbol, right in Gameboard.CASTLING_SYMBOLS.items()
+            if self._castling_rights & right) or '-'
+        en_passant = (bitboard.index_to_square(self._en_passant)
+                      if self._en_passant is not None else '-')
+
+        return (f'{"/".join(ranks)} {ChessColor.ORDER[self._turn]} '
+                f'{castling_rights} {en_passant} {self._halfmove_clock} '
+                f'{self._fullmove_number}')
+
+    @classmethod
+    def unpack(cls, data: bytes, offset: int = 0) -> 'Gameboard':
+        """Create a game board from a position packed with pack().
+
+        Args:
+            data: A bytes-like object, e.g. a memory map of a file of packed
+              positions.
+            offset: The offset of the packed position in the data.
+
+        Returns:
+            The Gameboard object set up with the position.
+
+        Raises:
+            struct.error: If the data is too short.
+        """
+        (occupied, piece_nibbles, flags, en_passant, halfmove_clock,
+         fullmove_number) = _PACKED_POSITION.unpack_from(data, offset)
+
+        gameboard = cls.__new__(cls)
+        gameboard._clear_board()
+
+        # The pieces are listed in the order of the occupied squares
+        pieces = int.from_bytes(piece_nibbles, 'little')
+        for square_index in bitboard.iter_squares(occupied):
+            gameboard._put_piece(pieces & 15, square_index)
+            pieces >>= 4
+
+        gameboard._initialize_state(
+            flags >> 1, None if en_passant == _PACKED_NO_EN_PASSANT else
+            en_passant, flags & 1, halfmove_clock, fullmove_number)
+        return gameboard
+
+    def pack(self) -> bytes:
+        """Pack the position into Gameboard.PACKED_SIZE bytes.
+
+        The format consists of the occupied squares as a bitboard, the
+        Piece.index of the piece on each occupied square in ascending order
+        of the squares, at 4 bits each, a byte with the player to move and the
+        castling rights, the en passant square, the halfmove clock and the
+        fullmove number. Multi-byte fields are little-endian.
+
+        Returns:
+            The packed position, which can be read back with unpack().
+
+        Raises:
+            ValueError: If there are more than 32 pieces on the board, or
+              the halfmove clock or fullmove number don't fit into 16 bits.
+        """
+        pieces = 0
+        shift = 0
+        for square_index in bitboard.iter_squares(self._occupied):
+            pieces |= self._mailbox[square_index] << shift
+            shift += 4
+        if shift > 4 * _PACKED_MAX_PIECES:
+            raise ValueError('too many pieces to pack')
+
+        if not (0 <= self._halfmove_clock <= 0xFFFF and
+                0 <= self._fullmove_number <= 0xFFFF):
+            raise ValueError('the move counters are out of range')
+
+        return _PACKED_POSITION.pack(
+            self._occupied, pieces.to_bytes(_PACKED_MAX_PIECES // 2, 'little'),
+            self._castling_rights << 1 | self._turn,
+            _PACKED_NO_EN_PASSANT if self._en_passant is None else
+            self._en_passant,
+            self._halfmove_clock, self._fullmove_number)
 
-        initialized_board = []
-        for row in board_state:
-            initialized_row = []
-            for piece in row:
-                initialized_row.append(piece_repr_to_piece(piece))
-            initialized_board.append(initialized_row)
+    def _clear_board(self) -> None:
+        """Set up the board state of an empty board."""
+        # The board is stored as one bitboard per piece (see Piece.index),
+        # one occupancy bitboard per color (see ChessColor.ORDER) and a bitboard
+        # of all occupied squares. The mailbox maps each square index to the
+        # index of the piece on it, or None if the square is empty, so that
+        # the piece on a square can be found without scanning the bitboards.
+        self._bitboards = [bitboard.EMPTY] * (2 * len(Piece.ORDER))
+        self._occupancy = [bitboard.EMPTY] * len(ChessColor.ORDER)
+        self._occupied = bitboard.EMPTY
+        self._mailbox: List[int | None] = [None] * bitboard.NUM_SQUARES
+        # The hash of the pieces is kept up to date as they are placed, along
+        # with the hash of the pawns and the evaluation terms that are sums
+        # over the pieces, see evaluation.py
+        self._hash = 0
+        self._pawn_hash = 0
+        self._midgame_score = 0
+        self._endgame_score = 0
+        self._phase = 0
 
-        return initialized_board
+    def _initialize_state(self,
+                          castling_rights: int,
+                          en_passant: int | None,
+                          turn: int,
+                          halfmove_clock: int,
+                          fullmove_number: int) -> None:
+        """Set up the game state once the pieces have been placed.
+
+        Args:
+            castling_rights: The castling rights as bit flags. Rights for which
+              the king or rook isn't on its starting square are dropped.
+            en_passant: The index of the en passant square, or None.
+            turn: The ChessColor.ORDER index of the player to move.
+            halfmove_clock: The number of moves since the last capture or pawn
+              move.
+            fullmove_number: The number of the current move.
+        """
+        # The castling rights as bit flags, and the index of the en passant
+        # square or None if there is none
+        self._castling_rights = self._valid_castling_rights(castling_rights)
+        self._en_passant = en_passant
+
+        # The ChessColor.ORDER index of the player to move
+        self._turn = turn
+        self._halfmove_clock = halfmove_clock
+        self._fullmove_number = fullmove_number
+
+        # The undo records of the moves made with make_move, most recent last.
+        # Each record is a tuple of the move, the Piece.index of the captured
+        # piece (None for no capture or en passant) and the castling rights,
+        # en passant square and halfmove clock before the move.
+        self._undo_stack: List[tuple] = []
+
+        # A single read-only view is shared by all callers of view()
+        self._view = BoardView(self)
+
+        # The Zobrist hash of the position, which is updated incrementally
+        self._hash ^= CASTLING_KEYS[self._castling_rights]
+        if en_passant is not None:
+            self._hash ^= EN_PASSANT_KEYS[en_passant & 7]
+        if turn:
+            self._hash ^= BLACK_TO_MOVE_KEY
+
+    def _initialize_board(self, board_state: List[List[str]]) -> None:
+        """Place the pieces given by the board state on the empty board.
+
+        Args:
+            board_state: A 2D list representation of the board with strings to
+              denote the pieces, as passed to the constructor.
+        """
+        for row, pieces in enumerate(board_state):
+            for col, piece_repr in enumerate(pieces):
+                piece = Piece.from_repr(piece_repr)
+                if piece is not None:
+                    self._put_piece(piece.index,
+                                    bitboard.row_col_to_index(row, col))
+
+    @staticmethod
+    def _parse_castling_rights(castling_rights: str) -> int:
+        """Get the castling rights as bit flags from their FEN representation.
+        """
+        rights = Gameboard.NO_CASTLING
+        for symbol in castling_rights:
+            rights |= Gameboard.CASTLING_SYMBOLS.get(symbol, 0)
+        return rights
+
+    def _valid_castling_rights(self, castling_rights: int) -> int:
+        """Drop the castling rights for which the king or the rook has left its
+        starting square."""
+        rights = Gameboard.NO_CASTLING
+        for right, (king_square, rook_square) in _CASTLING_HOME_SQUARES.items():
+            if not castling_rights & right:
+                continue
+            color_offset = (0 if right & Gameboard.WHITE_CASTLING else
+                            len(Piece.ORDER))
+            if (self._mailbox[king_square] == color_offset + _KING and
+                    self._mailbox[rook_square] == color_offset + _ROOK):
+                rights |= right
+        return rights
+
+    def _put_piece(self, piece_index: int, square_index: int) -> None:
+        """Place a piece on an empty square."""
+        square_bit = 1 << square_index
+        self._bitboards[piece_index] |= square_bit
+        self._occupancy[piece_index // len(Piece.ORDER)] |= square_bit
+        self._occupied |= square_bit
+        self._mailbox[square_index] = piece_index
+        key_index = piece_index << 6 | square_index
+        self._hash ^= PIECE_KEYS[key_index]
+        self._pawn_hash ^= PAWN_KEYS[key_index]
+        self._midgame_score += MIDGAME_SCORES[key_index]
+        self._endgame_score += ENDGAME_SCORES[key_index]
+        self._phase += PHASE_WEIGHTS[piece_index]
+
+    def _remove_piece(self, square_index: int) -> int | None:
+        """Remove the piece on a square, if any.
+
+        Returns:
+            The index of the removed piece, or None if the square was empty.
+        """
+        piece_index = self._mailbox[square_index]
+        if piece_index is None:
+            return None
+
+        square_bit = 1 << square_index
+        self._bitboards[piece_index] ^= square_bit
+        self._occupancy[piece_index // len(Piece.ORDER)] ^= square_bit
+        self._occupied ^= square_bit
+        self._mailbox[square_index] = None
+        key_index = piece_index << 6 | square_index
+        self._hash ^= PIECE_KEYS[key_index]
+        self._pawn_hash ^= PAWN_KEYS[key_index]
+        self._midgame_score -= MIDGAME_SCORES[key_index]
+        self._endgame_score -= ENDGAME_SCORES[key_index]
+        self._phase -= PHASE_WEIGHTS[piece_index]
+        return piece_index
 
     def play_move(self,
                   start_coords: str,
-                  end_coords: str) -> None:
+                  end_coords: str,
+                  promotion: str = Piece.QUEEN) -> None:
         """Move a piece from one square to another.
 
+        Castling is played by moving the king two squares towards the rook,
+        and en passant by moving the pawn to the en passant square. The move
+        can be taken back with unmake_move.
+
         Args:
             start_coords: The coordinates of the square the piece is on before
               the move.
             end_coords: The coordinates of the square the piece is on after the
               move.
+            promotion: The symbol of the piece a pawn is promoted to if the
+              move takes it to the last rank.
+        """
+        start_index = bitboard.square_to_index(start_coords)
+        end_index = bitboard.square_to_index(end_coords)
+
+        piece_index = self._mailbox[start_index]
+        if piece_index is None:
+            return
+
+        promotion_index = 0
+        if (piece_index % len(Piece.ORDER) == _PAWN and
+                end_index >> 3 in (0, BoardInfo.LENGTH - 1)):
+            promotion_index = Piece.ORDER.index(promotion)
+
+        self.make_move(encode_move(start_index, end_index, promotion_index))
+
+    def make_move(self, move: int) -> None:
+        """Play an encoded move and push its undo record onto the undo stack.
+
+        The move isn't validated, so it must follow the rules of movement of
+        the pieces, e.g. be generated by move_generator.
+
+        Args:
+            move: The move, encoded as in move.py.
+        """
+        start = move & 63
+        end = move >> 6 & 63
+        piece_index = self._mailbox[start]
+        captured = self._mailbox[end]
+        en_passant = self._en_passant
+
+        self._undo_stack.append((move, captured, self._castling_rights,
+                                 en_passant, self._halfmove_clock))
+
+        # Move the piece from the starting square to the end square, capturing
+        # whatever is on the end square
+        self._remove_piece(start)
+        if captured is not None:
+            self._remove_piece(end)
+            self._halfmove_clock = 0
+        else:
+            self._halfmove_clock += 1
+        self._en_passant = None
+
+        piece_type = piece_index % len(Piece.ORDER)
+        if piece_type == _PAWN:
+            self._halfmove_clock = 0
+            if end == en_passant and start & 7 != end & 7:
+                # The captured pawn is beside the starting square, on the file
+                # of the end square
+                self._remove_piece((start & 56) | (end & 7))
+            elif abs(end - start) == 2 * BoardInfo.LENGTH:
+                self._en_passant = (start + end) // 2
+
+            # Replace the pawn by the promotion piece of the same color
+            promotion = move >> 12
+            if promotion:
+                piece_index += promotion - _PAWN
+
+        elif piece_type == _KING:
+            rook_move = _castling_rook_move(start, end, self._castling_rights)
+            if rook_move is not None:
+                # Castling, so move the rook to the other side of the king
+                rook_start, rook_end = rook_move
+                self._put_piece(self._remove_piece(rook_start), rook_end)
+
+        self._put_piece(piece_index, end)
+
+        # Moving the king or a rook, or capturing a rook on its starting
+        # square, loses the corresponding castling rights
+        castling_rights = self._castling_rights
+        self._castling_rights &= (_CASTLING_RIGHTS_KEPT[start] &
+                                  _CASTLING_RIGHTS_KEPT[end])
+
+        if self._turn:
+            self._fullmove_number += 1
+        self._turn ^= 1
+
+        self._hash ^= (CASTLING_KEYS[castling_rights] ^
+                       CASTLING_KEYS[self._castling_rights] ^
+                       BLACK_TO_MOVE_KEY)
+        if en_passant is not None:
+            self._hash ^= EN_PASSANT_KEYS[en_passant & 7]
+        if self._en_passant is not None:
+            self._hash ^= EN_PASSANT_KEYS[self._en_passant & 7]
+
+    def unmake_move(self) -> int:
+        """Take back the last move played with make_move or play_move.
+
+        Returns:
+            The move that was taken back, encoded as in move.py.
+
+        Raises:
+            IndexError: If there are no moves to take back.
         """
-        # Extract the files and ranks
-        file_start, rank_start = start_coords
-        file_end, rank_end = end_coords
+        (move, captured, castling_rights, en_passant,
+         halfmove_clock) = self._undo_stack.pop()
+        start = move & 63
+        end = move >> 6 & 63
+
+        piece_index = self._remove_piece(end)
+        promotion = move >> 12
+        if promotion:
+            piece_index -= promotion - _PAWN
+        self._put_piece(piece_index, start)
+
+        piece_type = piece_index % len(Piece.ORDER)
+        if captured is not None:
+            self._put_piece(captured, end)
+        elif (piece_type == _PAWN and end == en_passant and
+              start & 7 != end & 7):
+            # Put back the pawn captured en passant, which has the other color
+            enemy_pawn = (_PAWN if piece_index >= len(Piece.ORDER) else
+                          len(Piece.ORDER) + _PAWN)
+            self._put_piece(enemy_pawn, (start & 56) | (end & 7))
+        elif piece_type == _KING:
+            rook_move = _castling_rook_move(start, end, castling_rights)
+            if rook_move is not None:
+                rook_start, rook_end = rook_move
+                self._put_piece(self._remove_piece(rook_end), rook_start)
 
-        # Get the corresponding rows and columns
-        row_start = Gameboard.rank_to_row(rank_start)
-        row_end = Gameboard.rank_to_row(rank_end)
+        self._hash ^= (CASTLING_KEYS[self._castling_rights] ^
+                       CASTLING_KEYS[castling_rights] ^
+                       BLACK_TO_MOVE_KEY)
+        if self._en_passant is not None:
+            self._hash ^= EN_PASSANT_KEYS[self._en_passant & 7]
+        if en_passant is not None:
+            self._hash ^= EN_PASSANT_KEYS[en_passant & 7]
 
-        col_start = Gameboard.file_to_col(file_start)
-        col_end = Gameboard.file_to_col(file_end)
+        self._castling_rights = castling_rights
+        self._en_passant = en_passant
+        self._halfmove_clock = halfmove_clock
+        self._turn ^= 1
+        if self._turn:
+            self._fullmove_number -= 1
 
-        # Move the piece from the starting square to the end square
-        self._board[row_end][col_end] = self._board[row_start][col_start]
-        self._board[row_start][col_start] = None
+        return move
+
+    def pop_undo_record(self) -> tuple:
+        """Remove the undo record of the last move from the undo stack, e.g.
+        to store it more compactly than the stack does.
+
+        Returns:
+            The record: the move, the index of the captured piece or None,
+            and the castling rights, en passant square and halfmove clock
+            from before the move. The move can only be taken back once the
+            record is put back with push_undo_record.
+
+        Raises:
+            IndexError: If there are no moves on the undo stack.
+        """
+        return self._undo_stack.pop()
+
+    def push_undo_record(self, record: tuple) -> None:
+        """Put back an undo record removed with pop_undo_record, so that its
+        move can be taken back with unmake_move."""
+        self._undo_stack.append(record)
 
     def print_board(self) -> None:
         """Print the chess board as seen by the white player, with the ranks and
-        files shown."""
-        board_len = len(self._board)
-
-        for row in range(board_len):
-            print(BoardInfo.RANK_NUMBERS[row], end='   ')
-            for col in range(board_len):
-                piece = self._board[row][col]
-                if piece:
-                    print(piece.symbol, end=' ')
-                else:
-                    print(' ', end=' ')
-            print()
+        files shown.
+
+        The board is printed with a single write. See renderer.BoardRenderer
+        for colors, flipping and redrawing only the squares that changed.
+        """
+        lines = []
+        for row in range(BoardInfo.LENGTH):
+            symbols = []
+            for col in range(BoardInfo.LENGTH):
+                piece_index = self._mailbox[bitboard.row_col_to_index(row, col)]
+                symbols.append(' ' if piece_index is None else
+                               Piece.ORDER[piece_index % len(Piece.ORDER)])
+            lines.append(f'{BoardInfo.RANK_NUMBERS[row]}   '
+                         f'{" ".join(symbols)} ')
 
-        print(f'\n    {" ".join(BoardInfo.FILE_LETTERS)}')
+        lines.append(f'\n    {" ".join(BoardInfo.FILE_LETTERS)}')
+        print('\n'.join(lines))
 
-    def get_board(self) -> list[list[Square]]:
+    def view(self) -> 'BoardView':
+        """Get a read-only view of the game board.
+
+        Unlike get_board, the view doesn't build a new board, so it should be
+        preferred wherever the board is only read. The view reflects later
+        moves.
+        """
+        return self._view
+
+    def get_board(self) -> list[list[Piece | None]]:
         """Get a copy of the game board.
 
+        The lists may be freely mutated by the caller. Use view() to read the
+        board without copying it.
+
         Returns:
-            A copy of the 2D-array used to store the board state.
+            A 2D list representation of the board, as seen by the white player,
+            which contains the shared, immutable Piece objects or None where
+            there are none.
         """
-        return copy.deepcopy(self._board)
+        board = []
+        for row in range(BoardInfo.LENGTH):
+            board_row = []
+            for col in range(BoardInfo.LENGTH):
+                piece_index = self._mailbox[bitboard.row_col_to_index(row, col)]
+                if piece_index is not None:
+                    board_row.append(Piece.from_index(piece_index))
+                else:
+                    board_row.append(None)
+            board.append(board_row)
+
+        return board
 
     def get_square_piece(self, square_coords: str) -> Piece | None:
-        """Get a copy of the piece on the square with the given coordinates.
+        """Get the piece on the square with the given coordinates.
 
         Args:
             square_coords: The coordinates of the square, where the first 
               character is the file and the second is the rank, e.g. 'e4'.
 
         Returns:
-            A copy of the Piece object on the square, or None if there is none.
+            The shared, immutable Piece object on the square, or None if there
+            is none.
 
         Raises:
             InvalidSquareError: If the coordinates for the square are invalid.
         """
-        if not Square.is_valid_square(square_coords):
+        square_index = SQUARE_INDICES.get(square_coords)
+        if square_index is None:
             raise InvalidSquareError(f"invalid square: '{square_coords}'")
 
-        file, rank = square_coords
-        col = Gameboard.file_to_col(file)
-        row = Gameboard.rank_to_row(rank)
+        piece_index = self._mailbox[square_index]
+        if piece_index is None:
+            return None
+        return Piece.from_index(piece_index)
+
+    def get_piece_bitboards(self, piece_color: str) -> list[int]:
+        """Get the bitboards of all pieces of a color.
+
+        Args:
+            piece_color: The color of the pieces, e.g. 'w'.
+
+        Returns:
+            A list of the bitboards of the pieces, in the order of Piece.ORDER.
+        """
+        start = ChessColor.ORDER.index(piece_color) * len(Piece.ORDER)
+        return self._bitboards[start:start + len(Piece.ORDER)]
+
+    def get_bitboard(self, piece_symbol: str, piece_color: str) -> int:
+        """Get the bitboard of the squares occupied by the given piece.
+
+        Args:
+            piece_symbol: The symbol of the piece, e.g. 'K'.
+            piece_color: The color of the piece, e.g. 'w'.
+
+        Returns:
+            A bitboard with the squares that the piece is on set.
+        """
+        return self._bitboards[Piece.to_index(piece_symbol, piece_color)]
+
+    @property
+    def castling_rights(self) -> int:
+        """The castling rights, as bit flags such as Gameboard.WHITE_KINGSIDE.
+        """
+        return self._castling_rights
+
+    @property
+    def en_passant(self) -> int | None:
+        """The index of the en passant square, or None if there is none."""
+        return self._en_passant
 
-        return copy.copy(self._board[row][col])
+    @property
+    def turn(self) -> str:
+        """The color of the player to move."""
+        return ChessColor.ORDER[self._turn]
+
+    @property
+    def halfmove_clock(self) -> int:
+        """The number of moves since the last capture or pawn move."""
+        return self._halfmove_clock
+
+    @property
+    def fullmove_number(self) -> int:
+        """The number of the current move, starting at 1."""
+        return self._fullmove_number
+
+    @property
+    def zobrist_hash(self) -> int:
+        """The 64-bit Zobrist hash of the position, see zobrist.py."""
+        return self._hash
+
+    @property
+    def pawn_hash(self) -> int:
+        """The Zobrist hash of the pawns alone, see zobrist.PAWN_KEYS."""
+        return self._pawn_hash
+
+    @property
+    def midgame_score(self) -> int:
+        """The middlegame material and piece-square score from white's point
+        of view, see evaluation.py."""
+        return self._midgame_score
+
+    @property
+    def endgame_score(self) -> int:
+        """The endgame material and piece-square score from white's point of
+        view, see evaluation.py."""
+        return self._endgame_score
+
+    @property
+    def phase(self) -> int:
+        """The game phase, from 0 with only kings and pawns left up to
+        evaluation.MAX_PHASE or more with all pieces on the board."""
+        return self._phase
+
+    @property
+    def ply(self) -> int:
+        """The number of moves on the undo stack."""
+        return len(self._undo_stack)
+
+    def get_occupancy(self, piece_color: str | None = None) -> int:
+        """Get the bitboard of the occupied squares.
+
+        Args:
+            piece_color: If given, only the squares occupied by pieces of this
+              color are included.
+
+        Returns:
+            A bitboard with the occupied squares set.
+        """
+        if piece_color is None:
+            return self._occupied
+        return self._occupancy[ChessColor.ORDER.index(piece_color)]
 
     @staticmethod
     def file_to_col(file: str) -> int:
         """Map a chess file (a-h) to the corresponding board column (0-7)."""
-        # Since the files (a-h) map to the column indices (0-7) in ascending
-        # order, the relative order of the file characters can be used to get
-        # the corresponding column index.
-        return ord(file) - ord('a')
+        return FILE_INDICES[file]
 
     @staticmethod
     def rank_to_row(rank: str) -> int:
         """Map a chess rank (1-8) to the corresponding board row (7-0)."""
-        # This makes use of the fact that the rank number (1-8) and the
-        # corresponding row index (7-0) always add up to the board length (8).
-        return BoardInfo.LENGTH - int(rank)
+        # Row 0 holds the 8th rank, so the rows are in reverse order of the
+        # ranks
+        return BoardInfo.LENGTH - 1 - RANK_INDICES[rank]
+
+
+class BoardView:
+    """A read-only view of a Gameboard that shares its state instead of
+    copying it."""
+    __slots__ = ('_gameboard',)
+
+    def __init__(self, gameboard: Gameboard) -> None:
+        self._gameboard = gameboard
+
+    def get_square_piece(self, square_coords: str) -> Piece | None:
+        """Get the shared piece on the square with the given coordinates.
+
+        Raises:
+            InvalidSquareError: If the coordinates for the square are invalid.
+        """
+        square_index = SQUARE_INDICES.get(square_coords)
+        if square_index is None:
+            raise InvalidSquareError(f"invalid square: '{square_coords}'")
+
+        return self.get_piece_at(square_index)
+
+    def get_piece_at(self, square_index: int) -> Piece | None:
+        """Get the shared piece on the square with the given index, or None if
+        there is none."""
+        piece_index = self._gameboard._mailbox[square_index]
+        if piece_index is None:
+            return None
+        return Piece.from_index(piece_index)
+
+    def get_piece_index_at(self, square_index: int) -> int | None:
+        """Get the Piece.index of the piece on the square with the given index,
+        or None if there is none."""
+        return self._gameboard._mailbox[square_index]
+
+    def get_piece_bitboards(self, piece_color: str) -> list[int]:
+        """See Gameboard.get_piece_bitboards."""
+        return self._gameboard.get_piece_bitboards(piece_color)
+
+    def get_bitboard(self, piece_symbol: str, piece_color: str) -> int:
+        """See Gameboard.get_bitboard."""
+        return self._gameboard.get_bitboard(piece_symbol, piece_color)
+
+    def get_occupancy(self, piece_color: str | None = None) -> int:
+        """See Gameboard.get_occupancy."""
+        return self._gameboard.get_occupancy(piece_color)
+
+    @property
+    def castling_rights(self) -> int:
+        """See Gameboard.castling_rights."""
+        return self._gameboard._castling_rights
+
+    @property
+    def en_passant(self) -> int | None:
+        """See Gameboard.en_passant."""
+        return self._gameboard._en_passant
+
+
+# The starting squares of the king and rook for each castling right
+_CASTLING_HOME_SQUARES = {
+    Gameboard.WHITE_KINGSIDE: (4, 7),
+    Gameboard.WHITE_QUEENSIDE: (4, 0),
+    Gameboard.BLACK_KINGSIDE: (60, 63),
+    Gameboard.BLACK_QUEENSIDE: (60, 56),
+}
+
+# The castling right and the rook's start and end squares for each start and
+# end square of a castling king
+_CASTLING_MOVES = {
+    (4, 6): (Gameboard.WHITE_KINGSIDE, 7, 5),
+    (4, 2): (Gameboard.WHITE_QUEENSIDE, 0, 3),
+    (60, 62): (Gameboard.BLACK_KINGSIDE, 63, 61),
+    (60, 58): (Gameboard.BLACK_QUEENSIDE, 56, 59),
+}
+
+# The castling rights kept when a piece moves from or to each square
+_CASTLING_RIGHTS_KEPT = [Gameboard.ALL_CASTLING] * bitboard.NUM_SQUARES
+for _right, _home_squares in _CASTLING_HOME_SQUARES.items():
+    for _square in _home_squares:
+        _CASTLING_RIGHTS_KEPT[_square] &= ~_right
+
+# The FEN symbol of each Piece.index, upper case for white and lower case for
+# black, and the other way around
+_FEN_PIECE_SYMBOLS = tuple(
+    symbol if color == ChessColor.WHITE else symbol.lower()
+    for color in ChessColor.ORDER for symbol in Piece.ORDER)
+_FEN_PIECE_INDICES = {symbol: piece_index
+                      for piece_index, symbol in enumerate(_FEN_PIECE_SYMBOLS)}
+_FEN_EMPTY_SQUARES = frozenset('12345678')
+
+
+def _castling_rook_move(start: int, end: int,
+                        castling_rights: int) -> tuple[int, int] | None:
+    """Get the rook's move if a king's move is castling, i.e. a move from its
+    starting square to a castling square with the castling right, which the
+    king and rook only have while they're on their starting squares.
+
+    Returns:
+        The start and end squares of the rook, or None if the move isn't
+        castling.
+    """
+    castling = _CASTLING_MOVES.get((start, end))
+    if castling is None or not castling_rights & castling[0]:
+        return None
+    return castling[1:]
@@ -0,0 +1,217 @@
+# instrumentation.py
+
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple
+
+from . import engine, gameboard, move_validator
+
+# Instrumentation counts the calls of the hot paths and the time spent in
+# them. It's opt-in: enable() replaces each function with a wrapper that
+# records its calls, and disable() puts the original functions back, so that
+# instrumentation costs nothing while it's disabled.
+#
+# Functions are replaced where they're defined, which covers the calls made
+# through their module or class, including the calls between the functions of
+# move_validator. Modules that imported a function by name before it was
+# replaced keep calling the original function.
+
+# The number of entries in the profile and memory reports
+REPORT_LENGTH = 50
+
+
+class CallStats(NamedTuple):
+    """The calls of an instrumented function."""
+    calls: int
+    # The cumulative time spent in the calls, including nested calls
+    seconds: float
+
+
+class _Counter:
+    __slots__ = ('calls', 'nanoseconds')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.nanoseconds = 0
+
+
+# The instrumented functions, by name, as the object and the attribute that
+# holds them
+HOT_PATHS = {
+    'is_legal_move': (move_validator, 'is_legal_move'),
+    'is_legal_move_by_index': (move_validator, 'is_legal_move_by_index'),
+    'pawn_path': (move_validator, '_is_valid_pawn_path'),
+    'knight_path': (move_validator, '_is_valid_knight_path'),
+    'bishop_path': (move_validator, '_is_valid_bishop_path'),
+    'rook_path': (move_validator, '_is_valid_rook_path'),
+    'queen_path': (move_validator, '_is_valid_queen_path'),
+    'king_path': (move_validator, '_is_valid_king_path'),
+    'pieces_in_the_way': (move_validator, '_are_pieces_in_the_way'),
+    'play_move': (gameboard.Gameboard, 'play_move'),
+    'make_move': (gameboard.Gameboard, 'make_move'),
+    'unmake_move': (gameboard.Gameboard, 'unmake_move'),
+    'board_copy': (gameboard.Gameboard, 'get_board'),
+    'search_node': (engine.Engine, '_search'),
+    'quiescence_node': (engine.Engine, '_quiescence'),
+}
+
+_counters = {name: _Counter() for name in HOT_PATHS}
+# The original functions of the instrumented hot paths, by name
+_originals: dict[str, Callable] = {}
+
+
+def enable(names: list[str] | None = None) -> None:
+    """Start recording the calls of hot paths.
+
+    Args:
+        names: The names of the hot paths to instrument, see HOT_PATHS.
+          Defaults to all of them.
+
+    Raises:
+        ValueError: If a name isn't a hot path.
+    """
+    names = list(HOT_PATHS) if names is None else names
+    for name in names:
+        if name not in HOT_PATHS:
+            raise ValueError(f"'{name}' isn't a hot path")
+
+    for name in names:
+        if name in _originals:
+            continue
+        owner, attribute = HOT_PATHS[name]
+        function = owner.__dict__[attribute]
+        _originals[name] = function
+        setattr(owner, attribute, _instrument(function, _counters[name]))
+
+
+def disable() -> None:
+    """Stop recording calls, restoring the original functions. The recorded
+    statistics are kept."""
+    for name, function in _originals.items():
+        owner, attribute = HOT_PATHS[name]
+        setattr(owner, attribute, function)
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+@contextlib.contextmanager
+def instrumented(names: list[str] | None = None) -> Iterator[None]:
+    """Record the calls of hot paths within a with statement."""
+    enable(names)
+    try:
+        yield
+    finally:
+        disable()
+
+
+def reset() -> None:
+    """Clear the recorded statistics."""
+    for counter in _counters.values():
+        counter.calls = 0
+        counter.nanoseconds = 0
+
+
+def stats() -> dict[str, CallStats]:
+    """Get the statistics of the hot paths that were called."""
+    return {name: CallStats(counter.calls, counter.nanoseconds / 1e9)
+            for name, counter in _counters.items() if counter.calls}
+
+
+def to_json() -> str:
+    """Export the statistics as a JSON object, e.g.
+    {"play_move": {"calls": 2, "seconds": 0.0001}}."""
+    return json.dumps({name: call_stats._asdict()
+                       for name, call_stats in stats().items()}, indent=2)
+
+
+def to_prometheus(prefix: str = 'cli_chess') -> str:
+    """Export the statistics in the Prometheus text exposition format."""
+    lines = [
+        f'# HELP {prefix}_calls_total The number of calls of a hot path.',
+        f'# TYPE {prefix}_calls_total counter',
+    ]
+    all_stats = stats()
+    lines.extend(f'{prefix}_calls_total{{path="{name}"}} {call_stats.calls}'
+                 for name, call_stats in all_stats.items())
+    lines.extend([
+        f'# HELP {prefix}_seconds_total The time spent in a hot path.',
+        f'# TYPE {prefix}_seconds_total counter',
+    ])
+    lines.extend(f'{prefix}_seconds_total{{path="{name}"}} '
+                 f'{call_stats.seconds:.9f}'
+                 for name, call_stats in all_stats.items())
+    return '\n'.join(lines) + '\n'
+
+
+@contextlib.contextmanager
+def profile_session(directory: str | Path) -> Iterator[None]:
+    """Profile the code within a with statement, and write reports.
+
+    The code runs under cProfile and tracemalloc, with all the hot paths
+    instrumented. Afterwards, the directory holds:
+
+        profile.pstats: The cProfile statistics, for pstats or snakeviz.
+        profile.txt: The functions with the most cumulative time.
+        memory.txt: The lines that allocated the most memory still in use.
+        hot_paths.json, hot_paths.prom: The hot path statistics.
+
+    Work done in other processes, e.g. by ParallelEngine's helpers, isn't
+    profiled.
+
+    Args:
+        directory: The directory to write the reports to, which is created if
+          needed.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    profiler = cProfile.Profile()
+    reset()
+    tracemalloc.start()
+    enable()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        profiler.dump_stats(directory / 'profile.pstats')
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats(
+            pstats.SortKey.CUMULATIVE).print_stats(REPORT_LENGTH)
+        (directory / 'profile.txt').write_text(report.getvalue())
+
+        top_lines = snapshot.statistics('lineno')[:REPORT_LENGTH]
+        (directory / 'memory.txt').write_text(
+            ''.join(f'{line}\n' for line in top_lines))
+
+        (directory / 'hot_paths.json').write_text(to_json() + '\n')
+        (directory / 'hot_paths.prom').write_text(to_prometheus())
+
+
+def _instrument(function: Callable, counter: _Counter) -> Callable:
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start_time = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            counter.calls += 1
+            counter.nanoseconds += perf_counter_ns() - start_time
+
+    return wrapper
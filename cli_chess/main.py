@@ -1,8 +1,629 @@
 # main.py
 
-def main():
-    pass
+import argparse
+import contextlib
+import importlib
+import sys
+from typing import TYPE_CHECKING, Iterator
+
+from .error import InvalidFenError, InvalidPgnError
+from .piece import ChessColor, Piece
+
+# The commands import the modules they need when they run, so that the
+# program starts quickly when it only has to parse its arguments, e.g. to show
+# the help, instead of waiting for the engine, the move generator, the server
+# and the rest to load.
+if TYPE_CHECKING:
+    from .engine import Engine
+    from .match import EngineConfig
+    from .opening_book import OpeningBook
+    from .parallel_search import ParallelEngine
+    from .tablebase import Tablebase, TablebaseResult
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command-line interface.
+
+    Args:
+        argv: The command-line arguments, without the program name. Defaults
+          to sys.argv[1:].
+
+    Returns:
+        The exit status.
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        parser.print_help()
+        return 0
+    if args.profile is None:
+        return args.handler(args)
+
+    from . import instrumentation
+    with instrumentation.profile_session(args.profile):
+        status = args.handler(args)
+    print(f'Profile reports written to {args.profile}', file=sys.stderr)
+    return status
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='cli_chess', description='A command-line game of chess.')
+    parser.add_argument(
+        '--profile', metavar='DIR',
+        help='profile the command with cProfile and tracemalloc, count the '
+             'calls of the hot paths, and write the reports to DIR')
+    parser.set_defaults(command=None)
+    subparsers = parser.add_subparsers(title='commands')
+
+    play_parser = subparsers.add_parser(
+        'play', help='play a game against the computer')
+    play_parser.add_argument(
+        '-c', '--color', choices=sorted(ChessColor.COLORS),
+        default=ChessColor.WHITE, help='the color you play (default: w)')
+    play_parser.add_argument(
+        '-t', '--time', type=float, default=1.0,
+        help='the computer\'s thinking time per move in seconds '
+             '(default: 1.0)')
+    play_parser.add_argument(
+        '-d', '--depth', type=int,
+        help='the maximum search depth of the computer in plies')
+    play_parser.add_argument(
+        '--threads', type=int, default=1,
+        help='the number of processes the computer searches with '
+             '(default: 1)')
+    play_parser.add_argument(
+        '--hash', type=float, default=16,
+        help='the size of the computer\'s transposition table in MB '
+             '(default: 16)')
+    play_parser.add_argument(
+        '--book', metavar='PATH',
+        help='a Polyglot opening book (.bin) for the computer to play from')
+    play_parser.add_argument(
+        '--tablebase', metavar='DIR',
+        help='a directory of endgame tables for the computer to play from, '
+             'see the tablebase command')
+    play_parser.add_argument(
+        '--plain', action='store_true',
+        help='draw the board as plain text, without colors or cursor moves')
+    play_parser.set_defaults(command='play', handler=_run_play)
+
+    perft_parser = subparsers.add_parser(
+        'perft', help='count move generation nodes and measure their speed')
+    perft_parser.add_argument(
+        'depth', type=int, help='the number of moves to look ahead')
+    perft_parser.add_argument(
+        '-p', '--position', action='append', metavar='POSITION',
+        choices=_LazyChoices('perft', 'REFERENCE_POSITIONS'),
+        help='the reference position to use, one of %(choices)s; can be '
+             'repeated (default: all)')
+    perft_parser.add_argument(
+        '--divide', action='store_true',
+        help='show the node count under each move of the position')
+    perft_parser.set_defaults(command='perft', handler=_run_perft)
+
+    uci_parser = subparsers.add_parser(
+        'uci', help='talk to a chess GUI with the Universal Chess Interface')
+    uci_parser.set_defaults(command='uci', handler=_run_uci)
+
+    serve_parser = subparsers.add_parser(
+        'serve', help='host games for network clients')
+    serve_parser.add_argument(
+        '--host', default='127.0.0.1',
+        help='the host to listen on (default: 127.0.0.1)')
+    serve_parser.add_argument(
+        '-p', '--port', type=int, default=5000,
+        help='the TCP port to listen on (default: 5000)')
+    serve_parser.add_argument(
+        '--unix', metavar='PATH',
+        help='listen on a Unix socket at this path instead of TCP')
+    serve_parser.set_defaults(command='serve', handler=_run_serve)
+
+    load_parser = subparsers.add_parser(
+        'loadtest', help='play many games against a server and measure it')
+    load_parser.add_argument(
+        'address', help='the HOST:PORT or Unix socket path of the server')
+    load_parser.add_argument(
+        '-c', '--clients', type=int, default=100,
+        help='the number of concurrent clients (default: 100)')
+    load_parser.add_argument(
+        '-m', '--moves', type=int, default=20,
+        help='the number of moves each client plays (default: 20)')
+    load_parser.set_defaults(command='loadtest', handler=_run_loadtest)
+
+    watch_parser = subparsers.add_parser(
+        'watch', help='follow a game on a server as a spectator')
+    watch_parser.add_argument(
+        'address', help='the HOST:PORT or Unix socket path of the server')
+    watch_parser.add_argument('game', type=int, help='the ID of the game')
+    watch_parser.add_argument(
+        '--flip', action='store_true',
+        help='show the board as seen by the black player')
+    watch_parser.add_argument(
+        '--plain', action='store_true',
+        help='draw the board as plain text, without colors or cursor moves')
+    watch_parser.set_defaults(command='watch', handler=_run_watch)
+
+    match_parser = subparsers.add_parser(
+        'match', help='play games between two engine settings')
+    match_parser.add_argument(
+        'openings',
+        help='the opening positions, as a file of FEN or EPD lines or a PGN '
+             'file')
+    match_parser.add_argument(
+        '-e', '--engine', action='append', type=_engine_config,
+        metavar='SETTINGS',
+        help='the settings of an engine, e.g. name=fast,nodes=2000, from '
+             'name, depth, time, nodes and hash; give it twice (default: '
+             '5000 nodes per move)')
+    match_parser.add_argument(
+        '-r', '--rounds', type=int, default=1,
+        help='the number of times each opening is played with each engine '
+             'as white (default: 1)')
+    match_parser.add_argument(
+        '-j', '--workers', type=int,
+        help='the number of processes to play with (default: the number of '
+             'CPUs)')
+    match_parser.add_argument(
+        '-o', '--pgn', metavar='PATH',
+        help='a PGN file to append the games to as they finish')
+    match_parser.add_argument(
+        '--sprt', nargs=2, type=float, metavar=('ELO0', 'ELO1'),
+        help='stop once a sequential probability ratio test decides whether '
+             'the first engine is ELO0 or ELO1 stronger')
+    match_parser.add_argument(
+        '--alpha', type=float, default=0.05,
+        help='the false positive rate of the SPRT (default: 0.05)')
+    match_parser.add_argument(
+        '--beta', type=float, default=0.05,
+        help='the false negative rate of the SPRT (default: 0.05)')
+    match_parser.add_argument(
+        '--max-plies', type=int,
+        help='the number of plies after which a game is a draw (default: '
+             '400)')
+    match_parser.add_argument(
+        '--tablebase', metavar='DIR',
+        help='a directory of endgame tables that decide games once they '
+             'reach them')
+    match_parser.set_defaults(command='match', handler=_run_match)
+
+    export_parser = subparsers.add_parser(
+        'export', help='export positions as NumPy arrays (requires NumPy)')
+    export_parser.add_argument(
+        'input', nargs='+',
+        help='PGN files, whose games are exported position by position, or '
+             'files of FEN or EPD lines')
+    export_parser.add_argument(
+        '-o', '--output', required=True, metavar='DIR',
+        help='the directory to write the .npy shards to')
+    export_parser.add_argument(
+        '--chunk-size', type=int, default=1 << 16,
+        help='the number of positions per shard (default: 65536)')
+    export_parser.add_argument(
+        '--processes', type=int,
+        help='the number of processes to export with (default: the number '
+             'of CPUs)')
+    export_parser.add_argument(
+        '--skip-invalid', action='store_true',
+        help='skip invalid games instead of stopping')
+    export_parser.set_defaults(command='export', handler=_run_export)
+
+    tablebase_parser = subparsers.add_parser(
+        'tablebase', help='generate endgame tables')
+    tablebase_parser.add_argument(
+        'directory', help='the directory to write the tables to')
+    tablebase_parser.add_argument(
+        '-e', '--endgame', action='append', metavar='ENDGAME',
+        choices=_LazyChoices('tablebase', 'ENDGAMES'),
+        help='the endgame to generate, one of %(choices)s; can be repeated '
+             '(default: all)')
+    tablebase_parser.add_argument(
+        '--processes', type=int,
+        help='the number of processes to generate with (default: the number '
+             'of CPUs)')
+    tablebase_parser.set_defaults(command='tablebase',
+                                  handler=_run_tablebase)
+
+    return parser
+
+
+class _LazyChoices:
+    """The choices of an argument, which are read from a module of the
+    package when they're first needed, so that building the parser doesn't
+    import the module."""
+
+    def __init__(self, module_name: str, attribute: str) -> None:
+        self._module_name = module_name
+        self._attribute = attribute
+        self._choices: list[str] | None = None
+
+    def __contains__(self, choice: object) -> bool:
+        return choice in self._load()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def _load(self) -> list[str]:
+        if self._choices is None:
+            module = importlib.import_module(f'.{self._module_name}',
+                                             __package__)
+            self._choices = list(getattr(module, self._attribute))
+        return self._choices
+
+
+def _run_play(args: argparse.Namespace) -> int:
+    from .engine import Engine
+    from .opening_book import OpeningBook
+    from .parallel_search import ParallelEngine
+    from .tablebase import Tablebase
+
+    with contextlib.ExitStack() as stack:
+        book = None
+        if args.book:
+            try:
+                book = stack.enter_context(OpeningBook(args.book))
+            except OSError as error:
+                print(f'Cannot open the opening book: {error}',
+                      file=sys.stderr)
+                return 1
+        tables = None
+        if args.tablebase:
+            tables = stack.enter_context(Tablebase(args.tablebase))
+
+        if args.threads > 1:
+            engine = stack.enter_context(
+                ParallelEngine(args.threads, args.hash))
+        else:
+            engine = Engine(args.hash)
+        return _play_game(args, engine, book, tables)
+
+
+def _play_game(args: argparse.Namespace,
+               engine: 'Engine | ParallelEngine',
+               book: 'OpeningBook | None' = None,
+               tables: 'Tablebase | None' = None) -> int:
+    from .game_record import GameRecord
+    from .move import move_to_uci
+    from .move_generator import generate_legal_moves, is_in_check
+    from .renderer import BoardRenderer
+
+    record = GameRecord()
+    gameboard = record.gameboard
+    renderer = BoardRenderer(flipped=args.color == ChessColor.BLACK,
+                             ansi=False if args.plain else None)
+    last_move = None
+    # The computer's last move is announced below the board, so that it
+    # isn't cleared when the board is redrawn
+    message = None
+
+    while True:
+        renderer.draw(gameboard, last_move)
+        if message is not None:
+            print(message)
+            message = None
+
+        moves = generate_legal_moves(gameboard, gameboard.turn)
+        if not moves:
+            if is_in_check(gameboard, gameboard.turn):
+                winner = ('White' if gameboard.turn == ChessColor.BLACK else
+                          'Black')
+                print(f'Checkmate, {winner} wins.')
+            else:
+                print('Stalemate.')
+            return 0
+        if record.is_fifty_move_draw():
+            print('Draw by the fifty-move rule.')
+            return 0
+        if record.is_threefold_repetition():
+            print('Draw by threefold repetition.')
+            return 0
+
+        if gameboard.turn == args.color:
+            move = _read_move(moves)
+            if move is None:
+                return 0
+        elif book is not None and (move := book.choose_move(gameboard)):
+            # Book moves are played without searching
+            message = f'The computer plays {move_to_uci(move)} (book)'
+        elif tables is not None and (move := tables.best_move(gameboard)):
+            message = (f'The computer plays {move_to_uci(move)} '
+                       f'({_format_tablebase_result(tables.probe(gameboard))})')
+        else:
+            result = engine.search(gameboard, depth=args.depth,
+                                   time_limit=args.time,
+                                   history=record.history())
+            move = result.best_move
+            message = (f'The computer plays {move_to_uci(move)} '
+                       f'(depth {result.depth}, '
+                       f'{_format_score(result.score)})')
+
+        record.play(move)
+        last_move = move
+
+
+def _format_score(score: int) -> str:
+    """Format a search score, e.g. '+0.35' or 'mate in 2' (negative if the
+    player to move gets mated)."""
+    from .engine import MATE_SCORE, MATE_THRESHOLD
+    if abs(score) < MATE_THRESHOLD:
+        return f'{score / 100:+.2f}'
+    moves_to_mate = (MATE_SCORE - abs(score) + 1) // 2
+    return f'mate in {moves_to_mate if score > 0 else -moves_to_mate}'
+
+
+def _format_tablebase_result(result: 'TablebaseResult') -> str:
+    """Format a tablebase result like a search score, e.g. 'mate in 12'."""
+    if result.wdl == 0:
+        return 'tablebase draw'
+    moves_to_mate = (result.dtm + 1) // 2
+    return (f'tablebase, mate in '
+            f'{moves_to_mate if result.wdl > 0 else -moves_to_mate}')
+
+
+def _read_move(legal_moves: list[int]) -> int | None:
+    """Read a legal move from the player in coordinate notation.
+
+    Returns:
+        The encoded move, or None if the player quits.
+    """
+    from .move import move_from_uci
+    while True:
+        try:
+            text = input('Your move (e.g. e2e4, or quit): ')
+        except EOFError:
+            return None
+
+        text = text.strip().lower().replace(' ', '').replace('-', '')
+        if text in ('quit', 'exit', 'q'):
+            return None
+
+        try:
+            move = move_from_uci(text)
+        except ValueError:
+            print(f"'{text}' isn't a move in coordinate notation.")
+            continue
+
+        # Promote to a queen if no promotion piece is given
+        queen_promotion = move | Piece.ORDER.index(Piece.QUEEN) << 12
+        if move not in legal_moves and queen_promotion in legal_moves:
+            move = queen_promotion
+
+        if move in legal_moves:
+            return move
+        print(f"'{text}' isn't a legal move.")
+
+
+def _run_perft(args: argparse.Namespace) -> int:
+    from . import perft
+    position_names = args.position or list(perft.REFERENCE_POSITIONS)
+
+    if args.divide:
+        for position_name in position_names:
+            gameboard = perft.REFERENCE_POSITIONS[
+                position_name].create_gameboard()
+            print(f'{position_name}:')
+            divide = perft.perft_divide(gameboard, args.depth)
+            for move, nodes in sorted(divide.items()):
+                print(f'  {move}: {nodes}')
+            print(f'  total: {sum(divide.values())}')
+        return 0
+
+    failed = False
+    for result in perft.run_benchmark(position_names, args.depth):
+        if result.expected_nodes is None:
+            status = 'unknown'
+        elif result.passed:
+            status = 'ok'
+        else:
+            status = f'FAILED, expected {result.expected_nodes}'
+            failed = True
+        print(f'{result.position_name:<10} depth {result.depth}: '
+              f'{result.nodes} nodes in {result.seconds:.2f} s '
+              f'({result.nodes_per_second:,.0f} nodes/s) [{status}]')
+
+    return 1 if failed else 0
+
+
+def _run_uci(args: argparse.Namespace) -> int:
+    from . import uci
+    uci.run()
+    return 0
+
+
+def _run_serve(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from . import server
+    game_server = server.GameServer()
+
+    async def serve() -> None:
+        try:
+            await game_server.start(args.host, args.port, args.unix)
+        except OSError as error:
+            print(f'Cannot start the server: {error}', file=sys.stderr)
+            return
+        print(f'Listening on {game_server.address}')
+        await game_server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    print(_format_stats(game_server.stats()._asdict()))
+    return 0
+
+
+def _run_loadtest(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from . import server
+    address = _parse_address(args.address)
+    try:
+        results = asyncio.run(server.run_load(address, args.clients,
+                                              args.moves))
+    except (OSError, RuntimeError) as error:
+        print(f'Load test failed: {error}', file=sys.stderr)
+        return 1
+    print(_format_stats(results))
+    return 0
+
+
+def _run_watch(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from . import server
+    from .gameboard import Gameboard
+    from .renderer import BoardRenderer
+
+    renderer = BoardRenderer(flipped=args.flip,
+                             ansi=False if args.plain else None)
+
+    def on_update(fen: str, last_move: int | None) -> None:
+        renderer.draw(Gameboard.from_fen(fen), last_move)
+
+    try:
+        result = asyncio.run(server.watch_game(
+            _parse_address(args.address), args.game, on_update))
+    except (OSError, ValueError) as error:
+        print(f'Cannot watch the game: {error}', file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+    print(f'Game over: {result}' if result is not None else
+          'The server closed the connection.')
+    return 0
+
+
+def _parse_address(text: str) -> tuple[str, int] | str:
+    """Parse a HOST:PORT address, or else a Unix socket path."""
+    host, _, port = text.rpartition(':')
+    return (host, int(port)) if port.isdigit() else text
+
+
+def _format_stats(stats: dict[str, float]) -> str:
+    return '\n'.join(f'{name:<20} {value:,.2f}' if isinstance(value, float)
+                     else f'{name:<20} {value:,}'
+                     for name, value in stats.items())
+
+
+def _engine_config(text: str) -> 'EngineConfig':
+    from . import match
+    try:
+        return match.parse_engine_config(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def _run_match(args: argparse.Namespace) -> int:
+    from . import match
+    engines = args.engine or []
+    if len(engines) > 2:
+        print('At most two engines can play a match.', file=sys.stderr)
+        return 1
+    while len(engines) < 2:
+        engines.append(match.EngineConfig())
+    if engines[0].name == engines[1].name:
+        engines = [engines[0]._replace(name=f'{engines[0].name} 1'),
+                   engines[1]._replace(name=f'{engines[1].name} 2')]
+
+    try:
+        openings = match.read_openings(args.openings)
+    except (OSError, InvalidFenError, InvalidPgnError) as error:
+        print(f'Cannot read the openings: {error}', file=sys.stderr)
+        return 1
+    if not openings:
+        print('There are no openings to play.', file=sys.stderr)
+        return 1
+
+    max_plies = (match.DEFAULT_MAX_PLIES if args.max_plies is None else
+                 args.max_plies)
+    total = 2 * args.rounds * len(openings)
+    played = 0
+
+    def on_game(game: match.MatchGame) -> None:
+        nonlocal played
+        played += 1
+        print(f'Game {played} of {total}: {engines[game.white].name} - '
+              f'{engines[1 - game.white].name} {game.result} '
+              f'({game.reason})')
+
+    with contextlib.ExitStack() as stack:
+        pgn_stream = None
+        if args.pgn:
+            pgn_stream = stack.enter_context(open(args.pgn, 'a'))
+        result = match.run_match(
+            openings, tuple(engines), args.rounds, args.workers, pgn_stream,
+            args.sprt, args.alpha, args.beta, max_plies, args.tablebase,
+            on_game)
+
+    games = result.wins + result.draws + result.losses
+    score = (result.wins + result.draws / 2) / games if games else 0.0
+    elo, error = match.elo_difference(result.wins, result.draws,
+                                      result.losses)
+    print(f'Score of {engines[0].name} vs {engines[1].name}: '
+          f'{result.wins} - {result.losses} - {result.draws} '
+          f'[{score:.3f}] {games}')
+    print(f'Elo difference: {elo:+.1f} +/- {error:.1f}')
+    if result.sprt is not None:
+        sprt = result.sprt
+        decision = (f'{sprt.decision} accepted' if sprt.decision else
+                    'undecided')
+        print(f'SPRT: llr {sprt.llr:.2f} ({sprt.lower_bound:.2f}, '
+              f'{sprt.upper_bound:.2f}), {decision}')
+    if result.unplayed:
+        print(f'{result.unplayed} games weren\'t played.')
+    return 0
+
+
+def _run_export(args: argparse.Namespace) -> int:
+    import itertools
+
+    from . import pgn, process_pool
+    try:
+        from . import tensor_export
+    except ImportError:
+        print('The export command requires NumPy.', file=sys.stderr)
+        return 1
+
+    pgn_paths = [path for path in args.input
+                 if path.lower().endswith('.pgn')]
+    position_paths = [path for path in args.input if path not in pgn_paths]
+    try:
+        # The games are read and the shards written by the same processes
+        with process_pool.open_pool(args.processes) as executor:
+            packed_positions = itertools.chain(
+                tensor_export.iter_packed_games(
+                    pgn_paths, args.processes, args.skip_invalid, executor),
+                (gameboard.pack() for path in position_paths
+                 for gameboard in pgn.read_positions(path)))
+            shards = tensor_export.export_packed(
+                packed_positions, args.output, args.chunk_size,
+                args.processes, executor)
+    except (OSError, InvalidFenError, InvalidPgnError) as error:
+        print(f'Cannot export the positions: {error}', file=sys.stderr)
+        return 1
+
+    positions = sum(shard.positions for shard in shards)
+    print(f'Exported {positions:,} positions to {len(shards)} shards in '
+          f'{args.output}')
+    return 0
+
+
+def _run_tablebase(args: argparse.Namespace) -> int:
+    from . import tablebase
+    try:
+        paths = tablebase.generate_tables(
+            args.directory, args.endgame or tablebase.ENDGAMES, args.processes)
+    except OSError as error:
+        print(f'Cannot write the endgame tables: {error}', file=sys.stderr)
+        return 1
+    for path in paths:
+        print(f'Generated {path}')
+    if not paths:
+        print('The endgame tables already exist.')
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
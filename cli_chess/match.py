@@ -0,0 +1,413 @@
+# match.py
+
+import datetime
+import math
+import os
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, NamedTuple, TextIO
+
+from . import pgn
+from .engine import Engine
+from .game_record import GameRecord
+from .gameboard import Gameboard
+from .move_generator import generate_legal_moves, is_in_check
+from .piece import ChessColor, Piece
+from .tablebase import Tablebase
+
+# A match plays games between two engine configurations from a set of
+# opening positions. Each opening is played once with each configuration as
+# white per round, and the games are spread over a pool of processes, each
+# of which keeps its engines between games. Results are reported from the
+# point of view of the first engine.
+
+# The number of plies after which a game is adjudicated as a draw
+DEFAULT_MAX_PLIES = 400
+# The number of nodes searched per move by engines without search limits
+DEFAULT_NODE_LIMIT = 5000
+# The number of times a crashed process pool is replaced before giving up on
+# the games that are left
+MAX_POOL_RESTARTS = 3
+
+_START_FEN = Gameboard().to_fen()
+# The PGN Termination tag for each way a game can end
+_TERMINATIONS = {
+    'checkmate': 'normal',
+    'stalemate': 'normal',
+    'fifty-move rule': 'normal',
+    'threefold repetition': 'normal',
+    'insufficient material': 'normal',
+    'illegal move': 'rules infraction',
+    'tablebase': 'adjudication',
+    'move limit': 'adjudication',
+}
+
+
+class EngineConfig(NamedTuple):
+    """The settings of an engine in a match."""
+    name: str = 'cli_chess'
+    # The search limits per move, None for no limit. If there are no limits,
+    # DEFAULT_NODE_LIMIT nodes are searched.
+    depth: int | None = None
+    time_limit: float | None = None
+    node_limit: int | None = None
+    # The size of the transposition table in MB
+    hash_mb: float = 16
+
+
+class MatchGame(NamedTuple):
+    """A finished game of a match."""
+    # The number of the game, from 0
+    number: int
+    fen: str
+    # The index of the engine that played white, 0 or 1
+    white: int
+    # '1-0', '0-1' or '1/2-1/2'
+    result: str
+    # How the game ended, e.g. 'checkmate', see _TERMINATIONS
+    reason: str
+    # The moves, encoded as in move.py
+    moves: list[int]
+
+
+class SprtResult(NamedTuple):
+    """The state of a sequential probability ratio test."""
+    llr: float
+    lower_bound: float
+    upper_bound: float
+    # 'H0' if the first engine isn't elo1 stronger, 'H1' if it isn't elo0
+    # weaker, or None if the test is undecided
+    decision: str | None
+
+
+class MatchResult(NamedTuple):
+    """The outcome of a match, from the point of view of the first engine."""
+    wins: int
+    draws: int
+    losses: int
+    # The number of games that were scheduled but not played, because the
+    # test was decided early or the workers crashed
+    unplayed: int
+    sprt: SprtResult | None
+
+
+def parse_engine_config(text: str) -> EngineConfig:
+    """Parse the settings of an engine, e.g. 'name=fast,nodes=5000'.
+
+    The settings are name, depth, time (seconds per move), nodes and hash
+    (MB), separated by commas.
+
+    Raises:
+        ValueError: If a setting is unknown or has an invalid value.
+    """
+    config = EngineConfig()
+    converters = {'name': ('name', str), 'depth': ('depth', int),
+                  'time': ('time_limit', float), 'nodes': ('node_limit', int),
+                  'hash': ('hash_mb', float)}
+    for setting in filter(None, text.split(',')):
+        key, _, value = setting.partition('=')
+        if key.strip() not in converters:
+            raise ValueError(f"unknown engine setting: '{key}'")
+        field, converter = converters[key.strip()]
+        config = config._replace(**{field: converter(value.strip())})
+    return config
+
+
+def read_openings(path: str | os.PathLike) -> list[str]:
+    """Read opening positions from a file.
+
+    PGN files (.pgn) give the position at the end of each game. Other files
+    are read as EPD or FEN, one position per line, ignoring empty lines,
+    comments starting with '#', and EPD operations.
+
+    Returns:
+        The FENs of the positions.
+
+    Raises:
+        OSError: If the file can't be read.
+        InvalidFenError: If a position is invalid.
+        InvalidPgnError: If a game is invalid.
+    """
+    if os.fspath(path).lower().endswith('.pgn'):
+        fens = []
+        for game in pgn.read_games(path):
+            for gameboard in game.replay():
+                pass
+            fens.append(gameboard.to_fen())
+        return fens
+
+    return [gameboard.to_fen() for gameboard in pgn.read_positions(path)]
+
+
+def play_game(fen: str, white: EngineConfig, black: EngineConfig,
+              max_plies: int = DEFAULT_MAX_PLIES,
+              tables: Tablebase | None = None,
+              engines: dict[EngineConfig, Engine] | None = None
+              ) -> tuple[str, str, list[int]]:
+    """Play a game between two engines and adjudicate it.
+
+    Args:
+        fen: The FEN of the starting position.
+        white: The engine that plays white.
+        black: The engine that plays black.
+        max_plies: The number of plies after which the game is a draw.
+        tables: Endgame tables that decide the game once it reaches them.
+        engines: The engines to play with by configuration, which are
+          created and added as needed, so that they can be kept between
+          games.
+
+    Returns:
+        The result, the reason the game ended, and the moves.
+    """
+    engines = {} if engines is None else engines
+    for config in (white, black):
+        if config not in engines:
+            engines[config] = Engine(config.hash_mb)
+        engines[config].new_game()
+
+    record = GameRecord(Gameboard.from_fen(fen))
+    gameboard = record.gameboard
+    while True:
+        color = gameboard.turn
+        # The results if the player to move wins or loses
+        wins, loses = (('1-0', '0-1') if color == ChessColor.WHITE else
+                       ('0-1', '1-0'))
+        legal_moves = generate_legal_moves(gameboard, color)
+        if not legal_moves:
+            if is_in_check(gameboard, color):
+                return loses, 'checkmate', list(record.moves)
+            return '1/2-1/2', 'stalemate', list(record.moves)
+        if record.is_fifty_move_draw():
+            return '1/2-1/2', 'fifty-move rule', list(record.moves)
+        if record.is_threefold_repetition():
+            return '1/2-1/2', 'threefold repetition', list(record.moves)
+        if _is_insufficient_material(gameboard):
+            return '1/2-1/2', 'insufficient material', list(record.moves)
+        if tables is not None and (result := tables.probe(gameboard)):
+            outcome = (wins if result.wdl > 0 else
+                       loses if result.wdl < 0 else '1/2-1/2')
+            return outcome, 'tablebase', list(record.moves)
+        if record.ply >= max_plies:
+            return '1/2-1/2', 'move limit', list(record.moves)
+
+        config = white if color == ChessColor.WHITE else black
+        node_limit = config.node_limit
+        if config.depth is config.time_limit is node_limit is None:
+            node_limit = DEFAULT_NODE_LIMIT
+        move = engines[config].search(
+            gameboard, config.depth, config.time_limit, node_limit,
+            history=record.history()).best_move
+        if move not in legal_moves:
+            return loses, 'illegal move', list(record.moves)
+        record.play(move)
+
+
+def run_match(openings: list[str], engines: tuple[EngineConfig, EngineConfig],
+              rounds: int = 1, workers: int | None = None,
+              pgn_stream: TextIO | None = None,
+              sprt: tuple[float, float] | None = None,
+              alpha: float = 0.05, beta: float = 0.05,
+              max_plies: int = DEFAULT_MAX_PLIES,
+              tablebase_dir: str | None = None,
+              on_game: Callable[[MatchGame], None] | None = None
+              ) -> MatchResult:
+    """Play a match between two engines on a pool of processes.
+
+    Games are written to the PGN stream as soon as they finish. If a worker
+    process crashes, the games that finished are kept and the unfinished ones
+    are played again on a new pool.
+
+    Args:
+        openings: The FENs of the opening positions.
+        engines: The two engines.
+        rounds: The number of times each opening is played with each engine
+          as white.
+        workers: The number of processes. Defaults to the number of CPUs.
+        pgn_stream: The text stream to write the games to in PGN.
+        sprt: The Elo differences (elo0, elo1) of the hypotheses of a
+          sequential probability ratio test, which stops the match once it's
+          decided.
+        alpha: The false positive rate of the test.
+        beta: The false negative rate of the test.
+        max_plies: The number of plies after which a game is a draw.
+        tablebase_dir: A directory of endgame tables that decide games once
+          they reach them.
+        on_game: Called with each game as it finishes.
+
+    Returns:
+        The outcome of the match.
+    """
+    tasks = {number: (openings[number // 2 % len(openings)], number % 2)
+             for number in range(2 * rounds * len(openings))}
+    scores = [0, 0, 0]
+    sprt_result = None
+    restarts = 0
+    date = datetime.date.today().strftime('%Y.%m.%d')
+
+    while tasks and restarts <= MAX_POOL_RESTARTS:
+        with ProcessPoolExecutor(workers) as executor:
+            pending: dict[Future, int] = {
+                executor.submit(_play_task, fen, white, engines, max_plies,
+                                tablebase_dir): number
+                for number, (fen, white) in tasks.items()}
+            broken = False
+            while pending and not broken:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                if any(isinstance(future.exception(), BrokenProcessPool)
+                       for future in done):
+                    # Games other than those just done may have finished
+                    # before the pool broke, and they're kept too
+                    broken = True
+                    done = [future for future in pending if future.done()]
+                for future in done:
+                    number = pending.pop(future)
+                    try:
+                        result, reason, moves = future.result()
+                    except BrokenProcessPool:
+                        # The game is played again on a new pool
+                        continue
+                    fen, white = tasks.pop(number)
+                    game = MatchGame(number, fen, white, result, reason,
+                                     moves)
+                    # Scores are counted from the first engine's point of
+                    # view, so white's outcome is reversed when it's black
+                    outcome = _OUTCOMES[result]
+                    scores[2 - outcome if white else outcome] += 1
+                    if pgn_stream is not None:
+                        pgn_stream.write(pgn.format_game(
+                            _to_pgn_game(game, engines, date)))
+                        pgn_stream.flush()
+                    if on_game is not None:
+                        on_game(game)
+
+                if sprt is not None:
+                    sprt_result = sprt_test(*scores, *sprt, alpha, beta)
+                    if sprt_result.decision is not None:
+                        executor.shutdown(cancel_futures=True)
+                        return MatchResult(*scores, len(tasks), sprt_result)
+            if broken:
+                restarts += 1
+
+    return MatchResult(*scores, len(tasks), sprt_result)
+
+
+def elo_difference(wins: int, draws: int, losses: int
+                   ) -> tuple[float, float]:
+    """Estimate the Elo difference from a match score.
+
+    Returns:
+        The Elo difference and the half width of its 95% confidence interval,
+        which are infinite for a perfect or a zero score.
+    """
+    games = wins + draws + losses
+    if not games:
+        return 0.0, math.inf
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 +
+                losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    error = (_score_to_elo(score + margin) -
+             _score_to_elo(score - margin)) / 2
+    return _score_to_elo(score), error
+
+
+def sprt_test(wins: int, draws: int, losses: int, elo0: float, elo1: float,
+              alpha: float = 0.05, beta: float = 0.05) -> SprtResult:
+    """Run a sequential probability ratio test of H0: the Elo difference is
+    elo0, against H1: it's elo1.
+
+    The log-likelihood ratio is the normal approximation of the generalized
+    SPRT for game results, in logistic Elo.
+
+    Args:
+        wins, draws, losses: The match score so far.
+        elo0: The Elo difference of the null hypothesis.
+        elo1: The Elo difference of the alternative hypothesis.
+        alpha: The false positive rate.
+        beta: The false negative rate.
+    """
+    lower_bound = math.log(beta / (1 - alpha))
+    upper_bound = math.log((1 - beta) / alpha)
+
+    games = wins + draws + losses
+    llr = 0.0
+    if games:
+        score = (wins + draws / 2) / games
+        variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 +
+                    losses * score ** 2) / games
+        if variance > 0:
+            score0 = _elo_to_score(elo0)
+            score1 = _elo_to_score(elo1)
+            llr = (games * (score1 - score0) *
+                   (2 * score - score0 - score1) / (2 * variance))
+
+    decision = None
+    if llr >= upper_bound:
+        decision = 'H1'
+    elif llr <= lower_bound:
+        decision = 'H0'
+    return SprtResult(llr, lower_bound, upper_bound, decision)
+
+
+# The index of each result in the scores of a match, from white's point of
+# view: a win, a draw or a loss
+_OUTCOMES = {'1-0': 0, '1/2-1/2': 1, '0-1': 2}
+
+# The engines and the tablebase of a worker process, kept between games
+_worker_engines: dict[EngineConfig, Engine] = {}
+_worker_tables: dict[str, Tablebase] = {}
+
+
+def _play_task(fen: str, white: int,
+               engines: tuple[EngineConfig, EngineConfig], max_plies: int,
+               tablebase_dir: str | None) -> tuple[str, str, list[int]]:
+    """Play a game of a match in a worker process."""
+    tables = None
+    if tablebase_dir is not None:
+        if tablebase_dir not in _worker_tables:
+            _worker_tables[tablebase_dir] = Tablebase(tablebase_dir)
+        tables = _worker_tables[tablebase_dir]
+    return play_game(fen, engines[white], engines[1 - white], max_plies,
+                     tables, _worker_engines)
+
+
+def _to_pgn_game(game: MatchGame,
+                 engines: tuple[EngineConfig, EngineConfig],
+                 date: str) -> pgn.PgnGame:
+    headers = {
+        'Event': 'cli_chess match',
+        'Site': '?',
+        'Date': date,
+        'Round': str(game.number // 2 + 1),
+        'White': engines[game.white].name,
+        'Black': engines[1 - game.white].name,
+    }
+    if game.fen != _START_FEN:
+        headers['SetUp'] = '1'
+        headers['FEN'] = game.fen
+    headers['Termination'] = _TERMINATIONS[game.reason]
+    return pgn.PgnGame(headers, game.moves, game.result)
+
+
+def _is_insufficient_material(gameboard: Gameboard) -> bool:
+    """Check if neither player can mate, i.e. only the kings and at most one
+    knight or bishop are left."""
+    board = gameboard.view()
+    if board.get_occupancy().bit_count() > 3:
+        return False
+    return not any(board.get_bitboard(symbol, color)
+                   for symbol in (Piece.PAWN, Piece.ROOK, Piece.QUEEN)
+                   for color in ChessColor.ORDER)
+
+
+def _score_to_elo(score: float) -> float:
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def _elo_to_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
@@ -0,0 +1,83 @@
+# move.py
+
+from . import bitboard
+from .piece import Piece
+from .square import SQUARE_INDICES
+
+# Moves are encoded as 16-bit integers:
+#   bits 0-5:   the index of the start square (see bitboard.py)
+#   bits 6-11:  the index of the end square
+#   bits 12-14: the index in Piece.ORDER of the piece a pawn is promoted to,
+#               or 0 if the move isn't a promotion (pawns can't be promoted
+#               to pawns, so 0 is free)
+# Castling is encoded as the king moving two squares, and en passant as the
+# pawn moving to the en passant square.
+NULL_MOVE = 0
+
+PROMOTION_SYMBOLS = (Piece.QUEEN, Piece.ROOK, Piece.BISHOP, Piece.KNIGHT)
+
+
+def encode_move(start: int, end: int, promotion: int = 0) -> int:
+    """Encode a move.
+
+    Args:
+        start: The index of the square the piece is on before the move.
+        end: The index of the square the piece is on after the move.
+        promotion: The index in Piece.ORDER of the piece a pawn is promoted
+          to, or 0 if the move isn't a promotion.
+
+    Returns:
+        The move encoded as a 16-bit integer.
+    """
+    return start | end << 6 | promotion << 12
+
+
+def move_start(move: int) -> int:
+    """Get the index of the start square of an encoded move."""
+    return move & 63
+
+
+def move_end(move: int) -> int:
+    """Get the index of the end square of an encoded move."""
+    return move >> 6 & 63
+
+
+def move_promotion(move: int) -> int:
+    """Get the Piece.ORDER index of the promotion piece of an encoded move, or
+    0 if the move isn't a promotion."""
+    return move >> 12
+
+
+def move_to_uci(move: int) -> str:
+    """Get the coordinate notation of an encoded move, e.g. 'e2e4' or 'e7e8q'.
+    """
+    uci = (bitboard.index_to_square(move_start(move)) +
+           bitboard.index_to_square(move_end(move)))
+    promotion = move_promotion(move)
+    if promotion:
+        uci += Piece.ORDER[promotion].lower()
+    return uci
+
+
+def move_from_uci(uci: str) -> int:
+    """Encode a move given in coordinate notation, e.g. 'e2e4' or 'e7e8q'.
+
+    Raises:
+        ValueError: If the move isn't in coordinate notation.
+    """
+    if len(uci) not in (4, 5):
+        raise ValueError(f"invalid move: '{uci}'")
+
+    promotion = 0
+    if len(uci) == 5:
+        promotion_symbol = uci[4].upper()
+        if promotion_symbol not in PROMOTION_SYMBOLS:
+            raise ValueError(f"invalid promotion piece: '{uci}'")
+        promotion = Piece.ORDER.index(promotion_symbol)
+
+    start = SQUARE_INDICES.get(uci[:2])
+    end = SQUARE_INDICES.get(uci[2:4])
+    if start is None or end is None:
+        raise ValueError(f"invalid move: '{uci}'")
+
+    return encode_move(start, end, promotion)
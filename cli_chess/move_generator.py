@@ -0,0 +1,446 @@
+# move_generator.py
+
+from typing import Iterator, NamedTuple
+
+from . import bitboard
+from .attack_tables import (KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS,
+                            bishop_attacks, rook_attacks)
+from .gameboard import Gameboard
+from .move import encode_move, move_end, move_start
+from .piece import ChessColor, Piece
+from .square import BETWEEN
+
+# Indices of the pieces in Piece.ORDER
+_PAWN = Piece.ORDER.index(Piece.PAWN)
+_KNIGHT = Piece.ORDER.index(Piece.KNIGHT)
+_BISHOP = Piece.ORDER.index(Piece.BISHOP)
+_ROOK = Piece.ORDER.index(Piece.ROOK)
+_QUEEN = Piece.ORDER.index(Piece.QUEEN)
+_KING = Piece.ORDER.index(Piece.KING)
+_PROMOTIONS = (_QUEEN, _ROOK, _BISHOP, _KNIGHT)
+
+_RANK_3 = bitboard.RANK_1 << 16
+_RANK_6 = bitboard.RANK_1 << 40
+
+# For each color in ChessColor.ORDER: the castling rights, the squares that
+# must be empty, the squares the king passes (which must not be attacked) and
+# the king's end square
+_CASTLING_MOVES = (
+    ((Gameboard.WHITE_KINGSIDE, 0x60, (4, 5), 6),
+     (Gameboard.WHITE_QUEENSIDE, 0x0E, (4, 3), 2)),
+    ((Gameboard.BLACK_KINGSIDE, 0x60 << 56, (60, 61), 62),
+     (Gameboard.BLACK_QUEENSIDE, 0x0E << 56, (60, 59), 58)),
+)
+
+
+class CheckInfo(NamedTuple):
+    """What restricts the moves of a player because of their king's safety.
+
+    A move other than a king move is legal only if it ends on a square of
+    check_mask, which takes care of blocking or capturing a checking piece,
+    and, if the piece is pinned, on a square of its pin ray. En passant
+    captures, which remove a piece from another square, are checked
+    separately.
+    """
+    # The square index of the king, or None if the player has no king
+    king: int | None
+    # The bitboard of the enemy pieces giving check
+    checkers: int
+    # The squares a piece other than the king can move to without leaving the
+    # king in check: all squares when not in check, the checking piece and the
+    # squares between it and the king when in check by one piece, and none
+    # when in double check
+    check_mask: int
+    # The bitboard of the pieces pinned to the king
+    pinned: int
+    # The squares each pinned piece can move to, by square index: the squares
+    # between the king and the pinning piece, and the pinning piece
+    pin_rays: dict[int, int]
+
+
+def generate_legal_moves(gameboard: Gameboard, color: str) -> list[int]:
+    """Generate every legal move for a player.
+
+    Args:
+        gameboard: The Gameboard object.
+        color: The color of the player to generate the moves for.
+
+    Returns:
+        A list of the legal moves, encoded as in move.py. Moves that would
+        leave the player's king in check aren't included.
+    """
+    return list(_iter_legal_moves(
+        gameboard, color, generate_pseudo_legal_moves(gameboard, color)))
+
+
+def generate_legal_captures(gameboard: Gameboard, color: str) -> list[int]:
+    """Generate the legal captures and promotions for a player.
+
+    These are the moves that change the material balance, which is what a
+    quiescence search looks at.
+
+    Args:
+        gameboard: The Gameboard object.
+        color: The color of the player to generate the moves for.
+
+    Returns:
+        A list of the legal captures and promotions, encoded as in move.py.
+    """
+    board = gameboard.view()
+    color_index = ChessColor.ORDER.index(color)
+    enemy = board.get_occupancy(ChessColor.ORDER[1 - color_index])
+    pawns = board.get_bitboard(Piece.PAWN, color)
+    en_passant = board.en_passant
+
+    captures = []
+    for move in generate_pseudo_legal_moves(gameboard, color):
+        end = move >> 6 & 63
+        if (enemy >> end & 1 or move >> 12 or
+                (end == en_passant and pawns >> (move & 63) & 1)):
+            captures.append(move)
+
+    return list(_iter_legal_moves(gameboard, color, captures))
+
+
+def is_in_check(gameboard: Gameboard, color: str) -> bool:
+    """Check if a player's king is attacked.
+
+    Args:
+        gameboard: The Gameboard object.
+        color: The color of the player.
+
+    Returns:
+        A boolean indicating whether or not the player is in check. A player
+        without a king is never in check.
+    """
+    board = gameboard.view()
+    color_index = ChessColor.ORDER.index(color)
+    king = board.get_bitboard(Piece.KING, color)
+    if not king:
+        return False
+    return _is_attacked(
+        bitboard.lsb(king), color_index, board.get_occupancy(),
+        board.get_piece_bitboards(ChessColor.ORDER[1 - color_index]))
+
+
+def is_checkmate(gameboard: Gameboard, color: str) -> bool:
+    """Check if a player is in check and has no legal moves."""
+    return is_in_check(gameboard, color) and not has_legal_moves(gameboard,
+                                                                  color)
+
+
+def is_stalemate(gameboard: Gameboard, color: str) -> bool:
+    """Check if a player isn't in check but has no legal moves."""
+    return not is_in_check(gameboard, color) and not has_legal_moves(
+        gameboard, color)
+
+
+def has_legal_moves(gameboard: Gameboard, color: str) -> bool:
+    """Check if a player has any legal move, stopping at the first one."""
+    return any(True for _ in _iter_legal_moves(
+        gameboard, color, generate_pseudo_legal_moves(gameboard, color)))
+
+
+def attackers_of(gameboard: Gameboard, square: int, color: str) -> int:
+    """Find the pieces of a player that attack a square.
+
+    Args:
+        gameboard: The Gameboard object.
+        square: The index of the square.
+        color: The color of the attacking player.
+
+    Returns:
+        A bitboard of the attacking pieces.
+    """
+    board = gameboard.view()
+    color_index = ChessColor.ORDER.index(color)
+    return _attackers(square, 1 - color_index, board.get_occupancy(),
+                      board.get_piece_bitboards(color))
+
+
+def check_info(gameboard: Gameboard, color: str) -> CheckInfo:
+    """Find the checks and pins on a player's king.
+
+    Args:
+        gameboard: The Gameboard object.
+        color: The color of the player.
+
+    Returns:
+        The CheckInfo of the player.
+    """
+    board = gameboard.view()
+    color_index = ChessColor.ORDER.index(color)
+    king = board.get_bitboard(Piece.KING, color)
+    if not king:
+        return CheckInfo(None, 0, bitboard.FULL, 0, {})
+
+    king_square = bitboard.lsb(king)
+    enemy_color = ChessColor.ORDER[1 - color_index]
+    enemy_pieces = board.get_piece_bitboards(enemy_color)
+    own = board.get_occupancy(color)
+    occupied = board.get_occupancy()
+
+    checkers = _attackers(king_square, color_index, occupied, enemy_pieces)
+    if not checkers:
+        check_mask = bitboard.FULL
+    elif checkers & (checkers - 1):
+        check_mask = 0
+    else:
+        check_mask = checkers | BETWEEN[king_square << 6 |
+                                        bitboard.lsb(checkers)]
+
+    # The enemy sliders that would attack the king if there were only enemy
+    # pieces on the board, which pin an own piece if it's the only piece
+    # between them and the king
+    enemy = board.get_occupancy(enemy_color)
+    queens = enemy_pieces[_QUEEN]
+    snipers = (
+        (rook_attacks(king_square, enemy) & (enemy_pieces[_ROOK] | queens)) |
+        (bishop_attacks(king_square, enemy) &
+         (enemy_pieces[_BISHOP] | queens)))
+    pinned = 0
+    pin_rays = {}
+    for sniper in bitboard.iter_squares(snipers & ~checkers):
+        between = BETWEEN[king_square << 6 | sniper]
+        blockers = between & occupied
+        if blockers & own and not blockers & (blockers - 1):
+            pinned |= blockers
+            pin_rays[bitboard.lsb(blockers)] = between | 1 << sniper
+
+    return CheckInfo(king_square, checkers, check_mask, pinned, pin_rays)
+
+
+def leaves_king_safe(gameboard: Gameboard, color: str, move: int,
+                     info: CheckInfo | None = None) -> bool:
+    """Check if a move that follows the rules of movement of the pieces
+    doesn't leave the player's king in check.
+
+    Args:
+        gameboard: The Gameboard object.
+        color: The color of the player making the move.
+        move: The move, encoded as in move.py.
+        info: The CheckInfo of the player, if it's already known.
+
+    Returns:
+        A boolean indicating whether or not the move is legal.
+    """
+    if info is None:
+        info = check_info(gameboard, color)
+    king_square = info.king
+    if king_square is None:
+        return True
+
+    start, end = move_start(move), move_end(move)
+    board = gameboard.view()
+    color_index = ChessColor.ORDER.index(color)
+
+    if start == king_square:
+        # The king may not stay on a line attacked through its start square
+        occupied = board.get_occupancy() ^ (1 << start)
+        enemy_pieces = board.get_piece_bitboards(
+            ChessColor.ORDER[1 - color_index])
+        return not _is_attacked(end, color_index, occupied, enemy_pieces,
+                                ~(1 << end))
+
+    if (end == board.en_passant and start & 7 != end & 7 and
+            board.get_piece_index_at(start) % len(Piece.ORDER) == _PAWN):
+        # En passant removes two pieces from the rank of the king, so it's
+        # checked by taking away both
+        captured = 1 << ((start & 56) | (end & 7))
+        occupied = (board.get_occupancy() ^ (1 << start) ^ captured |
+                    1 << end)
+        enemy_pieces = board.get_piece_bitboards(
+            ChessColor.ORDER[1 - color_index])
+        return not _is_attacked(king_square, color_index, occupied,
+                                enemy_pieces, ~captured)
+
+    if not info.check_mask >> end & 1:
+        return False
+    return not info.pinned >> start & 1 or bool(info.pin_rays[start] >> end
+                                                & 1)
+
+
+def _iter_legal_moves(gameboard: Gameboard, color: str,
+                      moves: list[int]) -> Iterator[int]:
+    """Yield the moves that don't leave the player's king in check."""
+    info = check_info(gameboard, color)
+    if info.king is None:
+        yield from moves
+        return
+
+    king_square = info.king
+    check_mask = info.check_mask
+    pinned = info.pinned
+    en_passant = gameboard.en_passant
+    for move in moves:
+        start = move & 63
+        end = move >> 6 & 63
+        # Most moves are decided by the masks alone
+        if (start != king_square and end != en_passant and
+                not pinned >> start & 1):
+            if check_mask >> end & 1:
+                yield move
+        elif leaves_king_safe(gameboard, color, move, info):
+            yield move
+
+
+def generate_pseudo_legal_moves(gameboard: Gameboard, color: str) -> list[int]:
+    """Generate the moves for a player that follow the rules of movement of the
+    pieces, without checking whether they leave the player's king in check.
+
+    Args:
+        gameboard: The Gameboard object.
+        color: The color of the player to generate the moves for.
+
+    Returns:
+        A list of the moves, encoded as in move.py.
+    """
+    color_index = ChessColor.ORDER.index(color)
+    enemy_color = ChessColor.ORDER[1 - color_index]
+    board = gameboard.view()
+    own_pieces = board.get_piece_bitboards(color)
+    enemy_pieces = board.get_piece_bitboards(enemy_color)
+
+    own = board.get_occupancy(color)
+    enemy = board.get_occupancy(enemy_color)
+    occupied = own | enemy
+    targets = ~own
+
+    moves = []
+    _add_pawn_moves(moves, own_pieces[_PAWN], color_index, occupied, enemy,
+                    board.en_passant, enemy_pieces[_PAWN])
+
+    for start in bitboard.iter_squares(own_pieces[_KNIGHT]):
+        for end in bitboard.iter_squares(KNIGHT_ATTACKS[start] & targets):
+            moves.append(start | end << 6)
+
+    for start in bitboard.iter_squares(own_pieces[_BISHOP]):
+        for end in bitboard.iter_squares(bishop_attacks(start, occupied) &
+                                         targets):
+            moves.append(start | end << 6)
+
+    for start in bitboard.iter_squares(own_pieces[_ROOK]):
+        for end in bitboard.iter_squares(rook_attacks(start, occupied) &
+                                         targets):
+            moves.append(start | end << 6)
+
+    for start in bitboard.iter_squares(own_pieces[_QUEEN]):
+        attacks = (bishop_attacks(start, occupied) |
+                   rook_attacks(start, occupied))
+        for end in bitboard.iter_squares(attacks & targets):
+            moves.append(start | end << 6)
+
+    for start in bitboard.iter_squares(own_pieces[_KING]):
+        for end in bitboard.iter_squares(KING_ATTACKS[start] & targets):
+            moves.append(start | end << 6)
+
+    _add_castling_moves(moves, board.castling_rights, color_index,
+                        own_pieces[_KING], occupied, enemy_pieces)
+
+    return moves
+
+
+def _add_pawn_moves(moves: list[int], pawns: int, color_index: int,
+                    occupied: int, enemy: int, en_passant: int | None,
+                    enemy_pawns: int) -> None:
+    empty = ~occupied & bitboard.FULL
+
+    # Pushes are generated for all pawns at once by shifting the bitboard
+    if color_index == 0:
+        push = 8
+        single_pushes = (pawns << 8) & empty
+        double_pushes = ((single_pushes & _RANK_3) << 8) & empty
+        promotion_rank = bitboard.RANK_8
+    else:
+        push = -8
+        single_pushes = (pawns >> 8) & empty
+        double_pushes = ((single_pushes & _RANK_6) >> 8) & empty
+        promotion_rank = bitboard.RANK_1
+
+    for end in bitboard.iter_squares(single_pushes & ~promotion_rank):
+        moves.append((end - push) | end << 6)
+    for end in bitboard.iter_squares(single_pushes & promotion_rank):
+        _add_promotions(moves, end - push, end)
+    for end in bitboard.iter_squares(double_pushes):
+        moves.append((end - 2 * push) | end << 6)
+
+    pawn_attacks = PAWN_ATTACKS[color_index]
+    for start in bitboard.iter_squares(pawns):
+        for end in bitboard.iter_squares(pawn_attacks[start] & enemy):
+            if (1 << end) & promotion_rank:
+                _add_promotions(moves, start, end)
+            else:
+                moves.append(start | end << 6)
+
+    # The pawn captured en passant is behind the en passant square
+    if en_passant is not None and enemy_pawns >> (en_passant - push) & 1:
+        attackers = PAWN_ATTACKS[1 - color_index][en_passant] & pawns
+        for start in bitboard.iter_squares(attackers):
+            moves.append(start | en_passant << 6)
+
+
+def _add_promotions(moves: list[int], start: int, end: int) -> None:
+    for promotion in _PROMOTIONS:
+        moves.append(encode_move(start, end, promotion))
+
+
+def _add_castling_moves(moves: list[int], castling_rights: int,
+                        color_index: int, king: int, occupied: int,
+                        enemy_pieces: list[int]) -> None:
+    for right, path, king_path, king_end in _CASTLING_MOVES[color_index]:
+        if not castling_rights & right or occupied & path:
+            continue
+
+        # The king may not castle out of or through check. Castling into
+        # check is caught by the legality check of the end square.
+        if any(_is_attacked(square, color_index, occupied, enemy_pieces)
+               for square in king_path):
+            continue
+
+        moves.append(bitboard.lsb(king) | king_end << 6)
+
+
+def _attackers(square: int, color_index: int, occupied: int,
+               enemy_pieces: list[int]) -> int:
+    """Get the bitboard of the enemy pieces that attack a square.
+
+    Args:
+        square: The index of the square.
+        color_index: The ChessColor.ORDER index of the defending player.
+        occupied: The bitboard of the occupied squares.
+        enemy_pieces: The bitboards of the enemy pieces in Piece.ORDER.
+    """
+    queens = enemy_pieces[_QUEEN]
+    return (
+        PAWN_ATTACKS[color_index][square] & enemy_pieces[_PAWN] |
+        KNIGHT_ATTACKS[square] & enemy_pieces[_KNIGHT] |
+        bishop_attacks(square, occupied) & (enemy_pieces[_BISHOP] | queens) |
+        rook_attacks(square, occupied) & (enemy_pieces[_ROOK] | queens) |
+        KING_ATTACKS[square] & enemy_pieces[_KING]
+    )
+
+
+def _is_attacked(square: int, color_index: int, occupied: int,
+                 enemy_pieces: list[int], mask: int = bitboard.FULL) -> bool:
+    """Check if a square is attacked by the enemy pieces.
+
+    Args:
+        square: The index of the square.
+        color_index: The ChessColor.ORDER index of the defending player.
+        occupied: The bitboard of the occupied squares.
+        enemy_pieces: The bitboards of the enemy pieces in Piece.ORDER.
+        mask: A bitboard the enemy pieces are restricted to, which is used to
+          leave out a captured piece.
+
+    Returns:
+        A boolean indicating whether or not the square is attacked.
+    """
+    queens = enemy_pieces[_QUEEN]
+    return bool(
+        PAWN_ATTACKS[color_index][square] & enemy_pieces[_PAWN] & mask or
+        KNIGHT_ATTACKS[square] & enemy_pieces[_KNIGHT] & mask or
+        bishop_attacks(square, occupied) &
+        (enemy_pieces[_BISHOP] | queens) & mask or
+        rook_attacks(square, occupied) & (enemy_pieces[_ROOK] | queens) & mask or
+        KING_ATTACKS[square] & enemy_pieces[_KING]
+    )
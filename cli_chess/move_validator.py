@@ -1,8 +1,12 @@
 # move_validator.py
 
+from . import bitboard
 from .gameboard import Gameboard
-from .piece import Piece
-from .square import Square
+from .move import encode_move
+from .move_generator import leaves_king_safe
+from .piece import ChessColor, Piece
+from .square import (DIAGONAL, FILE_DISTANCE, ORTHOGONAL, RANK_DISTANCE,
+                     SQUARE_INDICES, SQUARE_RANKS)
 
 
 def is_legal_move(start_coords: str, end_coords: str, player_color: str,
@@ -18,49 +22,74 @@ def is_legal_move(start_coords: str, end_coords: str, player_color: str,
         gameboard: The Gameboard object.
 
     Returns:
-        A boolean indicating whether or not the move is legal.
+        A boolean indicating whether or not the move is legal. Moves that
+        would leave the player's king in check aren't legal.
     """
 
-    # Check if the square coordinates are valid
-    if (not Square.is_valid_square(start_coords) or not
-            Square.is_valid_square(end_coords)):
+    # Check if the square coordinates are valid, and parse them once
+    start = SQUARE_INDICES.get(start_coords)
+    end = SQUARE_INDICES.get(end_coords)
+    if start is None or end is None:
         return False
 
+    return is_legal_move_by_index(start, end, player_color, gameboard)
+
+
+def is_legal_move_by_index(start: int, end: int, player_color: str,
+                           gameboard: Gameboard) -> bool:
+    """Check if moving a piece from one square to another is legal.
+
+    This is is_legal_move for square indices, which skips parsing the
+    coordinates.
+
+    Args:
+        start: The index of the square the piece is on before the move.
+        end: The index of the square the piece is on after the move.
+        player_color: The color of the player making the move.
+        gameboard: The Gameboard object.
+
+    Returns:
+        A boolean indicating whether or not the move is legal.
+    """
+
     # Check if there's a piece on the starting square, and if it belongs
     # to the player.
-    if not _is_allowed_start_square(start_coords, player_color, gameboard):
+    if not _is_allowed_start_square(start, player_color, gameboard):
         return False
 
     # Check if the user's allowed to occupy the end square.
-    if not _is_allowed_end_square(end_coords, player_color, gameboard):
+    if not _is_allowed_end_square(end, player_color, gameboard):
+        return False
+
+    piece = gameboard.view().get_piece_at(start)
+    if not _is_valid_piece_path(piece, start, end, gameboard):
         return False
 
-    piece = gameboard.get_square_piece(start_coords)
-    return _is_valid_piece_path(piece, start_coords, end_coords, gameboard)
+    # Check if the move leaves the player's king in check, using the checks and
+    # pins on the king rather than playing the move
+    return leaves_king_safe(gameboard, player_color, encode_move(start, end))
 
 
-def _is_allowed_start_square(start_coords: str, player_color: str,
+def _is_allowed_start_square(start: int, player_color: str,
                              gameboard: Gameboard) -> bool:
-    start_piece = gameboard.get_square_piece(start_coords)
+    start_piece = gameboard.view().get_piece_at(start)
     return start_piece and start_piece.color == player_color
 
 
-def _is_allowed_end_square(end_coords: str, player_color: str,
+def _is_allowed_end_square(end: int, player_color: str,
                            gameboard: Gameboard) -> bool:
-    end_piece = gameboard.get_square_piece(end_coords)
+    end_piece = gameboard.view().get_piece_at(end)
     return not end_piece or end_piece.color != player_color
 
 
-def _is_valid_piece_path(piece: Piece, start_coords: str, end_coords: str,
+def _is_valid_piece_path(piece: Piece, start: int, end: int,
                          gameboard: Gameboard) -> bool:
-    """Check if the piece can move along the path specified by the coordinates.
+    """Check if the piece can move along the path between the squares.
 
     Args:
         piece: A Piece object for the given piece.
-        start_coords: The coordinates of the square the piece is on before the
-          move.
-        end_coords: The coordinates of the square the piece is on after the 
-          move.
+        start: The index of the square the piece is on before the move.
+        end: The index of the square the piece is on after the move.
         gameboard: The Gameboard object.
 
     Returns:
@@ -68,30 +97,52 @@ def _is_valid_piece_path(piece: Piece, start_coords: str, end_coords: str,
           specified path.
     """
     if piece.symbol == Piece.PAWN:
-        pass
+        return _is_valid_pawn_path(start, end, piece.color, gameboard)
 
     if piece.symbol == Piece.KNIGHT:
-        return _is_valid_knight_path(start_coords, end_coords)
+        return _is_valid_knight_path(start, end)
 
     if piece.symbol == Piece.BISHOP:
-        return _is_valid_bishop_path(start_coords, end_coords, gameboard)
+        return _is_valid_bishop_path(start, end, gameboard)
 
     if piece.symbol == Piece.ROOK:
-        return _is_valid_rook_path(start_coords, end_coords, gameboard)
+        return _is_valid_rook_path(start, end, gameboard)
 
     if piece.symbol == Piece.QUEEN:
-        return _is_valid_queen_path(start_coords, end_coords, gameboard)
+        return _is_valid_queen_path(start, end, gameboard)
 
     if piece.symbol == Piece.KING:
-        return _is_valid_king_path(start_coords, end_coords)
+        return _is_valid_king_path(start, end)
 
 
-def _is_valid_knight_path(start_coords: str, end_coords: str) -> bool:
-    file_start, rank_start = start_coords
-    file_end, rank_end = end_coords
+def _is_valid_pawn_path(start: int, end: int, pawn_color: str,
+                        gameboard: Gameboard) -> bool:
+    # Pawns only move forward, i.e. towards the opponent's side of the board
+    rank_step = SQUARE_RANKS[end] - SQUARE_RANKS[start]
+    if pawn_color == ChessColor.BLACK:
+        rank_step = -rank_step
+    file_dist = FILE_DISTANCE[start << 6 | end]
+    end_piece = gameboard.view().get_piece_index_at(end)
+
+    # A pawn may push one square forward, or two from its starting rank, onto
+    # empty squares
+    if file_dist == 0:
+        starting_rank = 1 if pawn_color == ChessColor.WHITE else 6
+        return end_piece is None and (
+            rank_step == 1 or
+            (rank_step == 2 and SQUARE_RANKS[start] == starting_rank and
+             not _are_pieces_in_the_way(start, end, gameboard)))
+
+    # A pawn captures one square diagonally forward, possibly en passant
+    if file_dist == 1 and rank_step == 1:
+        return end_piece is not None or gameboard.en_passant == end
 
-    file_dist = _get_file_dist(file_start, file_end)
-    rank_dist = _get_rank_dist(rank_start, rank_end)
+    return False
+
+
+def _is_valid_knight_path(start: int, end: int) -> bool:
+    file_dist = FILE_DISTANCE[start << 6 | end]
+    rank_dist = RANK_DISTANCE[start << 6 | end]
 
     return (
         (file_dist == 1 and rank_dist == 2) or
@@ -99,35 +150,27 @@ def _is_valid_knight_path(start_coords: str, end_coords: str) -> bool:
     )
 
 
-def _is_valid_bishop_path(start_coords: str, end_coords: str,
-                          gameboard: Gameboard) -> bool:
-    return (_is_diagonal_move(start_coords, end_coords) and not
-            _are_pieces_in_the_way(start_coords, end_coords, gameboard))
+def _is_valid_bishop_path(start: int, end: int, gameboard: Gameboard) -> bool:
+    return (_is_diagonal_move(start, end) and not
+            _are_pieces_in_the_way(start, end, gameboard))
 
 
-def _is_valid_rook_path(start_coords: str, end_coords: str,
-                        gameboard: Gameboard) -> bool:
+def _is_valid_rook_path(start: int, end: int, gameboard: Gameboard) -> bool:
     return (
-        (_is_horizontal_move(start_coords, end_coords) or
-         _is_vertical_move(start_coords, end_coords)) and not
-        _are_pieces_in_the_way(start_coords, end_coords, gameboard))
+        (_is_horizontal_move(start, end) or
+         _is_vertical_move(start, end)) and not
+        _are_pieces_in_the_way(start, end, gameboard))
 
 
-def _is_valid_queen_path(start_coords: str, end_coords: str,
-                         gameboard: Gameboard) -> bool:
+def _is_valid_queen_path(start: int, end: int, gameboard: Gameboard) -> bool:
     return (
-        (_is_horizontal_move(start_coords, end_coords) or
-         _is_vertical_move(start_coords, end_coords) or
-         _is_diagonal_move(start_coords, end_coords)) and not
-        _are_pieces_in_the_way(start_coords, end_coords, gameboard))
+        (ORTHOGONAL[start << 6 | end] or DIAGONAL[start << 6 | end]) and not
+        _are_pieces_in_the_way(start, end, gameboard))
 
 
-def _is_valid_king_path(start_coords: str, end_coords: str) -> bool:
-    file_start, rank_start = start_coords
-    file_end, rank_end = end_coords
-
-    file_dist = _get_file_dist(file_start, file_end)
-    rank_dist = _get_rank_dist(rank_start, rank_end)
+def _is_valid_king_path(start: int, end: int) -> bool:
+    file_dist = FILE_DISTANCE[start << 6 | end]
+    rank_dist = RANK_DISTANCE[start << 6 | end]
 
     # The king may move one square horizontally, vertically or diagonally
     return (
@@ -137,75 +180,22 @@ def _is_valid_king_path(start_coords: str, end_coords: str) -> bool:
     )
 
 
-def _get_file_dist(file1: str, file2: str) -> int:
-    # Use the ASCII character codes of the file letters
-    return abs(ord(file1) - ord(file2))
-
-
-def _get_rank_dist(rank1: str, rank2: str) -> int:
-    return abs(int(rank1) - int(rank2))
-
+def _is_horizontal_move(start: int, end: int) -> bool:
+    pair = start << 6 | end
+    return ORTHOGONAL[pair] and RANK_DISTANCE[pair] == 0
 
-def _is_horizontal_move(start_coords: str, end_coords: str) -> bool:
-    file_start, rank_start = start_coords
-    file_end, rank_end = end_coords
-    return file_start != file_end and rank_start == rank_end
 
+def _is_vertical_move(start: int, end: int) -> bool:
+    pair = start << 6 | end
+    return ORTHOGONAL[pair] and FILE_DISTANCE[pair] == 0
 
-def _is_vertical_move(start_coords: str, end_coords: str) -> bool:
-    file_start, rank_start = start_coords
-    file_end, rank_end = end_coords
-    return file_start == file_end and rank_start != rank_end
 
+def _is_diagonal_move(start: int, end: int) -> bool:
+    return DIAGONAL[start << 6 | end]
 
-def _is_diagonal_move(start_coords: str, end_coords: str) -> bool:
-    file_start, rank_start = start_coords
-    file_end, rank_end = end_coords
 
-    file_dist = _get_file_dist(file_start, file_end)
-    rank_dist = _get_rank_dist(rank_start, rank_end)
-    return file_dist == rank_dist and start_coords != end_coords
-
-
-def _are_pieces_in_the_way(start_coords: str, end_coords: str,
+def _are_pieces_in_the_way(start: int, end: int,
                            gameboard: Gameboard) -> bool:
-    board = gameboard.get_board()
-
-    # Extract the files and ranks
-    file_start, rank_start = start_coords
-    file_end, rank_end = end_coords
-
-    # Convert the files and ranks to rows and columns in the board array
-    col_start = Gameboard.file_to_col(file_start)
-    col_end = Gameboard.file_to_col(file_end)
-
-    row_start = Gameboard.rank_to_row(rank_start)
-    row_end = Gameboard.rank_to_row(rank_end)
-
-    # Check if there are pieces in the way on the same rank
-    if _is_horizontal_move(start_coords, end_coords):
-        start, end = sorted((col_start, col_end))
-        for col in range(start + 1, end):
-            if board[row_start][col]:
-                return True
-
-    # Check if there are pieces in the way on the same file
-    elif _is_vertical_move(start_coords, end_coords):
-        start, end = sorted((row_start, row_end))
-        for row in range(start + 1, end):
-            if board[row][col_start]:
-                return True
-
-    # Check if there are pieces in the way diagonally
-    elif _is_diagonal_move(start_coords, end_coords):
-        row_step = 1 if row_start < row_end else -1
-        col_step = 1 if col_start < col_end else -1
-
-        row, col = row_start + row_step, col_start + col_step
-        while col != col_end and row != row_end:
-            if board[row][col]:
-                return True
-            row += row_step
-            col += col_step
-
-    return False
+    # The squares between the start and end squares, if they're on a shared
+    # rank, file or diagonal
+    return bool(bitboard.ray_between(start, end) & gameboard.get_occupancy())
@@ -0,0 +1,238 @@
+# parallel_search.py
+
+import multiprocessing
+import os
+import pickle
+from multiprocessing.connection import Connection, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, NamedTuple, Sequence
+
+from .engine import Engine, SearchResult
+from .gameboard import Gameboard
+from .transposition_table import TranspositionTable
+
+# The task that makes the helpers start a new game
+_NEW_GAME = 'new game'
+
+
+class _Helper(NamedTuple):
+    """A helper process, the queue of its tasks and the connection its
+    results are received on."""
+    process: multiprocessing.Process
+    task_queue: multiprocessing.Queue
+    results: Connection
+
+
+class _StopFlag:
+    """A flag that stops the searches of all the processes, used as the stop
+    event of their engines.
+
+    Unlike a multiprocessing.Event, it takes no lock, so a helper process that
+    dies while checking it can't leave it locked for the others.
+    """
+
+    def __init__(self) -> None:
+        self._value = multiprocessing.RawValue('b', 0)
+
+    def is_set(self) -> bool:
+        return bool(self._value.value)
+
+    def set(self) -> None:
+        self._value.value = 1
+
+    def clear(self) -> None:
+        self._value.value = 0
+
+
+class ParallelEngine:
+    """A chess engine that searches with several processes (Lazy SMP).
+
+    The main search runs in the calling process, and helper processes search
+    the same position at the same time. All searches share one transposition
+    table in shared memory, so the helpers fill it with results that the
+    main search picks up, which lets it search deeper. The helpers start at
+    different depths so that they don't all search the same nodes.
+
+    The engine keeps its helper processes between searches, so it should be
+    closed when it's no longer needed, e.g. by using it as a context manager.
+    A helper process that dies, e.g. when it runs out of memory or is
+    killed, is dropped, and the engine goes on searching without it.
+    """
+
+    def __init__(self, workers: int | None = None,
+                 hash_mb: float = 16) -> None:
+        """Initialize the engine and start its helper processes.
+
+        Args:
+            workers: The total number of searching processes, including the
+              calling process. Defaults to the number of CPUs.
+            hash_mb: The memory budget of the shared transposition table in
+              megabytes.
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._hash_mb = hash_mb
+        self._shared_memory = SharedMemory(
+            create=True, size=TranspositionTable.table_bytes(hash_mb))
+        self.transposition_table = TranspositionTable(
+            hash_mb, self._shared_memory.buf)
+
+        self._stop_event = _StopFlag()
+        self._engine = Engine(transposition_table=self.transposition_table,
+                              stop_event=self._stop_event)
+        # Each helper has its own queues, so that one that dies can't take
+        # down the others, e.g. by holding the lock of a shared queue
+        self._helpers: dict[int, _Helper] = {}
+        for helper_id in range(1, self.workers):
+            task_queue = multiprocessing.Queue()
+            results, helper_results = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_run_helper,
+                args=(helper_id, self._shared_memory.name, hash_mb, task_queue,
+                      helper_results, self._stop_event),
+                daemon=True)
+            process.start()
+            # Only the helper writes to the pipe, so that reading it ends
+            # when the helper dies
+            helper_results.close()
+            self._helpers[helper_id] = _Helper(process, task_queue, results)
+
+    def __enter__(self) -> 'ParallelEngine':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def new_game(self) -> None:
+        """Forget everything learned from previous searches, in every
+        process."""
+        # The helpers reset their engines, including the age their view of
+        # the shared table stamps entries with, and the main engine then
+        # clears the table, so the processes start the next search in step
+        self._send(_NEW_GAME)
+        self._gather()
+        self._engine.new_game()
+
+    def stop(self) -> None:
+        """Stop the current search as soon as possible, see Engine.stop."""
+        self._stop_event.set()
+
+    def search(self, gameboard: Gameboard, depth: int | None = None,
+               time_limit: float | None = None,
+               node_limit: int | None = None,
+               on_iteration: Callable[[SearchResult], None] | None = None,
+               history: Sequence[int] = ()) -> SearchResult:
+        """Search for the best move for the player to move.
+
+        The arguments are the same as for Engine.search. The node limit
+        applies to each process separately.
+
+        Returns:
+            The result of the process that completed the deepest iteration,
+            with the nodes searched by all processes.
+        """
+        self._stop_event.clear()
+        # Queues pickle their items in a background thread, so the position
+        # is pickled up front, before the main search starts making moves
+        self._send(pickle.dumps((gameboard, depth, time_limit, node_limit,
+                                 list(history))))
+
+        result = self._engine.search(gameboard, depth, time_limit, node_limit,
+                                     on_iteration, history=history)
+
+        # The helpers stop when the main search is done
+        self._stop_event.set()
+        best_result = result
+        nodes = result.nodes
+        for helper_result in self._gather():
+            nodes += helper_result.nodes
+            if (helper_result.depth > best_result.depth and
+                    helper_result.best_move):
+                best_result = helper_result
+
+        return best_result._replace(nodes=nodes, seconds=result.seconds)
+
+    def close(self) -> None:
+        """Stop the helper processes and free the shared memory."""
+        if self._shared_memory is None:
+            return
+
+        self._stop_event.set()
+        for helper in self._helpers.values():
+            helper.task_queue.put(None)
+        for helper in self._helpers.values():
+            helper.process.join()
+            helper.results.close()
+
+        self.transposition_table.release()
+        self._shared_memory.close()
+        self._shared_memory.unlink()
+        self._shared_memory = None
+
+    def _send(self, task: bytes | str) -> None:
+        """Send a task to every helper, a pickled search or _NEW_GAME."""
+        for helper in self._helpers.values():
+            helper.task_queue.put(task)
+
+    def _gather(self) -> list[SearchResult | None]:
+        """Wait for the results of the helpers for the last task, which are
+        None for _NEW_GAME.
+
+        Helpers that die before they answer are dropped, so that the wait
+        doesn't go on forever.
+        """
+        results = []
+        waiting = dict(self._helpers)
+        while waiting:
+            wait([helper.results for helper in waiting.values()] +
+                 [helper.process.sentinel for helper in waiting.values()])
+            for helper_id, helper in list(waiting.items()):
+                if helper.results.poll():
+                    try:
+                        results.append(helper.results.recv())
+                    except (EOFError, OSError):
+                        # The helper died, and the pipe was closed
+                        self._drop_helper(helper_id)
+                    del waiting[helper_id]
+                elif not helper.process.is_alive():
+                    self._drop_helper(helper_id)
+                    del waiting[helper_id]
+        return results
+
+    def _drop_helper(self, helper_id: int) -> None:
+        """Forget a helper process that has died."""
+        helper = self._helpers.pop(helper_id)
+        # Tasks the helper didn't read are thrown away instead of blocking
+        # the exit of this process
+        helper.task_queue.cancel_join_thread()
+        helper.task_queue.close()
+        helper.results.close()
+        helper.process.join()
+        self.workers -= 1
+
+
+def _run_helper(helper_id: int, shared_memory_name: str, hash_mb: float,
+                task_queue: multiprocessing.Queue, results: Connection,
+                stop_event: _StopFlag) -> None:
+    """Run searches for a ParallelEngine in a helper process until a None
+    task is received."""
+    shared_memory = SharedMemory(shared_memory_name)
+    table = TranspositionTable(hash_mb, shared_memory.buf)
+    engine = Engine(transposition_table=table, stop_event=stop_event)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        if task == _NEW_GAME:
+            engine.new_game()
+            results.send(None)
+            continue
+
+        gameboard, depth, time_limit, node_limit, history = pickle.loads(task)
+        # Half of the helpers skip ahead by one ply
+        result = engine.search(gameboard, depth, time_limit, node_limit,
+                               first_depth=1 + helper_id % 2, history=history)
+        results.send(result)
+
+    table.release()
+    shared_memory.close()
@@ -0,0 +1,144 @@
+# perft.py
+
+import time
+from typing import Iterable, List, NamedTuple
+
+from .gameboard import Gameboard
+from .move import move_to_uci
+from .move_generator import generate_legal_moves
+
+
+class PerftPosition(NamedTuple):
+    """A reference position with its known perft node counts."""
+    fen: str
+    # The node counts for depth 1, 2, ...
+    node_counts: tuple[int, ...]
+
+    def create_gameboard(self) -> Gameboard:
+        """Create a Gameboard object set up with the position."""
+        return Gameboard.from_fen(self.fen)
+
+
+class PerftResult(NamedTuple):
+    """The result of running perft on a reference position."""
+    position_name: str
+    depth: int
+    nodes: int
+    expected_nodes: int | None
+    seconds: float
+
+    @property
+    def passed(self) -> bool:
+        """Whether the node count matches the known node count, if any."""
+        return self.expected_nodes is None or self.nodes == self.expected_nodes
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else float('inf')
+
+
+# The standard perft test positions from the Chess Programming Wiki
+REFERENCE_POSITIONS = {
+    # The starting position
+    'startpos': PerftPosition(
+        'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+        (20, 400, 8902, 197281, 4865609, 119060324)),
+    # Kiwipete, which is rich in castling, en passant and promotion edge cases
+    'kiwipete': PerftPosition(
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        (48, 2039, 97862, 4085603, 193690690)),
+    # An endgame with en passant discovered checks
+    'position3': PerftPosition(
+        '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        (14, 191, 2812, 43238, 674624, 11030083)),
+    # A position with promotions and castling rights for black only
+    'position4': PerftPosition(
+        'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+        (6, 264, 9467, 422333, 15833292)),
+    # A position with a promotion by capture
+    'position5': PerftPosition(
+        'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+        (44, 1486, 62379, 2103487, 89941194)),
+    # A quiet middlegame position
+    'position6': PerftPosition(
+        'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 '
+        '10',
+        (46, 2079, 89890, 3894594, 164075551)),
+}
+
+
+def perft(gameboard: Gameboard, depth: int) -> int:
+    """Count the leaf nodes of the legal move tree up to a given depth.
+
+    Args:
+        gameboard: The Gameboard object, which is left unchanged.
+        depth: The number of moves to look ahead.
+
+    Returns:
+        The number of positions reachable in exactly that many moves.
+    """
+    if depth <= 0:
+        return 1
+
+    moves = generate_legal_moves(gameboard, gameboard.turn)
+    # The leaves don't need to be played, only counted
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        gameboard.make_move(move)
+        nodes += perft(gameboard, depth - 1)
+        gameboard.unmake_move()
+    return nodes
+
+
+def perft_divide(gameboard: Gameboard, depth: int) -> dict[str, int]:
+    """Count the perft leaf nodes under each legal move of a position.
+
+    This is used to track down move generation bugs by comparing the counts
+    against a reference move generator.
+
+    Args:
+        gameboard: The Gameboard object, which is left unchanged.
+        depth: The number of moves to look ahead, including the first move.
+
+    Returns:
+        The node counts keyed by the moves in coordinate notation.
+    """
+    divide = {}
+    for move in generate_legal_moves(gameboard, gameboard.turn):
+        gameboard.make_move(move)
+        divide[move_to_uci(move)] = perft(gameboard, depth - 1)
+        gameboard.unmake_move()
+    return divide
+
+
+def run_benchmark(position_names: Iterable[str],
+                  depth: int) -> List[PerftResult]:
+    """Run perft on reference positions and time it.
+
+    Args:
+        position_names: The names of the positions in REFERENCE_POSITIONS.
+        depth: The depth to run perft to.
+
+    Returns:
+        The result for each position.
+
+    Raises:
+        KeyError: If a position name is unknown.
+    """
+    results = []
+    for position_name in position_names:
+        position = REFERENCE_POSITIONS[position_name]
+        gameboard = position.create_gameboard()
+
+        start_time = time.perf_counter()
+        nodes = perft(gameboard, depth)
+        seconds = time.perf_counter() - start_time
+
+        expected_nodes = (position.node_counts[depth - 1]
+                          if 0 < depth <= len(position.node_counts) else None)
+        results.append(PerftResult(position_name, depth, nodes,
+                                   expected_nodes, seconds))
+    return results
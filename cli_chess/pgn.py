@@ -0,0 +1,425 @@
+# pgn.py
+
+import contextlib
+import mmap
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, NamedTuple, TextIO, TypeVar
+
+from .error import InvalidFenError, InvalidPgnError
+from .gameboard import Gameboard
+from .piece import ChessColor
+from .process_pool import map_bounded
+from .san import move_from_san, move_to_san
+
+# Portable Game Notation (PGN) files consist of games that each start with tag
+# pairs, one per line, e.g. [White "Carlsen, Magnus"], followed by the moves in
+# SAN (see san.py) and the result, e.g.
+#   [Event "Casual game"]
+#   [Result "1-0"]
+#
+#   1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+# The tags that every game should have, in the order they're written in
+SEVEN_TAG_ROSTER = ('Event', 'Site', 'Date', 'Round', 'White', 'Black',
+                    'Result')
+
+# Files are split into byte ranges of about this size for a process pool
+DEFAULT_CHUNK_BYTES = 1 << 22
+
+_Result = TypeVar('_Result')
+
+
+class PgnGame(NamedTuple):
+    """A game read from or to be written to a PGN file."""
+    # The tag pairs, in the order they're written in
+    headers: dict[str, str]
+    # The moves, encoded as in move.py
+    moves: list[int]
+    result: str = '*'
+
+    def create_gameboard(self) -> Gameboard:
+        """Create a Gameboard object set up with the starting position of the
+        game, which is given by the FEN tag if there is one.
+
+        Raises:
+            InvalidFenError: If the FEN tag is malformed.
+        """
+        fen = self.headers.get('FEN')
+        return Gameboard.from_fen(fen) if fen else Gameboard()
+
+    def replay(self) -> Iterator[Gameboard]:
+        """Play through the game.
+
+        Yields:
+            The same Gameboard object after each move, starting with the
+            starting position, so it must not be kept between positions.
+        """
+        gameboard = self.create_gameboard()
+        yield gameboard
+        for move in self.moves:
+            gameboard.make_move(move)
+            yield gameboard
+
+
+def read_games(path: str | os.PathLike, start: int = 0,
+               end: int | None = None,
+               skip_invalid: bool = False) -> Iterator[PgnGame]:
+    """Read the games in a PGN file one at a time.
+
+    The file is memory-mapped and only the game being parsed is held in
+    memory, so files of any size can be read.
+
+    Args:
+        path: The path of the PGN file.
+        start: The offset in bytes to start reading at, which must be the start
+          of a game or of whitespace before one, e.g. from split_file.
+        end: If given, the games that start at or after this offset in bytes
+          aren't read.
+        skip_invalid: Whether to skip games with illegal moves or malformed
+          tag pairs or movetext instead of raising an exception.
+
+    Yields:
+        The games in the order they're in the file.
+
+    Raises:
+        InvalidPgnError: If a game is invalid and skip_invalid isn't set.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset, headers, movetext, tag_error in _iter_game_texts(
+                    data, start, end):
+                try:
+                    if tag_error is not None:
+                        raise InvalidPgnError(tag_error)
+                    yield parse_game(headers, movetext)
+                except InvalidPgnError as error:
+                    if not skip_invalid:
+                        raise InvalidPgnError(
+                            f'game at byte {offset} of {path}: {error}'
+                        ) from None
+
+
+def read_positions(path: str | os.PathLike) -> Iterator[Gameboard]:
+    """Read the positions in a file of FEN or EPD lines one at a time.
+
+    Empty lines, comments starting with '#' and EPD operations are ignored.
+
+    Yields:
+        A new Gameboard object for each position.
+
+    Raises:
+        InvalidFenError: If a position is invalid.
+    """
+    with open(path) as file:
+        for line in file:
+            fields = line.split(';')[0].split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            # EPD lines have four fields, followed by operations
+            if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+                fields = fields[:6]
+            else:
+                fields = fields[:4]
+            yield Gameboard.from_fen(' '.join(fields))
+
+
+def parse_game(headers: dict[str, str], movetext: str) -> PgnGame:
+    """Decode the movetext of a game by playing its moves on a board.
+
+    Args:
+        headers: The tag pairs of the game.
+        movetext: The moves and result of the game in PGN, which may include
+          move numbers, comments, variations and annotations.
+
+    Returns:
+        The game, with its result taken from the movetext or else the Result
+        tag.
+
+    Raises:
+        InvalidPgnError: If the FEN tag or the movetext is malformed, or a move
+          is illegal.
+    """
+    try:
+        gameboard = PgnGame(headers, []).create_gameboard()
+    except (InvalidFenError, ValueError) as error:
+        raise InvalidPgnError(str(error)) from None
+
+    moves = []
+    result = headers.get('Result', '*')
+    variation_depth = 0
+    for match in _MOVETEXT_TOKEN.finditer(movetext):
+        kind = match.lastgroup
+        if kind == 'open':
+            variation_depth += 1
+        elif kind == 'close':
+            variation_depth -= 1
+            if variation_depth < 0:
+                raise InvalidPgnError("unmatched ')'")
+        elif variation_depth or kind not in ('move', 'castling', 'result'):
+            # Comments, variations, annotations and move numbers are skipped
+            continue
+        elif kind == 'result':
+            result = match.group()
+        else:
+            try:
+                move = move_from_san(gameboard, match.group())
+            except ValueError as error:
+                raise InvalidPgnError(
+                    f'move {len(moves) // 2 + 1}: {error}') from None
+            gameboard.make_move(move)
+            moves.append(move)
+
+    if variation_depth:
+        raise InvalidPgnError("unmatched '('")
+    return PgnGame(headers, moves, result)
+
+
+def format_game(game: PgnGame, line_length: int = 80) -> str:
+    """Format a game in PGN.
+
+    The seven tag roster is written first, with '?' for missing tags, and the
+    Result tag is set to the result of the game.
+
+    Args:
+        game: The game, whose moves must be legal.
+        line_length: The maximum length of the lines of the movetext.
+
+    Returns:
+        The game in PGN, ending with an empty line.
+    """
+    headers = {tag: '?' for tag in SEVEN_TAG_ROSTER}
+    headers.update(game.headers)
+    headers['Result'] = game.result
+    lines = [f'[{tag} "{_escape(value)}"]' for tag, value in headers.items()]
+    lines.append('')
+
+    gameboard = game.create_gameboard()
+    tokens = []
+    for ply, move in enumerate(game.moves):
+        if gameboard.turn == ChessColor.WHITE or ply == 0:
+            dots = '.' if gameboard.turn == ChessColor.WHITE else '...'
+            tokens.append(f'{gameboard.fullmove_number}{dots}')
+        tokens.append(move_to_san(gameboard, move))
+        gameboard.make_move(move)
+    tokens.append(game.result)
+
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > line_length:
+            lines.append(line)
+            line = token
+        else:
+            line = f'{line} {token}' if line else token
+    lines.append(line)
+
+    return '\n'.join(lines) + '\n\n'
+
+
+def write_games(stream: TextIO, games: Iterable[PgnGame]) -> int:
+    """Write games to a text stream in PGN, one at a time.
+
+    Args:
+        stream: The text stream, e.g. a file opened for writing.
+        games: The games, which may be a generator, e.g. from read_games.
+
+    Returns:
+        The number of games written.
+    """
+    count = 0
+    for game in games:
+        stream.write(format_game(game))
+        count += 1
+    return count
+
+
+def split_file(path: str | os.PathLike,
+               chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> list[tuple[int, int]]:
+    """Split a PGN file into byte ranges that each hold whole games.
+
+    Args:
+        path: The path of the PGN file.
+        chunk_bytes: The approximate size of the ranges.
+
+    Returns:
+        The start and end offsets of the ranges, to pass to read_games.
+    """
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            boundaries = [0]
+            while boundaries[-1] + chunk_bytes < size:
+                boundary = _find_game_start(data, boundaries[-1] + chunk_bytes)
+                if boundary >= size:
+                    break
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def map_games(function: Callable[[PgnGame], _Result],
+              paths: Iterable[str | os.PathLike],
+              processes: int | None = None,
+              chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+              skip_invalid: bool = False,
+              executor: Executor | None = None) -> Iterator[_Result]:
+    """Apply a function to every game in PGN files with a process pool.
+
+    The files are split into byte ranges with split_file, and each worker
+    process reads whole ranges, so only the results are sent between
+    processes.
+
+    Args:
+        function: The function to call with each game. It must be picklable,
+          e.g. defined at the top level of a module.
+        paths: The paths of the PGN files.
+        processes: The number of worker processes. Defaults to the number of
+          CPUs.
+        chunk_bytes: The approximate size of the byte ranges.
+        skip_invalid: Whether to skip invalid games, see read_games.
+        executor: A pool of the given number of processes to use instead of
+          starting one, e.g. to share it with other work.
+
+    Yields:
+        The results of the function, in the order of the games in the files.
+
+    Raises:
+        InvalidPgnError: If a game is invalid and skip_invalid isn't set.
+    """
+    processes = processes or os.cpu_count() or 1
+    with contextlib.ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor(processes))
+        ranges = ((function, os.fspath(path), start, end, skip_invalid)
+                  for path in paths
+                  for start, end in split_file(path, chunk_bytes))
+        for results in map_bounded(executor, _map_range, ranges,
+                                   2 * processes):
+            yield from results
+
+
+def _map_range(function: Callable[[PgnGame], _Result], path: str,
+               start: int, end: int, skip_invalid: bool) -> list[_Result]:
+    """Apply a function to the games in a byte range of a PGN file, in a
+    worker process of map_games."""
+    return [function(game)
+            for game in read_games(path, start, end, skip_invalid)]
+
+
+def _iter_game_texts(data: mmap.mmap, start: int, end: int | None
+                     ) -> Iterator[tuple[int, dict, str, str | None]]:
+    """Split memory-mapped PGN data into games.
+
+    Yields:
+        The offset, tag pairs and movetext of each game that starts in the byte
+        range, and the error message of its first malformed tag pair, or None
+        if it has none. Games with malformed tag pairs are yielded like the
+        others, so that they can be skipped.
+    """
+    data.seek(start)
+    game_offset = None
+    headers = {}
+    movetext = []
+    error = None
+
+    while True:
+        line_offset = data.tell()
+        line = data.readline()
+        stripped = line.strip()
+        # A tag pair after movetext starts the next game
+        is_tag = stripped.startswith(b'[')
+        if not line or (is_tag and movetext):
+            if game_offset is not None:
+                yield game_offset, headers, '\n'.join(movetext), error
+            if not line or (end is not None and line_offset >= end):
+                return
+            game_offset = None
+            headers = {}
+            movetext = []
+            error = None
+
+        if not stripped or stripped.startswith(b'%'):
+            # Blank lines and escaped lines are ignored
+            continue
+        if game_offset is None:
+            if end is not None and line_offset >= end:
+                return
+            game_offset = line_offset
+
+        text = stripped.decode('utf-8', 'replace')
+        if is_tag and not movetext:
+            match = _TAG_PAIR.fullmatch(text)
+            if match is None:
+                if error is None:
+                    error = f'malformed tag pair at byte {line_offset}: {text}'
+            else:
+                headers[match.group(1)] = _unescape(match.group(2))
+        else:
+            movetext.append(text)
+
+
+def _find_game_start(data: mmap.mmap, offset: int) -> int:
+    """Find the offset of the first game that starts at or after an offset,
+    or the size of the data if there is none.
+
+    A game starts with the first tag pair after movetext, as in
+    _iter_game_texts.
+    """
+    # Start at the beginning of the line the offset is in, and find out if
+    # the last non-blank line before it is movetext
+    line_start = data.rfind(b'\n', 0, offset) + 1
+    previous_end = line_start
+    after_movetext = False
+    while previous_end > 0:
+        previous_start = data.rfind(b'\n', 0, previous_end - 1) + 1
+        previous_line = data[previous_start:previous_end].strip()
+        if previous_line:
+            after_movetext = not previous_line.startswith((b'[', b'%'))
+            break
+        previous_end = previous_start
+    data.seek(line_start)
+
+    while True:
+        line_offset = data.tell()
+        line = data.readline()
+        if not line:
+            return line_offset
+        stripped = line.strip()
+        if stripped.startswith(b'['):
+            if after_movetext and line_offset >= offset:
+                return line_offset
+            after_movetext = False
+        elif stripped and not stripped.startswith(b'%'):
+            after_movetext = True
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r'\\(.)', r'\1', value)
+
+
+# A tag pair, e.g. [Event "Casual game"], with backslash escapes in the value
+_TAG_PAIR = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+
+# The tokens of movetext: comments, variation brackets, annotations (NAGs),
+# results, move numbers and moves
+_MOVETEXT_TOKEN = re.compile(r'''
+    (?P<comment>\{[^}]*\}?|;.*)        # In braces or to the end of the line
+  | (?P<open>\()                      # The start or end of a variation
+  | (?P<close>\))
+  | (?P<nag>\$\d+)                    # A numeric annotation glyph
+  | (?P<result>1-0|0-1|1/2-1/2|\*)
+  | (?P<castling>[O0]-[O0](?:-[O0])?[+#!?]*)  # Also written with zeros
+  | (?P<number>\d+\.*|\.+)            # A move number, e.g. '12.' or '12...'
+  | (?P<move>[^\s{};()$]+)
+''', re.VERBOSE)
@@ -4,6 +4,8 @@ class ChessColor:
     WHITE = 'w'
     BLACK = 'b'
     COLORS = {WHITE, BLACK}
+    # The colors in the order used to index per-color tables, e.g. bitboards
+    ORDER = (WHITE, BLACK)
 
 
 class Piece:
@@ -14,17 +16,83 @@ class Piece:
     KNIGHT = 'N'
     PAWN = 'P'
     PIECES = {KING, QUEEN, ROOK, BISHOP, KNIGHT, PAWN}
+    # The piece symbols in the order used to index per-piece tables, e.g.
+    # bitboards
+    ORDER = (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING)
 
-    def __init__(self, piece_repr: str) -> None:
-        """Initialize a Piece object from the string representation of a piece.
+    # Pieces are immutable, and there is exactly one Piece object per piece
+    # and color, which is shared by all boards
+    __slots__ = ('_symbol', '_color', '_index')
+
+    def __new__(cls, piece_repr: str) -> 'Piece':
+        """Get the Piece object with the given string representation.
 
         Args:
             piece_repr: A representation of a chess piece that consists of a
               character for the piece, an underscore separator, and a character
               for the color, e.g. 'K_w' for the white king.
+
+        Raises:
+            ValueError: If the representation isn't that of a piece.
+        """
+        piece = _PIECES_BY_REPR.get(piece_repr)
+        if piece is None:
+            raise ValueError(f"invalid piece: '{piece_repr}'")
+        return piece
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError('Piece objects are immutable')
+
+    def __copy__(self) -> 'Piece':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'Piece':
+        return self
+
+    def __reduce__(self) -> tuple:
+        # Unpickling looks up the shared object instead of creating a new one
+        return Piece.from_index, (self._index,)
+
+    def __repr__(self) -> str:
+        return f"Piece('{self._symbol}_{self._color}')"
+
+    @property
+    def symbol(self) -> str:
+        """The symbol of the piece, e.g. 'K'."""
+        return self._symbol
+
+    @property
+    def color(self) -> str:
+        """The color of the piece, e.g. 'w'."""
+        return self._color
+
+    @property
+    def index(self) -> int:
+        """The index of the piece in per-piece tables, from 0 to 11.
+
+        White pieces come first, and within a color the pieces are ordered as
+        in Piece.ORDER, e.g. the white pawn has index 0 and the black king has
+        index 11.
         """
-        self.symbol = Piece.extract_symbol_from_repr(piece_repr)
-        self.color = Piece.extract_color_from_repr(piece_repr)
+        return self._index
+
+    @staticmethod
+    def to_index(symbol: str, color: str) -> int:
+        """Get the per-piece table index of the piece with the given symbol and
+        color."""
+        return (ChessColor.ORDER.index(color) * len(Piece.ORDER) +
+                Piece.ORDER.index(symbol))
+
+    @staticmethod
+    def from_index(index: int) -> 'Piece':
+        """Get the Piece object with the given per-piece table index."""
+        return _PIECES[index]
+
+    @staticmethod
+    def from_repr(piece_repr: str) -> 'Piece | None':
+        """Get the Piece object with the given string representation, or None
+        if it isn't that of a piece, e.g. for an empty square ('   ')."""
+        return _PIECES_BY_REPR.get(piece_repr)
 
     @staticmethod
     def extract_symbol_from_repr(piece_repr: str) -> str:
@@ -38,7 +106,8 @@ class Piece:
         Example:
             extract_symbol_from_piece('K_w') = 'K'
         """
-        return piece_repr[0]
+        piece = _PIECES_BY_REPR.get(piece_repr)
+        return piece._symbol if piece is not None else piece_repr[0]
 
     @staticmethod
     def extract_color_from_repr(piece_repr: str) -> str:
@@ -52,4 +121,21 @@ class Piece:
         Example:
             extract_symbol_from_piece('K_w') = 'w'
         """
-        return piece_repr[2]
+        piece = _PIECES_BY_REPR.get(piece_repr)
+        return piece._color if piece is not None else piece_repr[2]
+
+
+def _create_piece(index: int) -> Piece:
+    """Create the shared Piece object with the given per-piece table index."""
+    piece = object.__new__(Piece)
+    object.__setattr__(piece, '_symbol', Piece.ORDER[index % len(Piece.ORDER)])
+    object.__setattr__(piece, '_color',
+                       ChessColor.ORDER[index // len(Piece.ORDER)])
+    object.__setattr__(piece, '_index', index)
+    return piece
+
+
+# The shared Piece objects by per-piece table index and by representation
+_PIECES = tuple(_create_piece(index)
+                for index in range(len(ChessColor.ORDER) * len(Piece.ORDER)))
+_PIECES_BY_REPR = {f'{piece.symbol}_{piece.color}': piece for piece in _PIECES}
@@ -0,0 +1,60 @@
+# process_pool.py
+
+import collections
+import contextlib
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Callable, ContextManager, Iterable, Iterator, TypeVar
+
+_Result = TypeVar('_Result')
+
+
+def open_pool(processes: int | None = None
+              ) -> ContextManager[Executor | None]:
+    """Start a pool of worker processes, to share between the stages of a
+    job such as reading games and writing what's made of them, so the job
+    runs on the given number of processes rather than on that many per stage.
+
+    Args:
+        processes: The number of worker processes, or None for the number of
+          CPUs.
+
+    Returns:
+        A context manager that gives the pool and shuts it down on exit, or
+        gives None with a single process, when the job runs in the calling
+        process.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return contextlib.nullcontext()
+    return ProcessPoolExecutor(processes)
+
+
+def map_bounded(executor: Executor, function: Callable[..., _Result],
+                calls: Iterable[tuple], window: int) -> Iterator[_Result]:
+    """Call a function on an executor with each tuple of arguments, keeping
+    at most a given number of calls submitted ahead of the results consumed.
+
+    Unlike Executor.map, which reads all the arguments and submits every call
+    up front, this reads the arguments as calls are submitted, so neither
+    the arguments nor the results pile up in memory when they're produced or
+    consumed more slowly than the calls run.
+
+    Args:
+        executor: The executor, e.g. a process pool, which may be shared with
+          other work.
+        function: The function to call.
+        calls: The arguments of each call.
+        window: The number of calls submitted ahead, e.g. a couple per
+          process.
+
+    Yields:
+        The results of the calls, in order.
+    """
+    pending: collections.deque[Future[Any]] = collections.deque()
+    for arguments in calls:
+        pending.append(executor.submit(function, *arguments))
+        if len(pending) > window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,172 @@
+# renderer.py
+
+import sys
+from typing import TextIO
+
+from .board_info import BoardInfo
+from .gameboard import Gameboard
+from .piece import Piece
+
+# ANSI escape sequences, see ECMA-48
+_RESET = '\x1b[0m'
+_CLEAR_SCREEN = '\x1b[H\x1b[2J'
+_CLEAR_BELOW = '\x1b[J'
+
+
+def _move_cursor(line: int, column: int) -> str:
+    """Get the sequence that moves the cursor to a line and column, counted
+    from 1 at the top left of the screen."""
+    return f'\x1b[{line};{column}H'
+
+
+class BoardRenderer:
+    """Draws a board on a terminal, one buffered write per frame.
+
+    On an ANSI terminal the board is drawn at the top of the screen with
+    colored squares, and after the first frame only the squares that changed
+    are redrawn, by moving the cursor to them. Elsewhere, e.g. when the
+    output is a file, every frame is written in full as plain text, with the
+    squares of the last move in brackets.
+    """
+    # The background colors of the squares and the foreground colors of the
+    # pieces, as SGR parameters (256-color palette)
+    LIGHT_SQUARE = '48;5;180'
+    DARK_SQUARE = '48;5;137'
+    LIGHT_HIGHLIGHT = '48;5;186'
+    DARK_HIGHLIGHT = '48;5;143'
+    WHITE_PIECE = '1;38;5;231'
+    BLACK_PIECE = '1;38;5;16'
+
+    # The width of a square and of the rank labels in columns
+    SQUARE_WIDTH = 3
+    LABEL_WIDTH = 2
+    # The number of lines of a frame: the ranks and the file labels
+    HEIGHT = BoardInfo.LENGTH + 1
+
+    def __init__(self, stream: TextIO | None = None, flipped: bool = False,
+                 ansi: bool | None = None) -> None:
+        """Initialize a renderer.
+
+        Args:
+            stream: The stream to draw on. Defaults to sys.stdout.
+            flipped: Whether to draw the board as seen by the black player.
+            ansi: Whether to use ANSI colors and cursor moves. Defaults to
+              whether the stream is a terminal.
+        """
+        self.stream = stream if stream is not None else sys.stdout
+        self._flipped = flipped
+        self.ansi = self.stream.isatty() if ansi is None else ansi
+        # The squares of the last frame drawn, by position on the screen, or
+        # None if the next frame must be drawn in full
+        self._last_cells: list[str] | None = None
+
+    @property
+    def flipped(self) -> bool:
+        """Whether the board is drawn as seen by the black player."""
+        return self._flipped
+
+    @flipped.setter
+    def flipped(self, flipped: bool) -> None:
+        if flipped != self._flipped:
+            self._flipped = flipped
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Draw the next frame in full, e.g. after the screen was cleared."""
+        self._last_cells = None
+
+    def draw(self, gameboard: Gameboard, last_move: int | None = None) -> None:
+        """Draw the board, leaving the cursor on the line below it.
+
+        On an ANSI terminal, everything below the board is cleared, so that
+        messages printed after the previous frame don't pile up.
+
+        Args:
+            gameboard: The Gameboard object.
+            last_move: The last move, encoded as in move.py, whose squares
+              are highlighted.
+        """
+        cells = self._cells(gameboard, last_move)
+        if not self.ansi:
+            self.stream.write(self._frame(cells) + '\n')
+        elif self._last_cells is None:
+            self.stream.write(_CLEAR_SCREEN + self._frame(cells))
+        else:
+            buffer = []
+            for position, (cell, last_cell) in enumerate(
+                    zip(cells, self._last_cells)):
+                if cell != last_cell:
+                    row, col = divmod(position, BoardInfo.LENGTH)
+                    buffer.append(_move_cursor(
+                        row + 1,
+                        self.LABEL_WIDTH + col * self.SQUARE_WIDTH + 1))
+                    buffer.append(cell)
+            buffer.append(_move_cursor(self.HEIGHT + 1, 1) + _CLEAR_BELOW)
+            self.stream.write(''.join(buffer))
+
+        if self.ansi:
+            self._last_cells = cells
+        self.stream.flush()
+
+    def render(self, gameboard: Gameboard, last_move: int | None = None) -> str:
+        """Get a full frame of the board as a string, without cursor moves."""
+        return self._frame(self._cells(gameboard, last_move))
+
+    def _frame(self, cells: list[str]) -> str:
+        lines = []
+        for row in range(BoardInfo.LENGTH):
+            rank = self._square(row, 0) >> 3
+            lines.append(f'{rank + 1} '.ljust(self.LABEL_WIDTH) + ''.join(
+                cells[row * BoardInfo.LENGTH:(row + 1) * BoardInfo.LENGTH]))
+        files = [BoardInfo.FILE_LETTERS[self._square(0, col) & 7].lower()
+                 for col in range(BoardInfo.LENGTH)]
+        lines.append(' ' * self.LABEL_WIDTH + ''.join(
+            file.center(self.SQUARE_WIDTH) for file in files))
+        return '\n'.join(lines) + '\n'
+
+    def _cells(self, gameboard: Gameboard, last_move: int | None) -> list[str]:
+        """Get the text of each square, by position on the screen from the top
+        left."""
+        board = gameboard.view()
+        highlighted = ()
+        if last_move is not None:
+            highlighted = (last_move & 63, last_move >> 6 & 63)
+
+        cells = []
+        for row in range(BoardInfo.LENGTH):
+            for col in range(BoardInfo.LENGTH):
+                square = self._square(row, col)
+                piece_index = board.get_piece_index_at(square)
+                cells.append(self._cell(square, piece_index,
+                                        square in highlighted))
+        return cells
+
+    def _cell(self, square: int, piece_index: int | None,
+              highlighted: bool) -> str:
+        if piece_index is None:
+            symbol = ' '
+        else:
+            symbol = Piece.ORDER[piece_index % len(Piece.ORDER)]
+
+        if not self.ansi:
+            if piece_index is not None and piece_index >= len(Piece.ORDER):
+                symbol = symbol.lower()
+            elif piece_index is None:
+                symbol = '.'
+            return f'[{symbol}]' if highlighted else f' {symbol} '
+
+        is_light = (square >> 3 ^ square) & 1
+        if highlighted:
+            background = (self.LIGHT_HIGHLIGHT if is_light else
+                          self.DARK_HIGHLIGHT)
+        else:
+            background = self.LIGHT_SQUARE if is_light else self.DARK_SQUARE
+        foreground = (self.WHITE_PIECE if piece_index is None or
+                      piece_index < len(Piece.ORDER) else self.BLACK_PIECE)
+        return f'\x1b[{background};{foreground}m {symbol} {_RESET}'
+
+    def _square(self, row: int, col: int) -> int:
+        """Get the index of the square at a position on the screen."""
+        if self._flipped:
+            return row * BoardInfo.LENGTH + (BoardInfo.LENGTH - 1 - col)
+        return (BoardInfo.LENGTH - 1 - row) * BoardInfo.LENGTH + col
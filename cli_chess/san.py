@@ -0,0 +1,163 @@
+# san.py
+
+from .gameboard import Gameboard
+from .move import encode_move
+from .move_generator import generate_legal_moves, is_in_check
+from .piece import Piece
+from .square import SQUARE_FILES, SQUARE_INDICES, SQUARE_NAMES, SQUARE_RANKS
+
+# Standard Algebraic Notation (SAN) names a move by the moving piece and its
+# end square, e.g. 'Nf3', 'exd5', 'e8=Q' or 'O-O'. The starting square is only
+# given as far as needed to tell apart pieces of the same type that can move
+# to the same square, e.g. 'Nbd7' or 'R1e2'.
+
+_PAWN = Piece.ORDER.index(Piece.PAWN)
+_KING = Piece.ORDER.index(Piece.KING)
+
+# The characters that may follow a move: check and mate markers, and the
+# annotations '!' and '?'
+_SUFFIXES = '+#!?'
+
+_PROMOTION_SYMBOLS = Piece.ORDER[1:-1]
+
+
+def move_to_san(gameboard: Gameboard, move: int) -> str:
+    """Get the SAN of a legal move.
+
+    Args:
+        gameboard: The Gameboard object, in the position before the move. It's
+          left unchanged.
+        move: The legal move, encoded as in move.py.
+
+    Returns:
+        The move in SAN, including a '+' or '#' suffix for check and mate.
+    """
+    start = move & 63
+    end = move >> 6 & 63
+    promotion = move >> 12
+    board = gameboard.view()
+    piece_type = board.get_piece_index_at(start) % len(Piece.ORDER)
+
+    if piece_type == _KING and abs(end - start) == 2:
+        san = 'O-O' if end > start else 'O-O-O'
+    elif piece_type == _PAWN:
+        san = ''
+        if SQUARE_FILES[start] != SQUARE_FILES[end]:
+            san = f'{SQUARE_NAMES[start][0]}x'
+        san += SQUARE_NAMES[end]
+        if promotion:
+            san += f'={Piece.ORDER[promotion]}'
+    else:
+        san = Piece.ORDER[piece_type] + _disambiguation(gameboard, move)
+        if board.get_piece_index_at(end) is not None:
+            san += 'x'
+        san += SQUARE_NAMES[end]
+
+    gameboard.make_move(move)
+    if is_in_check(gameboard, gameboard.turn):
+        san += '#' if not generate_legal_moves(gameboard,
+                                               gameboard.turn) else '+'
+    gameboard.unmake_move()
+    return san
+
+
+def move_from_san(gameboard: Gameboard, san: str) -> int:
+    """Find the legal move with the given SAN.
+
+    Missing or superfluous check markers and annotations are ignored, and
+    castling may also be written with zeros, e.g. '0-0'.
+
+    Args:
+        gameboard: The Gameboard object, in the position before the move.
+        san: The move in SAN, e.g. 'Nf3'.
+
+    Returns:
+        The move, encoded as in move.py.
+
+    Raises:
+        ValueError: If the SAN is malformed, or doesn't match exactly one
+          legal move.
+    """
+    notation = san.rstrip(_SUFFIXES)
+    legal_moves = generate_legal_moves(gameboard, gameboard.turn)
+    board = gameboard.view()
+
+    if notation in ('O-O', 'O-O-O', '0-0', '0-0-0'):
+        king = board.get_bitboard(Piece.KING, gameboard.turn)
+        if not king:
+            raise ValueError(f"illegal move: '{san}'")
+        start = king.bit_length() - 1
+        end = start + 2 if len(notation) == 3 else start - 2
+        move = encode_move(start, end)
+        if move not in legal_moves:
+            raise ValueError(f"illegal move: '{san}'")
+        return move
+
+    # The promotion piece, which some writers give without the '='
+    promotion = 0
+    if notation[-1:] in _PROMOTION_SYMBOLS and notation[-2:-1].isdigit():
+        notation = f'{notation[:-1]}={notation[-1]}'
+    if len(notation) > 2 and notation[-2] == '=':
+        if notation[-1] not in _PROMOTION_SYMBOLS:
+            raise ValueError(f"invalid promotion piece: '{san}'")
+        promotion = Piece.ORDER.index(notation[-1])
+        notation = notation[:-2]
+
+    end = SQUARE_INDICES.get(notation[-2:])
+    if end is None or not notation[-2].islower():
+        raise ValueError(f"invalid move: '{san}'")
+    notation = notation[:-2].replace('x', '')
+
+    piece_type = _PAWN
+    if notation and notation[0] in Piece.PIECES:
+        piece_type = Piece.ORDER.index(notation[0])
+        notation = notation[1:]
+
+    # What is left is the file and/or rank of the starting square, if any
+    start_file = start_rank = None
+    for char in notation:
+        if 'a' <= char <= 'h' and start_file is None and start_rank is None:
+            start_file = ord(char) - ord('a')
+        elif '1' <= char <= '8' and start_rank is None:
+            start_rank = int(char) - 1
+        else:
+            raise ValueError(f"invalid move: '{san}'")
+
+    candidates = []
+    for move in legal_moves:
+        start = move & 63
+        if (move >> 6 & 63 != end or move >> 12 != promotion or
+                start_file not in (None, SQUARE_FILES[start]) or
+                start_rank not in (None, SQUARE_RANKS[start])):
+            continue
+        if board.get_piece_index_at(start) % len(Piece.ORDER) != piece_type:
+            continue
+        # Castling is only written as 'O-O' or 'O-O-O'
+        if piece_type == _KING and abs(end - start) == 2:
+            continue
+        candidates.append(move)
+
+    if len(candidates) != 1:
+        raise ValueError(f"{'ambiguous' if candidates else 'illegal'} move: "
+                         f"'{san}'")
+    return candidates[0]
+
+
+def _disambiguation(gameboard: Gameboard, move: int) -> str:
+    """Get the part of the starting square that a piece move needs in SAN."""
+    start = move & 63
+    end = move >> 6 & 63
+    board = gameboard.view()
+    piece_index = board.get_piece_index_at(start)
+
+    others = [other & 63 for other in generate_legal_moves(gameboard,
+                                                          gameboard.turn)
+              if other >> 6 & 63 == end and other & 63 != start and
+              board.get_piece_index_at(other & 63) == piece_index]
+    if not others:
+        return ''
+    if all(SQUARE_FILES[other] != SQUARE_FILES[start] for other in others):
+        return SQUARE_NAMES[start][0]
+    if all(SQUARE_RANKS[other] != SQUARE_RANKS[start] for other in others):
+        return SQUARE_NAMES[start][1]
+    return SQUARE_NAMES[start]
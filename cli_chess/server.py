@@ -0,0 +1,409 @@
+# server.py
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import deque
+from typing import Callable, NamedTuple
+
+from .error import InvalidFenError
+from .game_record import GameRecord
+from .gameboard import Gameboard
+from .move import move_from_uci, move_to_uci
+from .move_generator import generate_legal_moves, has_legal_moves, is_in_check
+from .move_validator import is_legal_move_by_index
+from .piece import ChessColor, Piece
+
+# The game server hosts many games in one process over a line-based text
+# protocol. Every line is a command or a message, with space-separated fields:
+#
+#   server: hello cli_chess
+#   client: new [<fen>]        server: game <id> <fen>
+#   client: join <id>          server: game <id> <fen>
+#   client: move <uci>         server, to every client of the game:
+#                                  moved <id> <uci> <fen>
+#                              and if the move ends the game:
+#                                  over <id> <result> <reason>
+#                              where the reason is checkmate, stalemate,
+#                              fifty-move rule or threefold repetition
+#   client: position           server: position <id> <fen>
+#   client: stats              server: stats <json>
+#   client: quit               (the server closes the connection)
+#
+# Invalid commands are answered with 'error <message>', and moves in a game
+# that's over with 'error game over'. A game lives as long
+# as a client is in it, and each game is a Gameboard and the set of its
+# clients, so idle games cost little more than their boards and compact move
+# records.
+
+GREETING = 'hello cli_chess'
+# The number of recent command latencies kept for the statistics
+LATENCY_WINDOW = 10000
+
+_PAWN = Piece.ORDER.index(Piece.PAWN)
+_QUEEN = Piece.ORDER.index(Piece.QUEEN)
+_KING = Piece.ORDER.index(Piece.KING)
+
+
+class ServerStats(NamedTuple):
+    """The throughput and latency figures of a server."""
+    connections: int
+    games: int
+    commands: int
+    moves: int
+    seconds: float
+    commands_per_second: float
+    # Percentiles of the time spent handling recent commands, in milliseconds
+    latency_p50: float
+    latency_p99: float
+    latency_max: float
+
+
+class _Game:
+    __slots__ = ('game_id', 'record', 'gameboard', 'clients', 'result')
+
+    def __init__(self, game_id: int, gameboard: Gameboard) -> None:
+        self.game_id = game_id
+        self.record = GameRecord(gameboard)
+        self.gameboard = gameboard
+        self.clients: set[asyncio.StreamWriter] = set()
+        # The result and the reason once the game is over
+        self.result: str | None = None
+
+
+class GameServer:
+    """A server that hosts games for many clients at once."""
+
+    def __init__(self) -> None:
+        self._games: dict[int, _Game] = {}
+        self._game_ids = itertools.count(1)
+        self._server: asyncio.AbstractServer | None = None
+        self._connections = 0
+        self._commands = 0
+        self._moves = 0
+        self._start_time = time.perf_counter()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self, host: str | None = '127.0.0.1', port: int = 0,
+                    unix_path: str | None = None) -> None:
+        """Start listening on a TCP port or a Unix socket.
+
+        Args:
+            host: The host to listen on.
+            port: The TCP port to listen on, or 0 for any free port.
+            unix_path: If given, the path of a Unix socket to listen on
+              instead of TCP.
+        """
+        # Servers with many idle clients mostly wait in reads, so the stream
+        # limit is kept small to keep the buffers of each connection small
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle_client, unix_path, limit=4096)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_client, host, port, limit=4096)
+        self._start_time = time.perf_counter()
+
+    @property
+    def address(self) -> tuple | str:
+        """The address the server listens on, e.g. ('127.0.0.1', 5000)."""
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening and close the connections of all games."""
+        self._server.close()
+        for game in list(self._games.values()):
+            for writer in list(game.clients):
+                writer.close()
+        await self._server.wait_closed()
+
+    def stats(self) -> ServerStats:
+        """Get the throughput and latency figures since the server started."""
+        seconds = time.perf_counter() - self._start_time
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1,
+                                 int(fraction * len(latencies)))] * 1000
+
+        return ServerStats(
+            self._connections, len(self._games), self._commands, self._moves,
+            seconds, self._commands / seconds if seconds else 0.0,
+            percentile(0.5), percentile(0.99),
+            latencies[-1] * 1000 if latencies else 0.0)
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        self._connections += 1
+        game = None
+        try:
+            writer.write(f'{GREETING}\n'.encode())
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                start_time = time.perf_counter()
+                tokens = line.decode(errors='replace').split()
+                if tokens == ['quit']:
+                    break
+                game = self._handle_command(tokens, game, writer)
+                self._commands += 1
+                self._latencies.append(time.perf_counter() - start_time)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections -= 1
+            if game is not None:
+                self._leave(game, writer)
+            writer.close()
+
+    def _handle_command(self, tokens: list[str], game: _Game | None,
+                        writer: asyncio.StreamWriter) -> _Game | None:
+        """Handle a command of a client.
+
+        Returns:
+            The game the client is in after the command.
+        """
+        command = tokens[0] if tokens else ''
+        if command == 'new':
+            try:
+                gameboard = (Gameboard.from_fen(' '.join(tokens[1:]))
+                             if len(tokens) > 1 else Gameboard())
+            except InvalidFenError as error:
+                _send(writer, f'error {error}')
+                return game
+            new_game = _Game(next(self._game_ids), gameboard)
+            self._games[new_game.game_id] = new_game
+            return self._join(new_game, game, writer)
+
+        if command == 'join':
+            try:
+                new_game = self._games[int(tokens[1])]
+            except (IndexError, KeyError, ValueError):
+                _send(writer, 'error no such game')
+                return game
+            return self._join(new_game, game, writer)
+
+        if command == 'stats':
+            _send(writer, f'stats {json.dumps(self.stats()._asdict())}')
+            return game
+
+        if game is None:
+            _send(writer, 'error not in a game')
+        elif command == 'position':
+            _send(writer, f'position {game.game_id} '
+                          f'{game.gameboard.to_fen()}')
+        elif command == 'move' and len(tokens) == 2:
+            self._play(game, tokens[1], writer)
+        else:
+            _send(writer, f"error unknown command: '{' '.join(tokens)}'")
+        return game
+
+    def _join(self, new_game: _Game, game: _Game | None,
+              writer: asyncio.StreamWriter) -> _Game:
+        if game is not None and game is not new_game:
+            self._leave(game, writer)
+        new_game.clients.add(writer)
+        _send(writer, f'game {new_game.game_id} '
+                      f'{new_game.gameboard.to_fen()}')
+        return new_game
+
+    def _leave(self, game: _Game, writer: asyncio.StreamWriter) -> None:
+        game.clients.discard(writer)
+        if not game.clients:
+            del self._games[game.game_id]
+
+    def _play(self, game: _Game, text: str,
+              writer: asyncio.StreamWriter) -> None:
+        """Validate and play a move, and push it to the clients of the game."""
+        if game.result is not None:
+            _send(writer, 'error game over')
+            return
+        gameboard = game.gameboard
+        try:
+            move = _parse_move(gameboard, text)
+        except ValueError as error:
+            _send(writer, f'error {error}')
+            return
+
+        game.record.play(move)
+        self._moves += 1
+        message = (f'moved {game.game_id} {move_to_uci(move)} '
+                   f'{gameboard.to_fen()}')
+        game.result = _game_result(game.record)
+        for client in game.clients:
+            _send(client, message)
+            if game.result is not None:
+                _send(client, f'over {game.game_id} {game.result}')
+
+
+async def run_load(address: tuple[str, int] | str, clients: int = 100,
+                   moves: int = 20, seed: int = 0) -> dict[str, float]:
+    """Generate load on a server: each client starts a game and plays random
+    legal moves in it, waiting for the server's update after each move.
+
+    Args:
+        address: The (host, port) of a TCP server, or the path of a Unix
+          socket.
+        clients: The number of concurrent clients.
+        moves: The number of moves each client plays, unless its game ends.
+        seed: The seed of the random moves.
+
+    Returns:
+        The number of moves played, the time taken in seconds, the moves per
+        second, and percentiles of the round-trip times in milliseconds.
+    """
+    rng = random.Random(seed)
+    round_trips: list[float] = []
+
+    async def client() -> int:
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        played = 0
+        try:
+            await reader.readline()
+            writer.write(b'new\n')
+            fen = (await reader.readline()).decode().split(maxsplit=2)[2]
+            for _ in range(moves):
+                gameboard = Gameboard.from_fen(fen)
+                legal_moves = generate_legal_moves(gameboard, gameboard.turn)
+                if not legal_moves:
+                    break
+                start_time = time.perf_counter()
+                writer.write(f'move {move_to_uci(rng.choice(legal_moves))}\n'
+                             .encode())
+                reply = (await reader.readline()).decode()
+                round_trips.append(time.perf_counter() - start_time)
+                if reply.startswith('over '):
+                    # The game ended with the previous move
+                    break
+                if not reply.startswith('moved '):
+                    raise RuntimeError(f'unexpected reply: {reply.strip()}')
+                fen = reply.split(maxsplit=3)[3]
+                played += 1
+            writer.write(b'quit\n')
+        finally:
+            writer.close()
+        return played
+
+    start_time = time.perf_counter()
+    played = sum(await asyncio.gather(*(client() for _ in range(clients))))
+    seconds = time.perf_counter() - start_time
+
+    round_trips.sort()
+
+    def percentile(fraction: float) -> float:
+        if not round_trips:
+            return 0.0
+        return round_trips[min(len(round_trips) - 1,
+                               int(fraction * len(round_trips)))] * 1000
+
+    return {'moves': played, 'seconds': seconds,
+            'moves_per_second': played / seconds if seconds else 0.0,
+            'round_trip_p50': percentile(0.5),
+            'round_trip_p99': percentile(0.99)}
+
+
+async def watch_game(address: tuple[str, int] | str, game_id: int,
+                     on_update: Callable[[str, int | None], None]
+                     ) -> str | None:
+    """Follow a game on a server as a spectator until it ends.
+
+    Args:
+        address: The (host, port) of a TCP server, or the path of a Unix
+          socket.
+        game_id: The ID of the game to follow.
+        on_update: A function called with the FEN of the position and the
+          last move, or None, when joining the game and after every move.
+
+    Returns:
+        The result and the reason, e.g. '1-0 checkmate', or None if the
+        connection was closed before the game ended.
+
+    Raises:
+        ValueError: If the game doesn't exist.
+    """
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    try:
+        await reader.readline()
+        _send(writer, f'join {game_id}')
+        reply = (await reader.readline()).decode().rstrip('\n')
+        if not reply.startswith('game '):
+            raise ValueError(reply.removeprefix('error '))
+        on_update(reply.split(maxsplit=2)[2], None)
+
+        while line := (await reader.readline()).decode():
+            tokens = line.split(maxsplit=3)
+            if tokens[0] == 'moved':
+                on_update(tokens[3].rstrip('\n'), move_from_uci(tokens[2]))
+            elif tokens[0] == 'over':
+                return line.split(maxsplit=2)[2].rstrip('\n')
+        return None
+    finally:
+        writer.close()
+
+
+def _send(writer: asyncio.StreamWriter, line: str) -> None:
+    writer.write(f'{line}\n'.encode())
+
+
+def _parse_move(gameboard: Gameboard, text: str) -> int:
+    """Parse and validate a move of the player to move in coordinate notation.
+
+    Raises:
+        ValueError: If the move is malformed or illegal.
+    """
+    move = move_from_uci(text.lower())
+    start, end = move & 63, move >> 6 & 63
+    piece_index = gameboard.view().get_piece_index_at(start)
+    if piece_index is None:
+        raise ValueError(f"illegal move: '{text}'")
+    piece_type = piece_index % len(Piece.ORDER)
+
+    if piece_type == _KING and abs(end - start) == 2:
+        # Castling isn't covered by the rules of movement of move_validator
+        if move not in generate_legal_moves(gameboard, gameboard.turn):
+            raise ValueError(f"illegal move: '{text}'")
+        return move
+
+    if not is_legal_move_by_index(start, end, gameboard.turn, gameboard):
+        raise ValueError(f"illegal move: '{text}'")
+    promotes = piece_type == _PAWN and end >> 3 in (0, 7)
+    if promotes and not move >> 12:
+        # Promote to a queen if no promotion piece is given
+        move |= _QUEEN << 12
+    elif move >> 12 and not promotes:
+        raise ValueError(f"illegal move: '{text}'")
+    return move
+
+
+def _game_result(record: GameRecord) -> str | None:
+    """Get the result and the reason if the game is over, e.g.
+    '1-0 checkmate', or None."""
+    gameboard = record.gameboard
+    color = gameboard.turn
+    if not has_legal_moves(gameboard, color):
+        if not is_in_check(gameboard, color):
+            return '1/2-1/2 stalemate'
+        return ('0-1' if color == ChessColor.WHITE else '1-0') + ' checkmate'
+    if record.is_fifty_move_draw():
+        return '1/2-1/2 fifty-move rule'
+    if record.is_threefold_repetition():
+        return '1/2-1/2 threefold repetition'
+    return None
@@ -15,9 +15,98 @@ class Square:
         Returns:
             A boolean indicating whether or not the square is a valid square.
         """
-        if len(square_coords) != 2:
-            return False
+        return square_coords in SQUARE_INDICES
 
-        file = square_coords[0].upper()
-        rank = int(square_coords[1])
-        return file in BoardInfo.FILE_LETTERS and rank in BoardInfo.RANK_NUMBERS
+
+# The squares are indexed from 0 to 63 starting at a1 and going along the
+# ranks, i.e. a1 = 0, b1 = 1, ..., h1 = 7, a2 = 8, ..., h8 = 63, as in
+# bitboard.py. Coordinates are parsed into square indices once with the tables
+# below, and everything else works on the indices.
+_NUM_SQUARES = BoardInfo.LENGTH * BoardInfo.LENGTH
+
+# The file (0-7 for a-h) and rank (0-7 for 1-8) indices of the coordinates,
+# where the file letters may be upper or lower case
+FILE_INDICES = {letter: file
+                for file, upper in enumerate(BoardInfo.FILE_LETTERS)
+                for letter in (upper, upper.lower())}
+RANK_INDICES = {str(rank + 1): rank for rank in range(BoardInfo.LENGTH)}
+
+# The coordinates of each square index, e.g. 'e4', and the square index of
+# each coordinates, in lower and upper case
+SQUARE_NAMES = tuple(f'{file.lower()}{rank + 1}'
+                     for rank in range(BoardInfo.LENGTH)
+                     for file in BoardInfo.FILE_LETTERS)
+SQUARE_INDICES = {f'{letter}{rank_symbol}': rank * BoardInfo.LENGTH + file
+                  for letter, file in FILE_INDICES.items()
+                  for rank_symbol, rank in RANK_INDICES.items()}
+
+# The file and rank indices of each square index
+SQUARE_FILES = tuple(index % BoardInfo.LENGTH for index in range(_NUM_SQUARES))
+SQUARE_RANKS = tuple(index // BoardInfo.LENGTH
+                     for index in range(_NUM_SQUARES))
+
+
+def _build_pair_tables() -> tuple[tuple, ...]:
+    """Build the tables of relations between pairs of squares, see below."""
+    file_distance = []
+    rank_distance = []
+    orthogonal = []
+    diagonal = []
+    between = []
+    line = []
+
+    for start in range(_NUM_SQUARES):
+        for end in range(_NUM_SQUARES):
+            file_diff = SQUARE_FILES[end] - SQUARE_FILES[start]
+            rank_diff = SQUARE_RANKS[end] - SQUARE_RANKS[start]
+            file_distance.append(abs(file_diff))
+            rank_distance.append(abs(rank_diff))
+
+            is_orthogonal = start != end and not (file_diff and rank_diff)
+            is_diagonal = start != end and abs(file_diff) == abs(rank_diff)
+            orthogonal.append(is_orthogonal)
+            diagonal.append(is_diagonal)
+
+            if not (is_orthogonal or is_diagonal):
+                between.append(0)
+                line.append(0)
+                continue
+
+            # Walk along the line from one edge of the board to the other
+            file_step = (file_diff > 0) - (file_diff < 0)
+            rank_step = (rank_diff > 0) - (rank_diff < 0)
+            file, rank = SQUARE_FILES[start], SQUARE_RANKS[start]
+            while (0 <= file - file_step < BoardInfo.LENGTH and
+                   0 <= rank - rank_step < BoardInfo.LENGTH):
+                file -= file_step
+                rank -= rank_step
+
+            squares_between = 0
+            squares_on_line = 0
+            is_between = False
+            while (0 <= file < BoardInfo.LENGTH and
+                   0 <= rank < BoardInfo.LENGTH):
+                index = rank * BoardInfo.LENGTH + file
+                squares_on_line |= 1 << index
+                if index in (start, end):
+                    is_between = not is_between
+                elif is_between:
+                    squares_between |= 1 << index
+                file += file_step
+                rank += rank_step
+            between.append(squares_between)
+            line.append(squares_on_line)
+
+    distance = tuple(map(max, file_distance, rank_distance))
+    return (tuple(file_distance), tuple(rank_distance), distance,
+            tuple(orthogonal), tuple(diagonal), tuple(between), tuple(line))
+
+
+# Tables of relations between two squares, indexed by start << 6 | end:
+#  - the number of files and ranks, and the number of king moves, between them
+#  - whether they're distinct squares on a shared rank or file, or diagonal
+#  - a bitboard of the squares strictly between them on a shared line, and of
+#    the whole line through both squares, or an empty bitboard if they don't
+#    share a line
+(FILE_DISTANCE, RANK_DISTANCE, DISTANCE, ORTHOGONAL, DIAGONAL, BETWEEN,
+ LINE) = _build_pair_tables()
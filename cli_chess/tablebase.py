@@ -0,0 +1,842 @@
+# tablebase.py
+
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, NamedTuple
+
+from . import bitboard
+from .attack_tables import (KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS,
+                            bishop_attacks, queen_attacks, rook_attacks)
+from .gameboard import Gameboard
+from .move_generator import generate_legal_moves
+from .piece import ChessColor, Piece
+
+# An endgame table holds the outcome with perfect play of every position of
+# an endgame in which one side has only its king, e.g. KQK (king and queen
+# against king). The tables are generated by retrograde analysis: starting
+# from the checkmates, the positions are resolved backwards one ply at a
+# time, which gives the distance to mate (DTM) of every won or lost position.
+#
+# Each table is a file with a header followed by one byte per position:
+# 0 for a draw, 255 for an illegal or unused index, and otherwise the number
+# of plies to mate plus one. The player to move wins if the number of plies is
+# odd and is mated if it's even. The position index is made up of the player
+# to move and the squares of the pieces, and the board symmetries are used to
+# cut down the number of positions, see _TableSpec. The fifty-move rule is
+# ignored, and positions with castling rights aren't covered.
+
+ENDGAMES = ('KQK', 'KRK', 'KPK', 'KBNK')
+FILE_EXTENSION = '.ctb'
+
+DRAW = 0
+ILLEGAL = 255
+
+# The strong side's pieces, from the strongest, as used in the table names
+_SIGNATURE_ORDER = 'QRBNP'
+
+_PAWN = Piece.ORDER.index(Piece.PAWN)
+_KING = Piece.ORDER.index(Piece.KING)
+
+# The players to move in the tables: the side with the pieces, which is always
+# white in the table, or the side with the bare king
+_STRONG = 0
+_WEAK = 1
+
+
+class TablebaseResult(NamedTuple):
+    """The outcome of a position with perfect play."""
+    # 1 if the player to move wins, 0 for a draw and -1 if they lose
+    wdl: int
+    # The number of plies to mate, or None for a draw
+    dtm: int | None
+
+
+class EndgameTable:
+    """A generated endgame table, which is read from a memory-mapped file."""
+    # The layout of the header: a magic number, the format version, the table
+    # name and the number of positions
+    HEADER = struct.Struct('<4sH10sQ')
+    MAGIC = b'CTB\x00'
+    VERSION = 1
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        """Open an endgame table.
+
+        Raises:
+            OSError: If the file can't be opened.
+            ValueError: If the file isn't an endgame table.
+        """
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, name, size = EndgameTable.HEADER.unpack_from(
+                self._data)
+        except struct.error:
+            magic = version = size = None
+        if (magic != EndgameTable.MAGIC or version != EndgameTable.VERSION or
+                len(self._data) != EndgameTable.HEADER.size + size):
+            self._data.close()
+            raise ValueError(f'not an endgame table: {os.fspath(path)}')
+        self.signature = name.rstrip(b'\x00').decode('ascii')
+        self._spec = _TableSpec(self.signature)
+
+    def close(self) -> None:
+        self._data.close()
+
+    def value(self, index: int) -> int:
+        """Get the raw value of the position with the given index."""
+        return self._data[EndgameTable.HEADER.size + index]
+
+    def probe(self, side_to_move: int, squares: list[int]) -> int:
+        """Get the raw value of a position in table coordinates.
+
+        Args:
+            side_to_move: _STRONG or _WEAK.
+            squares: The squares of the pieces in the order of the table's
+              slots, see _TableSpec.
+        """
+        return self.value(self._spec.index(side_to_move, squares))
+
+    @staticmethod
+    def write(path: str | os.PathLike, signature: str,
+              values: bytearray) -> None:
+        """Write the values of a table to a file."""
+        with open(path, 'wb') as file:
+            file.write(EndgameTable.HEADER.pack(
+                EndgameTable.MAGIC, EndgameTable.VERSION,
+                signature.encode('ascii'), len(values)))
+            file.write(values)
+
+
+class Tablebase:
+    """The generated endgame tables in a directory.
+
+    The tables are opened when they're first needed, and probing a position
+    reads a single byte of a memory-mapped file. The tablebase should be
+    closed when it's no longer needed, e.g. by using it as a context manager.
+    """
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = os.fspath(directory)
+        # The open tables by name, or None for tables that don't exist
+        self._tables: dict[str, EndgameTable | None] = {}
+
+    def __enter__(self) -> 'Tablebase':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables.clear()
+
+    def probe(self, gameboard: Gameboard) -> TablebaseResult | None:
+        """Look up the outcome of a position.
+
+        Args:
+            gameboard: The Gameboard object.
+
+        Returns:
+            The outcome for the player to move, or None if the position isn't
+            covered by the tables in the directory.
+        """
+        position = _table_position(gameboard)
+        if position is None:
+            return None
+        signature, side_to_move, squares = position
+        if _is_insufficient_material(signature):
+            return TablebaseResult(0, None)
+
+        table = self._table(signature)
+        if table is None:
+            return None
+        return _result(table.probe(side_to_move, squares))
+
+    def best_move(self, gameboard: Gameboard) -> int | None:
+        """Find the best move in a position covered by the tables.
+
+        A won position is won in as few moves as possible, a lost one is
+        drawn out as long as possible, and a drawn one is kept drawn.
+
+        Args:
+            gameboard: The Gameboard object, which is left unchanged.
+
+        Returns:
+            The move, encoded as in move.py, or None if the position or any
+            position after a legal move isn't covered by the tables.
+        """
+        if self.probe(gameboard) is None:
+            return None
+
+        best_move = None
+        best_key = None
+        for move in generate_legal_moves(gameboard, gameboard.turn):
+            gameboard.make_move(move)
+            result = self.probe(gameboard)
+            gameboard.unmake_move()
+            if result is None:
+                return None
+
+            # Prefer the opponent losing quickly, then draws, then the
+            # opponent winning slowly
+            if result.wdl < 0:
+                key = (2, -result.dtm)
+            elif result.wdl == 0:
+                key = (1, 0)
+            else:
+                key = (0, result.dtm)
+            if best_key is None or key > best_key:
+                best_move, best_key = move, key
+        return best_move
+
+    def _table(self, signature: str) -> EndgameTable | None:
+        if signature not in self._tables:
+            path = os.path.join(self.directory, signature + FILE_EXTENSION)
+            self._tables[signature] = (EndgameTable(path)
+                                       if os.path.exists(path) else None)
+        return self._tables[signature]
+
+
+def generate_tables(directory: str | os.PathLike,
+                    signatures: Iterable[str] = ENDGAMES,
+                    processes: int | None = None) -> list[str]:
+    """Generate endgame tables, along with the tables they depend on.
+
+    Tables that already exist in the directory are kept. KPK depends on KQK
+    and KRK, since the pawn can be promoted.
+
+    Args:
+        directory: The directory to write the tables to.
+        signatures: The names of the tables, e.g. 'KQK'. The strong side's
+          pieces are given from the strongest, e.g. 'KBNK'.
+        processes: The number of processes to generate each table with.
+          Defaults to the number of CPUs.
+
+    Returns:
+        The paths of the tables that were generated.
+
+    Raises:
+        ValueError: If a table name is invalid.
+    """
+    os.makedirs(directory, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+
+    # Order the tables so that each one comes after its dependencies
+    order = []
+
+    def add(signature: str) -> None:
+        if signature in order:
+            return
+        for dependency in _TableSpec(signature).dependencies:
+            add(dependency)
+        order.append(signature)
+
+    for signature in signatures:
+        add(signature)
+
+    paths = []
+    for signature in order:
+        path = os.path.join(directory, signature + FILE_EXTENSION)
+        if os.path.exists(path):
+            continue
+        if processes > 1:
+            with ProcessPoolExecutor(processes) as executor:
+                values = _generate(signature, directory, executor.map,
+                                   processes)
+        else:
+            values = _generate(signature, directory, map, 1)
+            _close_dependency_tables()
+        EndgameTable.write(path, signature, values)
+        paths.append(path)
+    return paths
+
+
+class _TableSpec:
+    """The layout of the positions of an endgame table.
+
+    The pieces are stored in slots: for pawnless endgames the strong king,
+    the weak king and then the other pieces, and otherwise a pawn first,
+    followed by the same. The first slot, the anchor, only takes a subset of
+    the squares, since every position can be mirrored into one where it's
+    on them: pawnless positions can be mirrored along the middle files and
+    ranks and the long diagonal, which leaves 10 squares for the strong king,
+    and positions with pawns only along the middle files, which leaves 24
+    squares for the pawn. The index of a position is
+        (side_to_move * number of anchor squares + anchor square index)
+            * 64 ** (number of slots - 1) + the other squares in base 64.
+    """
+
+    def __init__(self, signature: str) -> None:
+        extras = signature[1:-1]
+        if (len(signature) < 3 or signature[0] != Piece.KING or
+                signature[-1] != Piece.KING or
+                any(symbol not in _SIGNATURE_ORDER for symbol in extras) or
+                list(extras) != sorted(extras, key=_SIGNATURE_ORDER.index)):
+            raise ValueError(f"invalid endgame table name: '{signature}'")
+        self.signature = signature
+
+        piece_types = [Piece.ORDER.index(symbol) for symbol in extras]
+        self.has_pawns = _PAWN in piece_types
+        if self.has_pawns:
+            piece_types.remove(_PAWN)
+            self.slot_types = (_PAWN, _KING, _KING, *piece_types)
+            self.slot_sides = (_STRONG, _STRONG, _WEAK) + (
+                (_STRONG,) * len(piece_types))
+            self.anchor_squares = _PAWN_ANCHOR_SQUARES
+        else:
+            self.slot_types = (_KING, _KING, *piece_types)
+            self.slot_sides = (_STRONG, _WEAK) + (_STRONG,) * len(piece_types)
+            self.anchor_squares = _KING_ANCHOR_SQUARES
+        self.strong_king_slot = 1 if self.has_pawns else 0
+        self.weak_king_slot = self.strong_king_slot + 1
+        self._anchor_indices = {square: anchor_index for anchor_index, square
+                                in enumerate(self.anchor_squares)}
+        self.size = (2 * len(self.anchor_squares) *
+                     bitboard.NUM_SQUARES ** (len(self.slot_types) - 1))
+
+        # The tables reached by captures and promotions that aren't draws by
+        # insufficient material
+        dependencies = set()
+        for slot, piece_type in enumerate(self.slot_types):
+            if self.slot_sides[slot] == _WEAK or piece_type == _KING:
+                continue
+            remaining = list(extras)
+            remaining.remove(Piece.ORDER[piece_type])
+            dependencies.add(_signature(remaining))
+            if piece_type == _PAWN:
+                for promotion in Piece.ORDER[1:-1]:
+                    dependencies.add(_signature(remaining + [promotion]))
+        self.dependencies = sorted(
+            dependency for dependency in dependencies
+            if not _is_insufficient_material(dependency))
+
+    def index(self, side_to_move: int, squares: list[int]) -> int:
+        """Get the index of a position, mirroring it as needed.
+
+        Args:
+            side_to_move: _STRONG or _WEAK.
+            squares: The squares of the pieces in the order of the slots.
+        """
+        symmetry = _SYMMETRIES[self._symmetry(squares)]
+        index = (side_to_move * len(self.anchor_squares) +
+                 self._anchor_indices[symmetry[squares[0]]])
+        for square in squares[1:]:
+            index = index * bitboard.NUM_SQUARES + symmetry[square]
+        return index
+
+    def squares(self, index: int) -> tuple[int, list[int]]:
+        """Get the player to move and the squares of the pieces of the
+        position with the given index."""
+        squares = []
+        for _ in range(len(self.slot_types) - 1):
+            index, square = divmod(index, bitboard.NUM_SQUARES)
+            squares.append(square)
+        side_to_move, anchor_index = divmod(index, len(self.anchor_squares))
+        squares.append(self.anchor_squares[anchor_index])
+        squares.reverse()
+        return side_to_move, squares
+
+    def _symmetry(self, squares: list[int]) -> int:
+        """Get the index in _SYMMETRIES of the mirroring that puts a position
+        into its canonical form."""
+        anchor = squares[0]
+        symmetry = _MIRROR_FILES if anchor & 7 > 3 else 0
+        if self.has_pawns:
+            return symmetry
+        if anchor >> 3 > 3:
+            symmetry |= _MIRROR_RANKS
+
+        # Flip the position along the long diagonal if the anchor is above it,
+        # or if it's on it and the first piece off it is above it, so that
+        # the canonical form is unique
+        for square in squares:
+            square = _SYMMETRIES[symmetry][square]
+            if square >> 3 != square & 7:
+                if square >> 3 > square & 7:
+                    symmetry |= _FLIP_DIAGONAL
+                break
+        return symmetry
+
+
+def _generate(signature: str, directory: str, map_function,
+              processes: int) -> bytearray:
+    """Generate the values of an endgame table by retrograde analysis.
+
+    Args:
+        signature: The name of the table.
+        directory: The directory with the tables it depends on.
+        map_function: map, or the map method of a process pool.
+        processes: The number of processes, used to split up the work.
+
+    Returns:
+        The values of the positions.
+    """
+    spec = _TableSpec(signature)
+    chunk_size = -(-spec.size // (4 * processes))
+    starts = range(0, spec.size, chunk_size)
+
+    # Find the illegal positions and the checkmates, count the moves within
+    # the table, and look up the outcomes of the moves that leave the table
+    values = bytearray()
+    counters = bytearray()
+    exit_wins = bytearray()
+    exit_losses = bytearray()
+    exit_draws = bytearray()
+    for chunk in map_function(
+            _initialize_chunk, [signature] * len(starts),
+            [directory] * len(starts), starts,
+            [min(start + chunk_size, spec.size) for start in starts]):
+        for array, part in zip((values, counters, exit_wins, exit_losses,
+                                exit_draws), chunk):
+            array += part
+
+    # The positions to resolve at each number of plies to mate, and the ones
+    # that are won by leaving the table, unless they're won faster
+    levels: dict[int, list[int]] = {}
+    exit_win_levels: dict[int, list[int]] = {}
+    for index, value in enumerate(values):
+        if value == ILLEGAL:
+            continue
+        if value:
+            levels.setdefault(value - 1, []).append(index)
+        elif exit_wins[index] != ILLEGAL:
+            exit_win_levels.setdefault(exit_wins[index] + 1, []).append(index)
+        elif (not counters[index] and not exit_draws[index] and
+              exit_losses[index] != ILLEGAL):
+            # Every move leaves the table and loses
+            plies = exit_losses[index] + 1
+            values[index] = plies + 1
+            levels.setdefault(plies, []).append(index)
+
+    plies = 0
+    while levels or exit_win_levels:
+        for index in exit_win_levels.pop(plies, ()):
+            if not values[index]:
+                values[index] = plies + 1
+                levels.setdefault(plies, []).append(index)
+        frontier = levels.pop(plies, [])
+        if plies + 1 >= ILLEGAL:
+            raise ValueError(f'{signature} has mates that are too long')
+
+        chunks = [frontier[start:start + chunk_size]
+                  for start in range(0, len(frontier), chunk_size)]
+        for chunk, predecessors in zip(chunks, map_function(
+                _predecessors_chunk, [signature] * len(chunks), chunks)):
+            for index_predecessors in predecessors:
+                for predecessor in index_predecessors:
+                    if values[predecessor]:
+                        continue
+                    if plies % 2 == 0:
+                        # The player to move gets mated, so the player who
+                        # moved into the position wins
+                        values[predecessor] = plies + 2
+                        levels.setdefault(plies + 1, []).append(predecessor)
+                        continue
+
+                    # The player who moved into the position loses if all
+                    # their moves lose
+                    counters[predecessor] -= 1
+                    if (counters[predecessor] or
+                            exit_wins[predecessor] != ILLEGAL or
+                            exit_draws[predecessor]):
+                        continue
+                    loss_plies = plies + 1
+                    if exit_losses[predecessor] != ILLEGAL:
+                        loss_plies = max(loss_plies,
+                                         exit_losses[predecessor] + 1)
+                    values[predecessor] = loss_plies + 1
+                    levels.setdefault(loss_plies, []).append(predecessor)
+        plies += 1
+
+    return values
+
+
+# The specs and dependency tables used by the current process, by name
+_specs: dict[str, _TableSpec] = {}
+_dependency_tables: dict[str, Tablebase] = {}
+
+
+def _close_dependency_tables() -> None:
+    for tablebase in _dependency_tables.values():
+        tablebase.close()
+    _dependency_tables.clear()
+
+
+def _get_spec(signature: str) -> _TableSpec:
+    if signature not in _specs:
+        _specs[signature] = _TableSpec(signature)
+    return _specs[signature]
+
+
+def _initialize_chunk(signature: str, directory: str, start: int,
+                      stop: int) -> tuple[bytes, ...]:
+    """Examine the positions in a range of indices of a table.
+
+    Returns:
+        For each position: its value (ILLEGAL, 1 if the player to move is
+        mated, otherwise 0), the number of distinct positions in the table
+        reached by its legal moves, the least number of plies to mate of the
+        moves that leave the table and win (ILLEGAL if there are none), the
+        greatest number of plies to mate of the ones that lose, and whether
+        any of them draws.
+    """
+    spec = _get_spec(signature)
+    if directory not in _dependency_tables:
+        _dependency_tables[directory] = Tablebase(directory)
+    tablebase = _dependency_tables[directory]
+    size = stop - start
+    values = bytearray(size)
+    counters = bytearray(size)
+    exit_wins = bytearray([ILLEGAL]) * size
+    exit_losses = bytearray([ILLEGAL]) * size
+    exit_draws = bytearray(size)
+
+    for offset in range(size):
+        index = start + offset
+        side_to_move, squares = spec.squares(index)
+        if not _is_legal(spec, side_to_move, squares) or spec.index(
+                side_to_move, squares) != index:
+            values[offset] = ILLEGAL
+            continue
+
+        children = set()
+        has_moves = False
+        for child, child_value in _child_positions(spec, side_to_move,
+                                                   squares, tablebase):
+            has_moves = True
+            if child is not None:
+                children.add(child)
+                continue
+            child = child_value
+            # The raw value of a position outside the table
+            if child == DRAW:
+                exit_draws[offset] = 1
+            elif (child - 1) % 2 == 0:
+                # The opponent gets mated
+                exit_wins[offset] = min(exit_wins[offset], child - 1)
+            elif exit_losses[offset] == ILLEGAL:
+                exit_losses[offset] = child - 1
+            else:
+                exit_losses[offset] = max(exit_losses[offset], child - 1)
+
+        counters[offset] = len(children)
+        if not has_moves and side_to_move == _WEAK and _is_attacked(
+                spec, squares, squares[spec.weak_king_slot], None):
+            values[offset] = 1
+
+    return values, counters, exit_wins, exit_losses, exit_draws
+
+
+def _predecessors_chunk(signature: str,
+                        indices: list[int]) -> list[list[int]]:
+    """Get the distinct legal positions in a table from which a move leads to
+    each of the given positions."""
+    spec = _get_spec(signature)
+    result = []
+    for index in indices:
+        side_to_move, squares = spec.squares(index)
+        result.append(list(_parent_positions(spec, side_to_move, squares)))
+    return result
+
+
+def _child_positions(spec: _TableSpec, side_to_move: int, squares: list[int],
+                     tablebase: Tablebase):
+    """Generate the positions after the legal moves of a legal position.
+
+    Yields:
+        The index of each position in the table and None, or for positions
+        outside the table, e.g. after a capture, None and their raw value.
+    """
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    strong_king = squares[spec.strong_king_slot]
+    weak_king = squares[spec.weak_king_slot]
+
+    if side_to_move == _WEAK:
+        for target in bitboard.iter_squares(KING_ATTACKS[weak_king] &
+                                            ~KING_ATTACKS[strong_king]):
+            captured = (squares.index(target)
+                        if occupied >> target & 1 else None)
+            child = list(squares)
+            child[spec.weak_king_slot] = target
+            if _is_attacked(spec, child, target, captured):
+                continue
+            if captured is None:
+                yield spec.index(_STRONG, child), None
+            else:
+                yield None, _exit_value(spec, child, captured, None, _STRONG,
+                                        tablebase)
+        return
+
+    for slot, square in enumerate(squares):
+        if spec.slot_sides[slot] == _WEAK:
+            continue
+        piece_type = spec.slot_types[slot]
+        if piece_type == _PAWN:
+            targets = 0
+            if not occupied >> (square + 8) & 1:
+                targets = 1 << (square + 8)
+                if square >> 3 == 1 and not occupied >> (square + 16) & 1:
+                    targets |= 1 << (square + 16)
+        elif piece_type == _KING:
+            targets = (KING_ATTACKS[square] & ~occupied &
+                       ~KING_ATTACKS[weak_king])
+        else:
+            targets = _ATTACKS[piece_type](square, occupied) & ~occupied
+
+        for target in bitboard.iter_squares(targets):
+            child = list(squares)
+            child[slot] = target
+            if piece_type == _PAWN and target >> 3 == 7:
+                for promotion in range(_PAWN + 1, _KING):
+                    yield None, _exit_value(spec, child, slot, promotion,
+                                            _WEAK, tablebase)
+            else:
+                yield spec.index(_WEAK, child), None
+
+
+def _parent_positions(spec: _TableSpec, side_to_move: int,
+                      squares: list[int]):
+    """Generate the distinct legal positions in the table from which a move
+    of the other player, other than a capture or promotion, leads to a
+    position."""
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    seen = set()
+
+    for slot, square in enumerate(squares):
+        # The piece was moved by the player who isn't to move
+        if spec.slot_sides[slot] == side_to_move:
+            continue
+        piece_type = spec.slot_types[slot]
+        if piece_type == _PAWN:
+            origins = 0
+            if square >> 3 >= 2 and not occupied >> (square - 8) & 1:
+                origins = 1 << (square - 8)
+                if square >> 3 == 3 and not occupied >> (square - 16) & 1:
+                    origins |= 1 << (square - 16)
+        elif piece_type == _KING:
+            origins = KING_ATTACKS[square] & ~occupied
+        else:
+            origins = _ATTACKS[piece_type](square, occupied) & ~occupied
+
+        for origin in bitboard.iter_squares(origins):
+            parent = list(squares)
+            parent[slot] = origin
+            if not _is_legal(spec, 1 - side_to_move, parent):
+                continue
+            index = spec.index(1 - side_to_move, parent)
+            if index not in seen:
+                seen.add(index)
+                yield index
+
+
+def _exit_value(spec: _TableSpec, squares: list[int], changed_slot: int,
+                promotion: int | None, side_to_move: int,
+                tablebase: Tablebase) -> int:
+    """Get the raw value of a position outside a table.
+
+    Args:
+        spec: The spec of the table.
+        squares: The squares of the pieces after the move.
+        changed_slot: The slot of the captured piece, or of the pawn that was
+          promoted.
+        promotion: The piece type the pawn was promoted to, or None for a
+          capture.
+        side_to_move: The player to move after the move.
+        tablebase: The tablebase with the tables the table depends on.
+    """
+    pieces = []
+    for slot, square in enumerate(squares):
+        piece_type = spec.slot_types[slot]
+        if slot == changed_slot:
+            if promotion is None:
+                continue
+            piece_type = promotion
+        if spec.slot_sides[slot] == _STRONG and piece_type != _KING:
+            pieces.append((piece_type, square))
+    signature = _signature([Piece.ORDER[piece_type]
+                            for piece_type, _ in pieces])
+    if _is_insufficient_material(signature):
+        return DRAW
+
+    table = tablebase._table(signature)
+    if table is None:
+        raise ValueError(f'{spec.signature} needs the {signature} table')
+    child_spec = table._spec
+    child_squares = _order_squares(
+        child_spec, squares[spec.strong_king_slot],
+        squares[spec.weak_king_slot], pieces)
+    return table.probe(side_to_move, child_squares)
+
+
+def _order_squares(spec: _TableSpec, strong_king: int, weak_king: int,
+                   pieces: list[tuple[int, int]]) -> list[int]:
+    """Put the squares of the kings and the strong side's other pieces into
+    the order of the slots of a table."""
+    remaining = sorted(pieces)
+    squares = []
+    for slot, piece_type in enumerate(spec.slot_types):
+        if piece_type == _KING:
+            squares.append(strong_king if spec.slot_sides[slot] == _STRONG
+                           else weak_king)
+            continue
+        for position, (remaining_type, square) in enumerate(remaining):
+            if remaining_type == piece_type:
+                squares.append(square)
+                del remaining[position]
+                break
+    return squares
+
+
+def _is_legal(spec: _TableSpec, side_to_move: int,
+              squares: list[int]) -> bool:
+    """Check if the pieces are on distinct squares, the kings aren't next to
+    each other, no pawn is on the first or last rank, and the weak king isn't
+    in check if it isn't its turn."""
+    if len(set(squares)) != len(squares):
+        return False
+    strong_king = squares[spec.strong_king_slot]
+    weak_king = squares[spec.weak_king_slot]
+    if KING_ATTACKS[strong_king] >> weak_king & 1:
+        return False
+    for slot, square in enumerate(squares):
+        if spec.slot_types[slot] == _PAWN and square >> 3 in (0, 7):
+            return False
+    return side_to_move == _WEAK or not _is_attacked(spec, squares, weak_king,
+                                                     None)
+
+
+def _is_attacked(spec: _TableSpec, squares: list[int], target: int,
+                 captured_slot: int | None) -> bool:
+    """Check if a square is attacked by the strong side's pieces other than
+    the king, with the weak king on the target square."""
+    occupied = 0
+    for slot, square in enumerate(squares):
+        if slot != captured_slot:
+            occupied |= 1 << square
+    for slot, square in enumerate(squares):
+        piece_type = spec.slot_types[slot]
+        if (slot == captured_slot or spec.slot_sides[slot] == _WEAK or
+                piece_type == _KING):
+            continue
+        if piece_type == _PAWN:
+            attacks = PAWN_ATTACKS[0][square]
+        else:
+            attacks = _ATTACKS[piece_type](square, occupied)
+        if attacks >> target & 1:
+            return True
+    return False
+
+
+def _table_position(gameboard: Gameboard) -> tuple[str, int, list[int]] | None:
+    """Get the name of the table of a position, the player to move and the
+    squares of the pieces in the order of the slots of the table, or None if
+    the position can't be in a table."""
+    board = gameboard.view()
+    if board.castling_rights:
+        return None
+    if not all(board.get_bitboard(Piece.KING, color)
+               for color in ChessColor.ORDER):
+        return None
+
+    colors_with_pieces = [
+        color_index for color_index, color in enumerate(ChessColor.ORDER)
+        if board.get_occupancy(color) != board.get_bitboard(Piece.KING, color)]
+    if len(colors_with_pieces) > 1:
+        return None
+    strong_color = colors_with_pieces[0] if colors_with_pieces else 0
+    # The strong side is white in the tables, so the board is flipped if it's
+    # black
+    flip = 56 if strong_color else 0
+
+    pieces = []
+    strong_color_name = ChessColor.ORDER[strong_color]
+    for piece_type, pieces_bitboard in enumerate(
+            board.get_piece_bitboards(strong_color_name)):
+        if piece_type == _KING:
+            continue
+        for square in bitboard.iter_squares(pieces_bitboard):
+            pieces.append((piece_type, square ^ flip))
+
+    signature = _signature([Piece.ORDER[piece_type]
+                            for piece_type, _ in pieces])
+    side_to_move = (_STRONG if gameboard.turn == strong_color_name else
+                    _WEAK)
+    if _is_insufficient_material(signature):
+        return signature, side_to_move, []
+    try:
+        spec = _get_spec(signature)
+    except ValueError:
+        return None
+    strong_king = bitboard.lsb(board.get_bitboard(
+        Piece.KING, strong_color_name)) ^ flip
+    weak_king = bitboard.lsb(board.get_bitboard(
+        Piece.KING, ChessColor.ORDER[1 - strong_color])) ^ flip
+    return (signature, side_to_move,
+            _order_squares(spec, strong_king, weak_king, pieces))
+
+
+def _result(value: int) -> TablebaseResult | None:
+    """Convert the raw value of a position into its outcome."""
+    if value == ILLEGAL:
+        return None
+    if value == DRAW:
+        return TablebaseResult(0, None)
+    plies = value - 1
+    return TablebaseResult(1 if plies % 2 else -1, plies)
+
+
+def _signature(symbols: list[str]) -> str:
+    """Get the name of the table with the strong side's pieces other than the
+    king."""
+    return (Piece.KING + ''.join(sorted(symbols, key=_SIGNATURE_ORDER.index))
+            + Piece.KING)
+
+
+def _is_insufficient_material(signature: str) -> bool:
+    """Check if neither side can be mated, i.e. the strong side has at most
+    a bishop or a knight."""
+    return signature in ('KK', 'KBK', 'KNK')
+
+
+# The attacks of the pieces other than pawns by piece type
+_ATTACKS = (
+    None,
+    lambda square, occupied: KNIGHT_ATTACKS[square],
+    bishop_attacks,
+    rook_attacks,
+    queen_attacks,
+    lambda square, occupied: KING_ATTACKS[square],
+)
+
+# The mirrorings of the board as square maps, by combination of flags
+_MIRROR_FILES = 1
+_MIRROR_RANKS = 2
+_FLIP_DIAGONAL = 4
+_SYMMETRIES = []
+for _symmetry in range(8):
+    _map = []
+    for _square in range(bitboard.NUM_SQUARES):
+        if _symmetry & _MIRROR_FILES:
+            _square ^= 7
+        if _symmetry & _MIRROR_RANKS:
+            _square ^= 56
+        if _symmetry & _FLIP_DIAGONAL:
+            _square = (_square & 7) << 3 | _square >> 3
+        _map.append(_square)
+    _SYMMETRIES.append(tuple(_map))
+
+# The squares of the anchor slot: the a1-d1-d4 triangle for the strong king,
+# and the a-d files for a pawn
+_KING_ANCHOR_SQUARES = tuple(square for square in range(bitboard.NUM_SQUARES)
+                             if square & 7 <= 3 and square >> 3 <= square & 7)
+_PAWN_ANCHOR_SQUARES = tuple(square for square in range(8, 56)
+                             if square & 7 <= 3)
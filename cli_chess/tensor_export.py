@@ -0,0 +1,253 @@
+# tensor_export.py
+#
+# This module requires NumPy, which the rest of the package doesn't.
+
+import contextlib
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from . import pgn
+from .gameboard import Gameboard
+from .process_pool import map_bounded, open_pool
+
+# Positions are exported as two arrays per shard of a dataset:
+#
+#   planes-NNNNN.npy: uint8 with shape (positions, 12, 8, 8), where
+#       planes[position, piece, rank, file] is 1 if the piece is on the
+#       square. Pieces are in the order of Piece.index, i.e. the white pawn,
+#       knight, bishop, rook, queen and king, then the black ones, and rank
+#       and file 0 are rank 1 and file a.
+#   features-NNNNN.npy: uint8 with shape (positions, len(FEATURES)), where
+#       each column is 1 if the feature holds.
+#
+# Shards are written through memory maps, so a dataset of any size is
+# exported with at most a few chunks of positions in memory.
+
+FEATURES = ('white_to_move', 'white_kingside', 'white_queenside',
+            'black_kingside', 'black_queenside')
+PLANES = 12
+
+# The number of positions per shard
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# The layout of a position packed with Gameboard.pack()
+PACKED_DTYPE = np.dtype([
+    ('occupied', '<u8'),
+    ('pieces', 'u1', (16,)),
+    ('flags', 'u1'),
+    ('en_passant', 'u1'),
+    ('halfmove_clock', '<u2'),
+    ('fullmove_number', '<u2'),
+])
+
+
+class Shard(NamedTuple):
+    """The files of an exported shard."""
+    planes_path: Path
+    features_path: Path
+    positions: int
+
+
+def encode_packed(data: bytes | np.ndarray,
+                  planes: np.ndarray | None = None
+                  ) -> tuple[np.ndarray, np.ndarray]:
+    """Encode positions packed with Gameboard.pack().
+
+    Args:
+        data: The packed positions, one after the other.
+        planes: A zeroed uint8 array with shape (positions, 12, 8, 8) to
+          encode the pieces into, e.g. a memory map. Defaults to a new array.
+
+    Returns:
+        The piece planes and the features, see the top of the module.
+    """
+    records = np.frombuffer(data, dtype=PACKED_DTYPE)
+    count = len(records)
+    if planes is None:
+        planes = np.zeros((count, PLANES, 8, 8), dtype=np.uint8)
+
+    # Packed positions list the pieces in ascending order of the occupied
+    # squares, at 4 bits each, so the piece on an occupied square is found by
+    # counting the occupied squares below it
+    occupied = ((records['occupied'][:, None] >> _SQUARE_SHIFTS) &
+                np.uint64(1)).astype(bool)
+    nibbles = np.empty((count, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = records['pieces'] & 15
+    nibbles[:, 1::2] = records['pieces'] >> 4
+    piece_numbers = np.cumsum(occupied, axis=1, dtype=np.uint8) - 1
+    positions, squares = np.nonzero(occupied)
+    pieces = nibbles[positions, piece_numbers[positions, squares]]
+    planes.reshape(count, PLANES, 64)[positions, pieces, squares] = 1
+
+    # The flags hold the player to move in bit 0, 0 for white, and the
+    # castling rights from bit 1
+    flags = records['flags']
+    features = np.empty((count, len(FEATURES)), dtype=np.uint8)
+    features[:, 0] = (flags & 1) ^ 1
+    features[:, 1:] = (flags[:, None] >> _CASTLING_SHIFTS) & 1
+    return planes, features
+
+
+def encode_positions(gameboards: Iterable[Gameboard]
+                     ) -> tuple[np.ndarray, np.ndarray]:
+    """Encode positions into piece planes and features, see encode_packed."""
+    return encode_packed(b''.join(gameboard.pack()
+                                  for gameboard in gameboards))
+
+
+def export_packed(packed_positions: Iterable[bytes],
+                  directory: str | os.PathLike,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  processes: int | None = 1,
+                  executor: Executor | None = None) -> list[Shard]:
+    """Export packed positions to shards of .npy files.
+
+    The positions are gathered into chunks, and each chunk is encoded and
+    written to its shard by a worker process. Only a few chunks per process
+    are in flight at a time, so the memory used doesn't grow with the size of
+    the dataset.
+
+    Args:
+        packed_positions: Byte strings of one or more positions packed with
+          Gameboard.pack(), e.g. all the positions of a game.
+        directory: The directory to write the shards to, which is created if
+          needed.
+        chunk_size: The number of positions per shard.
+        processes: The number of worker processes, or None for the number of
+          CPUs. With 1, chunks are written by the calling process.
+        executor: A pool of the given number of processes to use instead of
+          starting one, e.g. the one reading the positions, see open_pool.
+
+    Returns:
+        The shards, in the order of the positions.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    chunks = _iter_chunks(packed_positions,
+                          chunk_size * Gameboard.PACKED_SIZE)
+    processes = processes or os.cpu_count() or 1
+    if executor is None and processes == 1:
+        return [_write_shard(chunk, directory, index)
+                for index, chunk in enumerate(chunks)]
+
+    with contextlib.ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor(processes))
+        calls = ((chunk, directory, index)
+                 for index, chunk in enumerate(chunks))
+        return list(map_bounded(executor, _write_shard, calls,
+                                2 * processes))
+
+
+def export_positions(gameboards: Iterable[Gameboard],
+                     directory: str | os.PathLike,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     processes: int | None = 1) -> list[Shard]:
+    """Export positions to shards of .npy files, see export_packed.
+
+    The positions are packed as they're read, so the Gameboard objects may be
+    reused, e.g. those yielded by PgnGame.replay.
+    """
+    return export_packed((gameboard.pack() for gameboard in gameboards),
+                         directory, chunk_size, processes)
+
+
+def export_pgn(paths: Iterable[str | os.PathLike],
+               directory: str | os.PathLike,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               processes: int | None = 1,
+               skip_invalid: bool = False) -> list[Shard]:
+    """Export every position of the games in PGN files to shards of .npy
+    files, see export_packed.
+
+    The games are read and the shards written by the same pool of processes.
+
+    Raises:
+        InvalidPgnError: If a game is invalid and skip_invalid isn't set.
+    """
+    with open_pool(processes) as executor:
+        return export_packed(
+            iter_packed_games(paths, processes, skip_invalid, executor),
+            directory, chunk_size, processes, executor)
+
+
+def iter_packed_games(paths: Iterable[str | os.PathLike],
+                      processes: int | None = 1,
+                      skip_invalid: bool = False,
+                      executor: Executor | None = None) -> Iterator[bytes]:
+    """Pack every position of the games in PGN files, reading the games with
+    pgn.map_games if there are several processes, on the executor if given.
+
+    Yields:
+        The packed positions of each game, from its starting position on.
+
+    Raises:
+        InvalidPgnError: If a game is invalid and skip_invalid isn't set.
+    """
+    if executor is None and processes == 1:
+        for path in paths:
+            for game in pgn.read_games(path, skip_invalid=skip_invalid):
+                yield _pack_game(game)
+    else:
+        yield from pgn.map_games(_pack_game, paths, processes,
+                                 skip_invalid=skip_invalid,
+                                 executor=executor)
+
+
+def iter_shards(directory: str | os.PathLike
+                ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Open the shards in a directory, in order.
+
+    Yields:
+        The piece planes and the features of each shard, as read-only memory
+        maps.
+    """
+    for planes_path in sorted(Path(directory).glob('planes-*.npy')):
+        features_path = planes_path.with_name(
+            planes_path.name.replace('planes-', 'features-', 1))
+        yield (np.load(planes_path, mmap_mode='r'),
+               np.load(features_path, mmap_mode='r'))
+
+
+def _iter_chunks(packed_positions: Iterable[bytes],
+                 chunk_bytes: int) -> Iterator[bytes]:
+    """Regroup byte strings of packed positions into chunks of a given size,
+    except for the last one."""
+    buffer = bytearray()
+    for data in packed_positions:
+        buffer += data
+        while len(buffer) >= chunk_bytes:
+            yield bytes(buffer[:chunk_bytes])
+            del buffer[:chunk_bytes]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _write_shard(data: bytes, directory: Path, index: int) -> Shard:
+    """Encode a chunk of packed positions into the files of a shard."""
+    count = len(data) // Gameboard.PACKED_SIZE
+    planes_path = directory / f'planes-{index:05d}.npy'
+    features_path = directory / f'features-{index:05d}.npy'
+
+    # New memory-mapped files are zeroed, so only the pieces are written
+    planes = open_memmap(planes_path, mode='w+', dtype=np.uint8,
+                         shape=(count, PLANES, 8, 8))
+    _, features = encode_packed(data, planes)
+    planes.flush()
+    del planes
+    np.save(features_path, features)
+    return Shard(planes_path, features_path, count)
+
+
+def _pack_game(game: pgn.PgnGame) -> bytes:
+    """Pack every position of a game, from the starting position on."""
+    return b''.join(gameboard.pack() for gameboard in game.replay())
+
+
+_SQUARE_SHIFTS = np.arange(64, dtype=np.uint64)
+_CASTLING_SHIFTS = np.arange(1, 5, dtype=np.uint8)
@@ -0,0 +1,166 @@
+# transposition_table.py
+
+from array import array
+from typing import NamedTuple
+
+
+class TableEntry(NamedTuple):
+    """A search result stored in the transposition table."""
+    depth: int
+    score: int
+    bound: int
+    move: int
+
+
+class TranspositionTable:
+    """A fixed-size hash table of search results, keyed by Zobrist hash.
+
+    The table is a single preallocated array of 64-bit words. It is split
+    into buckets of two entries, and each entry is two words: the position's
+    hash XORed with the packed entry data, and the data itself. The first
+    entry of a bucket is replaced only by results of at least the same depth
+    (or from an older search), and the second entry is always replaced, so
+    deep results survive while recent shallow ones are still kept.
+
+    The words can live in a shared buffer, e.g. shared memory, so that
+    several processes search with the same table without locking. Storing
+    the hash XORed with the data means an entry torn by concurrent writes
+    fails the hash check on probing and is ignored.
+    """
+    # The kinds of bounds the stored score can be
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+
+    ENTRY_BYTES = 16
+    BUCKET_ENTRIES = 2
+    _BUCKET_WORDS = 2 * BUCKET_ENTRIES
+
+    # The layout of the packed entry data
+    _MOVE_MASK = 0xFFFF
+    _DEPTH_SHIFT = 16
+    _BOUND_SHIFT = 24
+    _AGE_SHIFT = 26
+    _SCORE_SHIFT = 32
+    _SCORE_OFFSET = 1 << 31
+
+    def __init__(self, size_mb: float = 16,
+                 buffer: memoryview | bytearray | None = None) -> None:
+        """Initialize a table within a memory budget.
+
+        Args:
+            size_mb: The memory budget in megabytes. The number of buckets is
+              the largest power of two that fits in the budget.
+            buffer: A writable buffer of at least table_bytes(size_mb) bytes to
+              store the table in, e.g. the buffer of a SharedMemory object.
+              Its contents are used as they are, so a new buffer must be
+              zeroed. If None, the table allocates its own storage.
+        """
+        self._num_buckets = self._bucket_count(size_mb)
+        self._index_mask = self._num_buckets - 1
+        if buffer is None:
+            self._words = array('Q', bytes(self.size_bytes))
+        else:
+            self._words = memoryview(buffer)[:self.size_bytes].cast('Q')
+        # The age of the current search, see new_search
+        self._age = 0
+
+    @classmethod
+    def _bucket_count(cls, size_mb: float) -> int:
+        bucket_bytes = cls.BUCKET_ENTRIES * cls.ENTRY_BYTES
+        max_buckets = max(1, int(size_mb * 1024 * 1024) // bucket_bytes)
+        return 1 << (max_buckets.bit_length() - 1)
+
+    @classmethod
+    def table_bytes(cls, size_mb: float) -> int:
+        """Get the storage size in bytes of a table with the given memory
+        budget."""
+        return (cls._bucket_count(size_mb) * cls.BUCKET_ENTRIES *
+                cls.ENTRY_BYTES)
+
+    @property
+    def num_entries(self) -> int:
+        """The number of entries the table can hold."""
+        return self._num_buckets * self.BUCKET_ENTRIES
+
+    @property
+    def size_bytes(self) -> int:
+        """The size of the table's storage in bytes."""
+        return self._num_buckets * self.BUCKET_ENTRIES * self.ENTRY_BYTES
+
+    def clear(self) -> None:
+        """Remove all entries from the table."""
+        self._words[:] = array('Q', bytes(self.size_bytes))
+        self._age = 0
+
+    def release(self) -> None:
+        """Release the table's view of an external buffer, so that the buffer
+        can be closed. The table can't be used afterwards."""
+        if isinstance(self._words, memoryview):
+            self._words.release()
+
+    def new_search(self) -> None:
+        """Mark the start of a new search, so that entries stored by earlier
+        searches can be replaced regardless of their depth."""
+        self._age = (self._age + 1) & 63
+
+    def probe(self, key: int) -> TableEntry | None:
+        """Look up the entry for a position.
+
+        Args:
+            key: The Zobrist hash of the position.
+
+        Returns:
+            The entry for the position, or None if there is none.
+        """
+        words = self._words
+        offset = (key & self._index_mask) * self._BUCKET_WORDS
+        for entry_offset in (offset, offset + 2):
+            data = words[entry_offset + 1]
+            if data and words[entry_offset] ^ data == key:
+                return TableEntry(
+                    data >> self._DEPTH_SHIFT & 0xFF,
+                    (data >> self._SCORE_SHIFT) - self._SCORE_OFFSET,
+                    data >> self._BOUND_SHIFT & 3,
+                    data & self._MOVE_MASK)
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int,
+              move: int) -> None:
+        """Store a search result for a position.
+
+        Args:
+            key: The Zobrist hash of the position.
+            depth: The depth the position was searched to (0-255).
+            score: The score of the position, which must fit in 32 bits.
+            bound: Whether the score is exact, a lower bound or an upper bound,
+              e.g. TranspositionTable.EXACT.
+            move: The best move found, encoded as in move.py, or 0 if none.
+        """
+        data = (move |
+                depth << self._DEPTH_SHIFT |
+                bound << self._BOUND_SHIFT |
+                self._age << self._AGE_SHIFT |
+                (score + self._SCORE_OFFSET) << self._SCORE_SHIFT)
+
+        words = self._words
+        offset = (key & self._index_mask) * self._BUCKET_WORDS
+        stored_data = words[offset + 1]
+        if (not stored_data or words[offset] ^ stored_data == key or
+                depth >= stored_data >> self._DEPTH_SHIFT & 0xFF or
+                stored_data >> self._AGE_SHIFT & 63 != self._age):
+            # Depth-preferred entry
+            words[offset] = key ^ data
+            words[offset + 1] = data
+        else:
+            # Always-replace entry
+            words[offset + 2] = key ^ data
+            words[offset + 3] = data
+
+    def hashfull(self) -> int:
+        """Estimate how full the table is, in permille, from a sample of the
+        first buckets."""
+        words = self._words
+        sample = min(1000, self.num_entries)
+        used = sum(1 for entry in range(sample) if words[2 * entry + 1])
+        return used * 1000 // sample
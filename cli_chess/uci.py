@@ -0,0 +1,378 @@
+# uci.py
+
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TextIO
+
+from .engine import MATE_SCORE, MATE_THRESHOLD, Engine, SearchResult
+from .error import InvalidFenError
+from .game_record import GameRecord
+from .gameboard import Gameboard
+from .move import move_from_uci, move_to_uci
+from .move_generator import generate_legal_moves
+from .parallel_search import ParallelEngine
+
+# The Universal Chess Interface (UCI) is the text protocol that chess GUIs and
+# match runners use to talk to engines over stdin and stdout. The session
+# reads commands on the asyncio event loop and searches in a worker thread,
+# so that commands like 'stop' and 'isready' are answered while the engine is
+# thinking.
+
+ENGINE_NAME = 'cli_chess'
+ENGINE_AUTHOR = 'the cli_chess authors'
+
+# The options the engine supports, as (name, type, default, minimum, maximum)
+OPTIONS = (
+    ('Hash', 'spin', 16, 1, 4096),
+    ('Threads', 'spin', 1, 1, 64),
+    ('Ponder', 'check', False, None, None),
+)
+
+# The time kept in reserve for communication when managing the clock, in
+# seconds, and the number of moves the remaining time is split over when the
+# GUI doesn't give a number of moves to the next time control
+MOVE_OVERHEAD = 0.05
+DEFAULT_MOVES_TO_GO = 30
+
+_START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+
+class UciSession:
+    """A UCI session that reads commands and writes responses."""
+
+    def __init__(self, output: TextIO = sys.stdout) -> None:
+        """Initialize a session.
+
+        Args:
+            output: The stream the responses are written to.
+        """
+        self._output = output
+        self._options = {name.lower(): default
+                         for name, _, default, _, _ in OPTIONS}
+        self._engine: Engine | ParallelEngine | None = None
+        # The game up to the position to search, so that the search can avoid
+        # or seek repetitions of earlier positions
+        self._record = GameRecord()
+
+        # The search runs in its own thread, and reading input in another one
+        # so that a blocking read never holds up the event loop
+        self._search_executor = ThreadPoolExecutor(1)
+        self._input_executor = ThreadPoolExecutor(1)
+        self._search_task: asyncio.Future | None = None
+        # Set to stop the search, and checked by Engine itself between nodes
+        self._stop_event = threading.Event()
+        # Set when the GUI allows the bestmove to be sent, which for infinite
+        # and ponder searches is only after 'stop' or 'ponderhit'
+        self._may_send_bestmove = asyncio.Event()
+        self._pondering = False
+        self._ponder_time_limit: float | None = None
+        self._stop_timer: asyncio.TimerHandle | None = None
+
+    async def run(self, input_stream: TextIO = sys.stdin) -> None:
+        """Handle commands until 'quit' or the end of the input."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await loop.run_in_executor(self._input_executor,
+                                                  input_stream.readline)
+                if not line or not await self.handle(line):
+                    break
+        finally:
+            await self._stop_search()
+            self.close()
+
+    def close(self) -> None:
+        """Free the engine and the worker threads."""
+        if isinstance(self._engine, ParallelEngine):
+            self._engine.close()
+        self._engine = None
+        self._search_executor.shutdown(wait=False)
+        self._input_executor.shutdown(wait=False)
+
+    async def handle(self, line: str) -> bool:
+        """Handle a command.
+
+        Args:
+            line: The command line, e.g. 'go movetime 1000'.
+
+        Returns:
+            False if the command is 'quit', otherwise True.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == 'quit':
+            return False
+        if command == 'uci':
+            self._send(f'id name {ENGINE_NAME}')
+            self._send(f'id author {ENGINE_AUTHOR}')
+            for name, option_type, default, minimum, maximum in OPTIONS:
+                if option_type == 'check':
+                    self._send(f'option name {name} type check default '
+                               f'{str(default).lower()}')
+                else:
+                    self._send(f'option name {name} type spin default '
+                               f'{default} min {minimum} max {maximum}')
+            self._send('uciok')
+        elif command == 'isready':
+            # Answered right away, even while searching
+            self._send('readyok')
+        elif command == 'setoption':
+            await self._stop_search()
+            self._set_option(arguments)
+        elif command == 'ucinewgame':
+            await self._stop_search()
+            if self._engine is not None:
+                self._engine.new_game()
+            self._record = GameRecord()
+        elif command == 'position':
+            await self._stop_search()
+            self._set_position(arguments)
+        elif command == 'go':
+            await self._stop_search()
+            self._start_search(arguments)
+        elif command == 'stop':
+            await self._stop_search()
+        elif command == 'ponderhit':
+            self._ponder_hit()
+        elif command not in ('debug', 'register'):
+            self._send(f'info string unknown command: {command}')
+        return True
+
+    def _send(self, line: str) -> None:
+        self._output.write(line + '\n')
+        self._output.flush()
+
+    def _set_option(self, arguments: list[str]) -> None:
+        """Set an option from the arguments of 'setoption name ... value ...'.
+        """
+        if 'name' not in arguments:
+            return
+        name_start = arguments.index('name') + 1
+        value_start = (arguments.index('value')
+                       if 'value' in arguments else len(arguments))
+        name = ' '.join(arguments[name_start:value_start]).lower()
+        value = ' '.join(arguments[value_start + 1:])
+
+        for option_name, option_type, _, minimum, maximum in OPTIONS:
+            if option_name.lower() != name:
+                continue
+            if option_type == 'check':
+                self._options[name] = value.lower() == 'true'
+            else:
+                try:
+                    self._options[name] = min(max(int(value), minimum),
+                                              maximum)
+                except ValueError:
+                    self._send(f'info string invalid value for {option_name}: '
+                               f'{value}')
+                    return
+            if name in ('hash', 'threads'):
+                # The engine is created again with the new settings
+                if isinstance(self._engine, ParallelEngine):
+                    self._engine.close()
+                self._engine = None
+            return
+        self._send(f'info string unknown option: {name}')
+
+    def _set_position(self, arguments: list[str]) -> None:
+        """Set up the position from the arguments of 'position [startpos |
+        fen <fen>] [moves <moves>]'."""
+        moves_start = (arguments.index('moves')
+                       if 'moves' in arguments else len(arguments))
+        if arguments[:1] == ['startpos']:
+            fen = _START_FEN
+        elif arguments[:1] == ['fen']:
+            fen = ' '.join(arguments[1:moves_start])
+        else:
+            self._send('info string invalid position command')
+            return
+
+        try:
+            record = GameRecord(Gameboard.from_fen(fen))
+            for text in arguments[moves_start + 1:]:
+                move = move_from_uci(text)
+                gameboard = record.gameboard
+                if move not in generate_legal_moves(gameboard, gameboard.turn):
+                    raise ValueError(f"illegal move: '{text}'")
+                record.play(move)
+        except (InvalidFenError, ValueError) as error:
+            self._send(f'info string invalid position: {error}')
+            return
+        self._record = record
+
+    def _start_search(self, arguments: list[str]) -> None:
+        """Start searching with the limits given by the arguments of 'go'."""
+        parameters = _parse_go(arguments)
+        infinite = 'infinite' in parameters
+        self._pondering = 'ponder' in parameters
+        time_limit = None
+        if not infinite:
+            time_limit = _allocate_time(parameters,
+                                        self._record.gameboard.turn)
+        if self._pondering:
+            # The clock only starts on 'ponderhit'
+            self._ponder_time_limit = time_limit
+            time_limit = None
+
+        if self._engine is None:
+            self._engine = self._create_engine()
+        self._stop_event.clear()
+        if infinite or self._pondering:
+            self._may_send_bestmove.clear()
+        else:
+            self._may_send_bestmove.set()
+
+        loop = asyncio.get_running_loop()
+        engine = self._engine
+        gameboard = self._record.gameboard
+        history = self._record.history()
+        depth = parameters.get('depth')
+        if depth is None and 'mate' in parameters:
+            # A mate in n moves is found within 2n - 1 plies
+            depth = max(1, 2 * parameters['mate'] - 1)
+        node_limit = parameters.get('nodes')
+
+        def on_iteration(result: SearchResult) -> None:
+            loop.call_soon_threadsafe(self._send, _format_info(result))
+
+        def search() -> SearchResult:
+            return engine.search(gameboard, depth=depth, time_limit=time_limit,
+                                 node_limit=node_limit,
+                                 on_iteration=on_iteration, history=history)
+
+        self._search_task = asyncio.ensure_future(self._finish_search(
+            loop.run_in_executor(self._search_executor, search)))
+
+    async def _finish_search(self, search: asyncio.Future) -> None:
+        result = await search
+        # An infinite or ponder search that ends early, e.g. by finding a
+        # mate, waits for the GUI
+        await self._may_send_bestmove.wait()
+        if self._stop_timer is not None:
+            self._stop_timer.cancel()
+            self._stop_timer = None
+
+        if result.best_move:
+            bestmove = f'bestmove {move_to_uci(result.best_move)}'
+            if len(result.pv) > 1:
+                bestmove += f' ponder {move_to_uci(result.pv[1])}'
+        else:
+            bestmove = 'bestmove 0000'
+        self._send(bestmove)
+
+    async def _stop_search(self) -> None:
+        """Stop the current search, if any, and wait for its bestmove."""
+        task = self._search_task
+        if task is None:
+            return
+        self._may_send_bestmove.set()
+        # The engine forgets a stop that comes in before its search starts,
+        # so it's repeated until the search is over
+        while not task.done():
+            self._request_stop()
+            await asyncio.wait({task}, timeout=0.05)
+        self._search_task = None
+        task.result()
+
+    def _ponder_hit(self) -> None:
+        """Switch from pondering to searching on the engine's own clock."""
+        if self._search_task is None or not self._pondering:
+            return
+        self._pondering = False
+        self._may_send_bestmove.set()
+        if self._ponder_time_limit is not None:
+            loop = asyncio.get_running_loop()
+            self._stop_timer = loop.call_later(self._ponder_time_limit,
+                                               self._request_stop)
+
+    def _request_stop(self) -> None:
+        self._stop_event.set()
+        if self._engine is not None:
+            self._engine.stop()
+
+    def _create_engine(self) -> Engine | ParallelEngine:
+        hash_mb = self._options['hash']
+        threads = self._options['threads']
+        if threads > 1:
+            # ParallelEngine has a stop event of its own, which stop() sets
+            return ParallelEngine(threads, hash_mb)
+        return Engine(hash_mb, stop_event=self._stop_event)
+
+
+def run(input_stream: TextIO = sys.stdin,
+        output: TextIO = sys.stdout) -> None:
+    """Run a UCI session until 'quit' or the end of the input."""
+    asyncio.run(UciSession(output).run(input_stream))
+
+
+def _parse_go(arguments: list[str]) -> dict[str, int | bool]:
+    """Parse the arguments of 'go', e.g. ['wtime', '1000', 'infinite'].
+
+    Returns:
+        The numeric parameters by name, and True for the flags.
+    """
+    parameters: dict[str, int | bool] = {}
+    index = 0
+    while index < len(arguments):
+        name = arguments[index]
+        if name in _GO_FLAGS:
+            parameters[name] = True
+        elif name in _GO_NUMBERS and index + 1 < len(arguments):
+            index += 1
+            try:
+                parameters[name] = int(arguments[index])
+            except ValueError:
+                pass
+        index += 1
+    return parameters
+
+
+def _allocate_time(parameters: dict[str, int | bool],
+                   color: str) -> float | None:
+    """Get the time to search for a move in seconds, or None for no limit.
+
+    A fixed time per move is used as it is, and otherwise the remaining time
+    is split over the moves to the next time control, plus most of the
+    increment.
+    """
+    if 'movetime' in parameters:
+        return max(0.001, parameters['movetime'] / 1000 - MOVE_OVERHEAD)
+
+    prefix = 'w' if color == 'w' else 'b'
+    remaining = parameters.get(f'{prefix}time')
+    if remaining is None:
+        return None
+    remaining /= 1000
+    increment = parameters.get(f'{prefix}inc', 0) / 1000
+    moves_to_go = parameters.get('movestogo') or DEFAULT_MOVES_TO_GO
+
+    time_limit = remaining / moves_to_go + increment * 0.75
+    # Never use more than half of the clock on one move
+    time_limit = min(time_limit, remaining / 2) - MOVE_OVERHEAD
+    return max(0.001, time_limit)
+
+
+def _format_info(result: SearchResult) -> str:
+    """Format the result of a search iteration as an 'info' line."""
+    milliseconds = int(result.seconds * 1000)
+    nps = int(result.nodes / result.seconds) if result.seconds else 0
+    if abs(result.score) < MATE_THRESHOLD:
+        score = f'cp {result.score}'
+    else:
+        moves_to_mate = (MATE_SCORE - abs(result.score) + 1) // 2
+        score = f'mate {moves_to_mate if result.score > 0 else -moves_to_mate}'
+    info = (f'info depth {result.depth} score {score} nodes {result.nodes} '
+            f'nps {nps} time {milliseconds}')
+    if result.pv:
+        info += ' pv ' + ' '.join(move_to_uci(move) for move in result.pv)
+    return info
+
+
+_GO_FLAGS = {'infinite', 'ponder'}
+_GO_NUMBERS = {'wtime', 'btime', 'winc', 'binc', 'movestogo', 'depth',
+               'nodes', 'movetime', 'mate'}
@@ -0,0 +1,65 @@
+# zobrist.py
+
+import random
+from typing import TYPE_CHECKING
+
+from . import bitboard
+from .piece import ChessColor, Piece
+
+if TYPE_CHECKING:
+    from .gameboard import Gameboard
+
+# Random 64-bit keys for Zobrist hashing. The hash of a position is the XOR of
+# the keys of its features, so playing a move only needs to XOR in the keys of
+# the features that change. A fixed seed keeps the hashes stable between runs,
+# so that they can be stored.
+_rng = random.Random(0x5EED_C4E55)
+_PAWN = Piece.ORDER.index(Piece.PAWN)
+
+# Indexed by Piece.index * 64 + square index
+PIECE_KEYS = [_rng.getrandbits(64)
+              for _ in range(2 * len(Piece.ORDER) * bitboard.NUM_SQUARES)]
+# The piece keys of the pawns and zero for other pieces, indexed like
+# PIECE_KEYS, for the hash of the pawn structure
+PAWN_KEYS = [key if index >> 6 in (_PAWN, len(Piece.ORDER) + _PAWN) else 0
+             for index, key in enumerate(PIECE_KEYS)]
+# Indexed by the castling rights bit flags (see Gameboard.WHITE_KINGSIDE)
+CASTLING_KEYS = [_rng.getrandbits(64) for _ in range(16)]
+CASTLING_KEYS[0] = 0
+# Indexed by the file of the en passant square
+EN_PASSANT_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+# XORed in when black is to move
+BLACK_TO_MOVE_KEY = _rng.getrandbits(64)
+
+del _rng, _PAWN
+
+
+def compute_hash(gameboard: 'Gameboard') -> int:
+    """Compute the Zobrist hash of a position from scratch.
+
+    Gameboard keeps its hash up to date incrementally, so this is only needed
+    to initialize it or to check it.
+
+    Args:
+        gameboard: The Gameboard object.
+
+    Returns:
+        The 64-bit Zobrist hash of the position.
+    """
+    board = gameboard.view()
+    zobrist_hash = 0
+
+    for color in ChessColor.ORDER:
+        color_offset = ChessColor.ORDER.index(color) * len(Piece.ORDER)
+        for piece_type, pieces in enumerate(board.get_piece_bitboards(color)):
+            offset = (color_offset + piece_type) * bitboard.NUM_SQUARES
+            for square in bitboard.iter_squares(pieces):
+                zobrist_hash ^= PIECE_KEYS[offset + square]
+
+    zobrist_hash ^= CASTLING_KEYS[board.castling_rights]
+    if board.en_passant is not None:
+        zobrist_hash ^= EN_PASSANT_KEYS[board.en_passant & 7]
+    if gameboard.turn == ChessColor.BLACK:
+        zobrist_hash ^= BLACK_TO_MOVE_KEY
+
+    return zobrist_hash
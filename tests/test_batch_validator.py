@@ -0,0 +1,130 @@
+# test_batch_validator.py
+
+import random
+import re
+
+import pytest
+
+from ..cli_chess import bitboard, move_validator
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move_generator import generate_legal_moves
+
+np = pytest.importorskip('numpy')
+
+from ..cli_chess import batch_validator  # noqa: E402
+
+
+def _random_positions(count, seed):
+    rng = random.Random(seed)
+    gameboards = []
+    for _ in range(count):
+        gameboard = Gameboard()
+        for _ in range(rng.randrange(40)):
+            moves = generate_legal_moves(gameboard, gameboard.turn)
+            if not moves:
+                break
+            gameboard.make_move(rng.choice(moves))
+        gameboards.append(gameboard)
+    return gameboards
+
+
+def test_parse_squares():
+    squares = batch_validator.parse_squares(['a1', 'h8', 'E4', 'ax', 'i9'])
+    assert squares.tolist() == [0, 63, 28, -1, -1]
+
+
+def test_matches_is_legal_move():
+    gameboards = _random_positions(20, seed=0)
+    positions = batch_validator.PositionBatch.from_gameboards(gameboards)
+    rng = random.Random(1)
+
+    position_indices, starts, ends, expected = [], [], [], []
+    for position_index, gameboard in enumerate(gameboards):
+        own = gameboard.get_occupancy(gameboard.turn)
+        own_squares = list(bitboard.iter_squares(own))
+        for _ in range(200):
+            # Mostly moves of the player's own pieces, so that the piece
+            # rules are exercised
+            start = (rng.choice(own_squares) if rng.random() < 0.8 else
+                     rng.randrange(64))
+            end = rng.randrange(64)
+            position_indices.append(position_index)
+            starts.append(start)
+            ends.append(end)
+            expected.append(bool(move_validator.is_legal_move(
+                bitboard.index_to_square(start), bitboard.index_to_square(end),
+                gameboard.turn, gameboard)))
+
+    legal = batch_validator.validate_moves(positions, position_indices,
+                                           starts, ends)
+    assert legal.tolist() == expected
+    assert any(expected) and not all(expected)
+
+
+def test_generated_moves_are_legal():
+    gameboards = _random_positions(10, seed=2)
+    positions = batch_validator.PositionBatch.from_gameboards(gameboards)
+
+    position_indices, starts, ends = [], [], []
+    for position_index, gameboard in enumerate(gameboards):
+        for move in generate_legal_moves(gameboard, gameboard.turn):
+            start, end = move & 63, move >> 6 & 63
+            # Castling isn't allowed by is_legal_move either
+            if abs(start - end) == 2 and gameboard.view().get_piece_at(
+                    start).symbol == 'K':
+                continue
+            position_indices.append(position_index)
+            starts.append(start)
+            ends.append(end)
+
+    assert batch_validator.validate_moves(positions, position_indices,
+                                          starts, ends).all()
+
+
+def test_invalid_squares_are_illegal():
+    positions = batch_validator.PositionBatch.from_gameboards([Gameboard()])
+    squares = batch_validator.parse_squares(['e2', 'e4', 'e2', 'ax'])
+    legal = batch_validator.validate_moves(positions, [0, 0], squares[0::2],
+                                           squares[1::2])
+    assert legal.tolist() == [True, False]
+
+
+def test_king_on_every_square():
+    # Whether the king is left attacked is checked from its square, which
+    # is taken from its bitboard
+    rng = random.Random(3)
+    gameboards = []
+    for king in range(64):
+        while True:
+            pieces = dict(zip(rng.sample(range(64), 3), 'kNq'))
+            black_king = next(square for square, symbol in pieces.items()
+                              if symbol == 'k')
+            # Kings may not stand next to each other
+            if king not in pieces and (
+                    abs((king & 7) - (black_king & 7)) > 1 or
+                    abs((king >> 3) - (black_king >> 3)) > 1):
+                break
+        pieces[king] = 'K'
+        ranks = (''.join(pieces.get(rank * 8 + file, '1')
+                         for file in range(8)) for rank in range(7, -1, -1))
+        placement = re.sub('1+', lambda run: str(len(run.group())),
+                           '/'.join(ranks))
+        gameboards.append(Gameboard.from_fen(placement + ' w - - 0 1'))
+    positions = batch_validator.PositionBatch.from_gameboards(gameboards)
+
+    position_indices, starts, ends, expected = [], [], [], []
+    for position_index, gameboard in enumerate(gameboards):
+        for start in bitboard.iter_squares(
+                gameboard.get_occupancy(gameboard.turn)):
+            for end in range(64):
+                position_indices.append(position_index)
+                starts.append(start)
+                ends.append(end)
+                expected.append(bool(move_validator.is_legal_move(
+                    bitboard.index_to_square(start),
+                    bitboard.index_to_square(end), gameboard.turn,
+                    gameboard)))
+
+    legal = batch_validator.validate_moves(positions, position_indices,
+                                           starts, ends)
+    assert legal.tolist() == expected
@@ -0,0 +1,46 @@
+# test_bitboard.py
+
+from ..cli_chess import bitboard
+
+
+def test_square_to_index():
+    assert bitboard.square_to_index('a1') == 0
+    assert bitboard.square_to_index('h1') == 7
+    assert bitboard.square_to_index('e4') == 28
+    assert bitboard.square_to_index('h8') == 63
+
+
+def test_index_to_square():
+    for index in range(64):
+        assert bitboard.square_to_index(bitboard.index_to_square(index)) == index
+
+
+def test_row_col_to_index():
+    assert bitboard.row_col_to_index(0, 0) == bitboard.square_to_index('a8')
+    assert bitboard.row_col_to_index(7, 7) == bitboard.square_to_index('h1')
+    assert bitboard.index_to_row_col(bitboard.square_to_index('e4')) == (4, 4)
+
+
+def test_iter_squares():
+    squares = bitboard.square_bit(3) | bitboard.square_bit(17) | (1 << 63)
+    assert list(bitboard.iter_squares(squares)) == [3, 17, 63]
+    assert list(bitboard.iter_squares(bitboard.EMPTY)) == []
+    assert bitboard.popcount(squares) == 3
+    assert bitboard.lsb(squares) == 3
+
+
+def test_ray_between():
+    def between(start_coords, end_coords):
+        return set(bitboard.iter_squares(bitboard.ray_between(
+            bitboard.square_to_index(start_coords),
+            bitboard.square_to_index(end_coords))))
+
+    def squares(*coords):
+        return {bitboard.square_to_index(square) for square in coords}
+
+    assert between('a1', 'a4') == squares('a2', 'a3')
+    assert between('h1', 'e1') == squares('g1', 'f1')
+    assert between('a1', 'd4') == squares('b2', 'c3')
+    assert between('e4', 'e5') == set()
+    assert between('e4', 'f6') == set()
+    assert between('e4', 'e4') == set()
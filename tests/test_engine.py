@@ -0,0 +1,82 @@
+# test_engine.py
+
+import threading
+
+from ..cli_chess.engine import MATE_SCORE, Engine, evaluate
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move import move_to_uci
+
+EMPTY_ROW = ['   '] * 8
+
+
+def test_evaluate_is_relative_to_player_to_move():
+    assert evaluate(Gameboard()) == 0
+
+    gameboard = Gameboard()
+    gameboard.play_move('d1', 'd7')
+    assert evaluate(gameboard) < -50
+    gameboard.unmake_move()
+    gameboard.play_move('e2', 'e4')
+    assert evaluate(gameboard) < 0
+
+
+def test_finds_mate_in_one():
+    board_state = [
+        ['   ', '   ', '   ', '   ', '   ', '   ', 'K_b', '   '],
+        ['   ', '   ', '   ', '   ', '   ', 'P_b', 'P_b', 'P_b'],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['R_w', '   ', '   ', '   ', '   ', '   ', 'K_w', '   '],
+    ]
+    gameboard = Gameboard(board_state)
+    result = Engine(1).search(gameboard, depth=4)
+
+    assert move_to_uci(result.best_move) == 'a1a8'
+    assert result.score == MATE_SCORE - 1
+    assert result.pv[0] == result.best_move
+
+
+def test_wins_hanging_queen():
+    board_state = [
+        ['   ', '   ', '   ', '   ', 'K_b', '   ', '   ', '   '],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['   ', '   ', '   ', 'Q_b', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', 'P_w', '   ', '   ', '   '],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['   ', '   ', '   ', '   ', 'K_w', '   ', '   ', '   '],
+    ]
+    gameboard = Gameboard(board_state)
+    result = Engine(1).search(gameboard, depth=3)
+    assert move_to_uci(result.best_move) == 'e4d5'
+
+
+def test_limits_leave_board_unchanged():
+    gameboard = Gameboard()
+    zobrist_hash = gameboard.zobrist_hash
+    engine = Engine(1)
+
+    result = engine.search(gameboard, node_limit=3000)
+    assert result.best_move
+    assert result.nodes < 3000 + 1024
+    assert gameboard.zobrist_hash == zobrist_hash
+    assert gameboard.ply == 0
+
+    result = engine.search(gameboard, time_limit=0.05)
+    assert result.best_move
+    assert gameboard.ply == 0
+
+
+def test_stop_from_another_thread():
+    engine = Engine(1)
+    timer = threading.Timer(0.1, engine.stop)
+    timer.start()
+    result = engine.search(Gameboard())
+    timer.join()
+
+    assert result.best_move
+    assert result.depth < 100
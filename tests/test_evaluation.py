@@ -0,0 +1,58 @@
+# test_evaluation.py
+
+import random
+
+from ..cli_chess.evaluation import (MAX_PHASE, PawnHashTable, evaluate,
+                                    pawn_structure_scores)
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move_generator import generate_legal_moves
+
+
+def _scores(gameboard):
+    return (gameboard.midgame_score, gameboard.endgame_score,
+            gameboard.phase, gameboard.pawn_hash)
+
+
+def test_incremental_scores_match_fresh_board():
+    rng = random.Random(3)
+    gameboard = Gameboard()
+    start_scores = _scores(gameboard)
+    assert start_scores[:3] == (0, 0, MAX_PHASE)
+
+    for _ in range(200):
+        moves = generate_legal_moves(gameboard, gameboard.turn)
+        if not moves:
+            break
+        gameboard.make_move(rng.choice(moves))
+        assert _scores(gameboard) == _scores(
+            Gameboard.from_fen(gameboard.to_fen()))
+
+    while gameboard.ply:
+        gameboard.unmake_move()
+    assert _scores(gameboard) == start_scores
+
+
+def test_evaluate_is_symmetric():
+    fen = 'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4'
+    mirrored = ('rnbqk2r/pppp1ppp/5n2/2b1p3/4P3/2N2N2/PPPP1PPP/R1BQKB1R '
+                'b KQkq - 4 4')
+    assert evaluate(Gameboard.from_fen(fen)) == evaluate(
+        Gameboard.from_fen(mirrored))
+
+
+def test_pawn_structure():
+    # White has doubled, isolated c-pawns, black a passed pawn on a3
+    gameboard = Gameboard.from_fen('4k3/8/8/8/2P5/p1P5/8/4K3 w - - 0 1')
+    midgame, endgame = pawn_structure_scores(gameboard)
+    assert midgame < 0 and endgame < midgame
+
+    # The kings and pieces don't change the pawn hash
+    other = Gameboard.from_fen('3qk3/8/8/8/2P5/p1P5/8/3RK3 b - - 0 1')
+    assert other.pawn_hash == gameboard.pawn_hash
+
+    table = PawnHashTable(1000)
+    assert len(table) == 512
+    assert table.scores(gameboard) == (midgame, endgame)
+    assert table.scores(other) == (midgame, endgame)
+    assert (table.hits, table.misses) == (1, 1)
+    assert evaluate(gameboard, table) == evaluate(gameboard)
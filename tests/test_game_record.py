@@ -0,0 +1,120 @@
+# test_game_record.py
+
+import pytest
+
+from ..cli_chess.engine import Engine
+from ..cli_chess.game_record import GameRecord
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move import move_from_uci
+from ..cli_chess.move_generator import generate_legal_moves
+
+# Knight moves that return to the starting position after four plies
+_KNIGHT_SHUFFLE = ['g1f3', 'g8f6', 'f3g1', 'f6g8']
+
+
+def _play(record, moves):
+    for text in moves:
+        record.play(move_from_uci(text))
+
+
+def test_threefold_repetition():
+    record = GameRecord()
+    start_hash = record.gameboard.zobrist_hash
+    assert record.repetitions() == 1
+
+    _play(record, _KNIGHT_SHUFFLE)
+    assert record.repetitions() == 2
+    assert not record.is_threefold_repetition()
+    _play(record, _KNIGHT_SHUFFLE)
+    assert record.repetitions() == 3
+    assert record.is_threefold_repetition()
+    assert record.ply == len(record) == 8
+    assert record.hashes[0] == record.hashes[8] == start_hash
+
+    record.undo()
+    assert not record.is_threefold_repetition()
+    assert record.repetitions() == 2
+
+    # A pawn move makes the earlier positions unrepeatable, and taking it
+    # back makes them count again
+    _play(record, ['e2e4'])
+    assert record.repetitions() == 1
+    record.undo()
+    assert record.repetitions() == 2
+    _play(record, ['f6g8'])
+    assert record.is_threefold_repetition()
+
+
+def test_fifty_move_draw():
+    record = GameRecord(Gameboard.from_fen(
+        '8/8/8/3k4/8/8/8/KR6 w - - 98 80'))
+    _play(record, ['b1b2'])
+    assert not record.is_fifty_move_draw()
+    _play(record, ['d5d4'])
+    assert record.is_fifty_move_draw()
+    record.undo()
+    assert not record.is_fifty_move_draw()
+
+
+def test_undo_to():
+    record = GameRecord()
+    _play(record, ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5'])
+    fen = record.gameboard.to_fen()
+    _play(record, ['a7a6', 'b5c6', 'd7c6'])
+
+    record.undo_to(5)
+    assert record.gameboard.to_fen() == fen
+    assert len(record.moves) == 5 and len(record.hashes) == 6
+    record.undo_to(0)
+    assert record.gameboard.to_fen() == record.start_fen
+
+    with pytest.raises(ValueError):
+        record.undo_to(1)
+    with pytest.raises(IndexError):
+        record.undo()
+
+
+def test_undo_special_moves():
+    record = GameRecord(Gameboard.from_fen(
+        'r3k2r/1P6/8/8/3p4/8/4P3/R3K2R w KQkq - 7 20'))
+    fens = [record.gameboard.to_fen()]
+    # A double pawn push, en passant, castling, and a promotion with capture
+    for text in ['e2e4', 'd4e3', 'e1g1', 'e8c8', 'b7a8q', 'c8b7']:
+        _play(record, [text])
+        fens.append(record.gameboard.to_fen())
+    # The moves are recorded in the game record instead of on the board's
+    # undo stack
+    assert record.gameboard.ply == 0
+
+    while record.ply:
+        fens.pop()
+        record.undo()
+        assert record.gameboard.to_fen() == fens[-1]
+
+
+def test_history_and_from_moves():
+    moves = [move_from_uci(text) for text in
+             ['e2e4', 'e7e5'] + _KNIGHT_SHUFFLE]
+    record = GameRecord.from_moves(moves)
+    assert list(record.moves) == moves
+    assert record.nbytes() == 6 * 2 + 6 * 2 + 7 * 8 + 7 * 2
+    # Only the positions since the last pawn move can repeat
+    assert list(record.history()) == list(record.hashes[2:6])
+
+    fen = 'k7/8/8/8/8/8/8/K7 w - - 0 1'
+    record = GameRecord.from_moves([move_from_uci('a1a2')], fen)
+    assert record.start_fen == fen
+    assert record.gameboard.to_fen() == 'k7/8/8/8/8/8/K7/8 b - - 1 1'
+
+
+def test_engine_avoids_history():
+    # White is a queen up, but every move repeats a position of the game
+    gameboard = Gameboard.from_fen('7k/8/8/8/8/8/8/KQ6 w - - 50 80')
+    history = []
+    for move in generate_legal_moves(gameboard, gameboard.turn):
+        gameboard.make_move(move)
+        history.append(gameboard.zobrist_hash)
+        gameboard.unmake_move()
+
+    assert Engine(1).search(gameboard, depth=2).score > 500
+    assert Engine(1).search(gameboard, depth=2, history=history).score == 0
@@ -1,6 +1,12 @@
 # test_gameboard.py
 
+import pytest
+
+from ..cli_chess.error import InvalidFenError
 from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move import move_from_uci
+from ..cli_chess.perft import REFERENCE_POSITIONS
+from ..cli_chess.zobrist import compute_hash
 
 
 def test_is_valid_initial_board():
@@ -22,3 +28,195 @@ def test_is_valid_initial_board():
     for row in range(-2, 0):
         for col in range(8):
             assert board[row][col].symbol == VALID_INITIAL_BOARD[row][col]
+
+
+def test_play_move():
+    gameboard = Gameboard()
+    gameboard.play_move('e2', 'e4')
+
+    assert gameboard.get_square_piece('e2') is None
+    assert gameboard.get_square_piece('e4').symbol == 'P'
+    assert gameboard.get_square_piece('e4').color == 'w'
+
+    board = gameboard.get_board()
+    assert board[6][4] is None
+    assert board[4][4].symbol == 'P'
+
+
+def test_play_capture_updates_bitboards():
+    gameboard = Gameboard()
+    gameboard.play_move('d1', 'd7')
+
+    assert gameboard.get_bitboard('Q', 'w') == 1 << 51
+    assert gameboard.get_bitboard('P', 'b') == 0xF7 << 48
+    assert gameboard.get_bitboard('Q', 'b') == 1 << 59
+    assert gameboard.get_occupancy('w') == 0xFFF7 | 1 << 51
+    assert gameboard.get_occupancy('b') == 0xFFF7 << 48
+    assert gameboard.get_occupancy() == 0xFFF7 | 0xFFFF << 48
+
+
+def test_view_shares_pieces():
+    gameboard = Gameboard()
+    view = gameboard.view()
+
+    assert gameboard.view() is view
+    assert view.get_square_piece('e1') is view.get_square_piece('e1')
+    assert view.get_square_piece('e1').symbol == 'K'
+    assert view.get_square_piece('e4') is None
+
+    # The view reflects moves played after it was created
+    gameboard.play_move('e2', 'e4')
+    assert view.get_square_piece('e4') is view.get_square_piece('d2')
+
+
+def test_get_board_returns_independent_copy():
+    gameboard = Gameboard()
+    board = gameboard.get_board()
+    board[0][0] = None
+    with pytest.raises(AttributeError):
+        board[7][4].color = 'b'
+
+    assert gameboard.get_square_piece('a8').symbol == 'R'
+    assert gameboard.get_square_piece('e1').color == 'w'
+    assert gameboard.view().get_square_piece('e1').color == 'w'
+
+
+def test_make_and_unmake_move_restore_board():
+    gameboard = Gameboard()
+    initial_board = [[piece and (piece.symbol, piece.color) for piece in row]
+                     for row in gameboard.get_board()]
+
+    for move in ('e2e4', 'd7d5', 'e4d5', 'c7c5', 'd5c6', 'd8d2', 'e1d2'):
+        gameboard.make_move(move_from_uci(move))
+
+    assert gameboard.ply == 7
+    assert gameboard.turn == 'b'
+    assert gameboard.fullmove_number == 4
+    assert gameboard.halfmove_clock == 0
+    assert gameboard.castling_rights == (Gameboard.BLACK_KINGSIDE |
+                                         Gameboard.BLACK_QUEENSIDE)
+    # The pawn on c5 was captured en passant
+    assert gameboard.get_square_piece('c5') is None
+
+    while gameboard.ply:
+        gameboard.unmake_move()
+
+    board = [[piece and (piece.symbol, piece.color) for piece in row]
+             for row in gameboard.get_board()]
+    assert board == initial_board
+    assert gameboard.turn == 'w'
+    assert gameboard.fullmove_number == 1
+    assert gameboard.castling_rights == Gameboard.ALL_CASTLING
+    assert gameboard.en_passant is None
+
+
+def test_unmake_promotion_and_castling():
+    board_state = [
+        ['   ', '   ', '   ', '   ', 'K_b', '   ', '   ', 'R_b'],
+        ['   ', 'P_w', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', 'K_w', '   ', '   ', '   '],
+    ]
+    gameboard = Gameboard(board_state)
+
+    gameboard.play_move('b7', 'b8', 'R')
+    assert gameboard.get_square_piece('b8').symbol == 'R'
+    gameboard.play_move('e8', 'g8')
+    assert gameboard.get_square_piece('f8').symbol == 'R'
+
+    gameboard.unmake_move()
+    assert gameboard.get_square_piece('h8').symbol == 'R'
+    assert gameboard.get_square_piece('e8').symbol == 'K'
+    assert gameboard.castling_rights == Gameboard.BLACK_KINGSIDE
+
+    gameboard.unmake_move()
+    assert gameboard.get_square_piece('b7').symbol == 'P'
+    assert gameboard.get_square_piece('b8') is None
+    assert gameboard.get_bitboard('R', 'w') == 0
+
+
+def test_two_square_king_moves_that_arent_castling():
+    fens = [
+        # Off the starting square
+        '8/8/8/8/3K4/8/8/k7 w - - 0 1',
+        # From the starting square without the castling right
+        'r3k2r/8/8/8/8/8/8/R3K2R w kq - 0 1',
+    ]
+    for fen, start, end in zip(fens, ('d4', 'e1'), ('f4', 'g1')):
+        gameboard = Gameboard.from_fen(fen)
+        gameboard.play_move(start, end)
+        assert gameboard.get_square_piece(start) is None
+        assert gameboard.get_square_piece(end).symbol == 'K'
+        # The rooks haven't moved
+        assert (gameboard.get_bitboard('R', 'w') ==
+                Gameboard.from_fen(fen).get_bitboard('R', 'w'))
+        assert gameboard.halfmove_clock == 1
+        assert gameboard.zobrist_hash == compute_hash(gameboard)
+
+        gameboard.unmake_move()
+        assert gameboard.to_fen() == fen
+        assert gameboard.zobrist_hash == compute_hash(gameboard)
+
+
+def test_fen_round_trip():
+    gameboard = Gameboard()
+    assert gameboard.to_fen() == (
+        'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
+
+    gameboard.play_move('e2', 'e4')
+    fen = 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+    assert gameboard.to_fen() == fen
+
+    loaded = Gameboard.from_fen(fen)
+    assert loaded.to_fen() == fen
+    for color in ('w', 'b'):
+        assert (loaded.get_piece_bitboards(color) ==
+                gameboard.get_piece_bitboards(color))
+    assert loaded.en_passant == gameboard.en_passant
+    assert loaded.zobrist_hash == gameboard.zobrist_hash == compute_hash(loaded)
+
+
+def test_from_fen_defaults_and_castling_rights():
+    # The move counters are optional, and rights without a rook are dropped
+    gameboard = Gameboard.from_fen('4k3/8/8/8/8/8/8/4K2R w KQkq -')
+    assert gameboard.castling_rights == Gameboard.WHITE_KINGSIDE
+    assert gameboard.halfmove_clock == 0
+    assert gameboard.fullmove_number == 1
+
+
+@pytest.mark.parametrize('fen', [
+    '',
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1',
+    'rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1',
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkx - 0 1',
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e4 0 1',
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - x 1',
+])
+def test_from_fen_rejects_malformed_fen(fen):
+    with pytest.raises(InvalidFenError):
+        Gameboard.from_fen(fen)
+
+
+@pytest.mark.parametrize('position_name', sorted(REFERENCE_POSITIONS))
+def test_pack_round_trip(position_name):
+    gameboard = REFERENCE_POSITIONS[position_name].create_gameboard()
+    packed = gameboard.pack()
+    assert len(packed) == Gameboard.PACKED_SIZE <= 32
+
+    unpacked = Gameboard.unpack(packed)
+    assert unpacked.to_fen() == gameboard.to_fen()
+    assert unpacked.zobrist_hash == gameboard.zobrist_hash
+
+
+def test_unpack_at_offset():
+    gameboard = Gameboard()
+    gameboard.play_move('e2', 'e4')
+    data = Gameboard().pack() + gameboard.pack()
+    assert (Gameboard.unpack(data, Gameboard.PACKED_SIZE).to_fen() ==
+            gameboard.to_fen())
@@ -0,0 +1,79 @@
+# test_instrumentation.py
+
+import json
+
+import pytest
+
+from ..cli_chess import instrumentation, move_validator
+from ..cli_chess.engine import Engine
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.main import main
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_instrumented_calls():
+    original = move_validator.is_legal_move
+    gameboard = Gameboard()
+    with instrumentation.instrumented():
+        assert instrumentation.is_enabled()
+        assert move_validator.is_legal_move is not original
+        assert move_validator.is_legal_move('b1', 'c3', 'w', gameboard)
+        assert not move_validator.is_legal_move('a1', 'a3', 'w', gameboard)
+        gameboard.play_move('e2', 'e4')
+        gameboard.get_board()
+
+    # Disabling restores the original functions
+    assert not instrumentation.is_enabled()
+    assert move_validator.is_legal_move is original
+    move_validator.is_legal_move('e7', 'e5', 'b', gameboard)
+
+    stats = instrumentation.stats()
+    assert stats['is_legal_move'].calls == 2
+    assert stats['is_legal_move_by_index'].calls == 2
+    assert stats['knight_path'].calls == 1
+    assert stats['rook_path'].calls == 1
+    assert stats['pieces_in_the_way'].calls == 1
+    assert stats['play_move'].calls == stats['make_move'].calls == 1
+    assert stats['board_copy'].calls == 1
+    assert stats['is_legal_move'].seconds > 0
+    assert 'pawn_path' not in stats
+
+
+def test_search_nodes():
+    with instrumentation.instrumented(['search_node', 'quiescence_node']):
+        result = Engine(1).search(Gameboard(), depth=2)
+    stats = instrumentation.stats()
+    assert stats['search_node'].calls + stats['quiescence_node'].calls == (
+        result.nodes)
+
+    with pytest.raises(ValueError):
+        instrumentation.enable(['no_such_path'])
+
+
+def test_export():
+    with instrumentation.instrumented(['play_move']):
+        Gameboard().play_move('e2', 'e4')
+    assert json.loads(instrumentation.to_json()) == {
+        'play_move': {'calls': 1,
+                      'seconds': instrumentation.stats()['play_move'].seconds}}
+    lines = instrumentation.to_prometheus().splitlines()
+    assert 'cli_chess_calls_total{path="play_move"} 1' in lines
+    assert '# TYPE cli_chess_seconds_total counter' in lines
+
+
+def test_main_profile(tmp_path, capsys):
+    assert main(['--profile', str(tmp_path), 'perft', '2',
+                 '-p', 'startpos']) == 0
+    assert 'Profile reports written' in capsys.readouterr().err
+    assert {path.name for path in tmp_path.iterdir()} == {
+        'profile.pstats', 'profile.txt', 'memory.txt', 'hot_paths.json',
+        'hot_paths.prom'}
+    hot_paths = json.loads((tmp_path / 'hot_paths.json').read_text())
+    assert hot_paths['make_move']['calls'] == 20
@@ -0,0 +1,24 @@
+# test_main.py
+
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_help_imports_no_commands():
+    # Showing the help doesn't load the modules of the commands
+    code = ('import sys\n'
+            'from cli_chess.main import main\n'
+            'try:\n'
+            '    main(["--help"])\n'
+            'except SystemExit:\n'
+            '    pass\n'
+            'print(*sorted(sys.modules))\n')
+    output = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True,
+        check=True, cwd=Path(__file__).parents[1]).stdout
+    modules = output.split()
+    assert 'cli_chess.main' in modules
+    for module in ('asyncio', 'cli_chess.engine', 'cli_chess.gameboard',
+                   'cli_chess.move_validator', 'cli_chess.square'):
+        assert module not in modules
@@ -0,0 +1,145 @@
+# test_match.py
+
+import os
+
+import pytest
+
+from ..cli_chess import match, pgn
+from ..cli_chess.main import main
+from ..cli_chess.match import (EngineConfig, elo_difference,
+                               parse_engine_config, play_game,
+                               read_openings, run_match, sprt_test)
+from ..cli_chess.move import move_to_uci
+
+_FAST = EngineConfig('fast', depth=1)
+
+_MATE_IN_ONE = '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1'
+_INSUFFICIENT = 'k7/8/8/8/8/8/8/KN6 w - - 0 1'
+_play_task = match._play_task
+
+
+def _crashing_play_task(fen, white, *args):
+    """Play a game in a worker, except that the worker dies the first time
+    it plays the second opening with the second engine as white."""
+    marker = os.environ['CRASH_MARKER']
+    if fen == _INSUFFICIENT and white == 0 and not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return _play_task(fen, white, *args)
+
+
+def test_parse_engine_config():
+    assert parse_engine_config('name=a,depth=3,time=0.5,nodes=100,hash=4') == (
+        EngineConfig('a', 3, 0.5, 100, 4))
+    assert parse_engine_config('') == EngineConfig()
+    with pytest.raises(ValueError):
+        parse_engine_config('speed=3')
+    with pytest.raises(ValueError):
+        parse_engine_config('depth=deep')
+
+
+def test_read_openings(tmp_path):
+    path = tmp_path / 'openings.epd'
+    path.write_text(
+        '# Comment\n'
+        '\n'
+        'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - bm e5;\n'
+        'k7/8/8/8/8/8/8/K7 w - - 5 40\n')
+    assert read_openings(path) == [
+        'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1',
+        'k7/8/8/8/8/8/8/K7 w - - 5 40']
+
+    path = tmp_path / 'openings.pgn'
+    path.write_text('[Event "a"]\n\n1. d4 d5 *\n\n[Event "b"]\n\n1. c4 *\n')
+    assert read_openings(path) == [
+        'rnbqkbnr/ppp1pppp/8/3p4/3P4/8/PPP1PPPP/RNBQKBNR w KQkq d6 0 2',
+        'rnbqkbnr/pppppppp/8/8/2P5/8/PP1PPPPP/RNBQKBNR b KQkq c3 0 1']
+
+
+def test_play_game_adjudication():
+    result, reason, moves = play_game('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1',
+                                      _FAST, _FAST)
+    assert (result, reason) == ('1-0', 'checkmate')
+    assert [move_to_uci(move) for move in moves] == ['a1a8']
+
+    assert play_game('k7/8/8/8/8/8/8/KN6 w - - 0 1', _FAST, _FAST) == (
+        '1/2-1/2', 'insufficient material', [])
+    assert play_game('k7/8/8/8/8/8/8/KQ6 w - - 99 80', _FAST, _FAST)[:2] == (
+        '1/2-1/2', 'fifty-move rule')
+    result, reason, moves = play_game(
+        'k7/8/8/8/8/8/8/KQ6 w - - 0 1', _FAST, _FAST, max_plies=3)
+    assert (result, reason, len(moves)) == ('1/2-1/2', 'move limit', 3)
+
+
+def test_elo_and_sprt():
+    assert elo_difference(50, 0, 50) == (0.0, pytest.approx(69.0, abs=0.1))
+    elo, error = elo_difference(60, 20, 20)
+    assert elo == pytest.approx(147.2, abs=0.1) and error > 0
+    assert elo_difference(10, 0, 0)[0] == float('inf')
+
+    lower, upper = sprt_test(0, 0, 0, 0, 10)[1:3]
+    assert lower == pytest.approx(-2.944, abs=1e-3)
+    assert upper == pytest.approx(2.944, abs=1e-3)
+    assert sprt_test(0, 0, 0, 0, 10).decision is None
+    assert sprt_test(300, 400, 200, 0, 10).decision == 'H1'
+    assert sprt_test(200, 400, 300, 0, 10).decision == 'H0'
+    assert sprt_test(20, 40, 18, 0, 10).decision is None
+
+
+def test_run_match(tmp_path):
+    openings = ['6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1',
+                'k7/8/8/8/8/8/8/KN6 w - - 0 1']
+    path = tmp_path / 'games.pgn'
+    games = []
+    with open(path, 'w') as stream:
+        result = run_match(openings, (_FAST, _FAST._replace(name='slow')),
+                           workers=2, pgn_stream=stream, on_game=games.append)
+    # The first engine mates as white and gets mated as black
+    assert result == (1, 2, 1, 0, None)
+    assert sorted(game.number for game in games) == [0, 1, 2, 3]
+
+    written = list(pgn.read_games(path))
+    assert sorted(game.result for game in written) == [
+        '1-0', '1-0', '1/2-1/2', '1/2-1/2']
+    assert {game.headers['Termination'] for game in written} == {'normal'}
+
+
+def test_run_match_survives_a_crashed_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv('CRASH_MARKER', str(tmp_path / 'crashed'))
+    monkeypatch.setattr(match, '_play_task', _crashing_play_task)
+    path = tmp_path / 'games.pgn'
+    games = []
+    with open(path, 'w') as stream:
+        result = run_match([_MATE_IN_ONE, _INSUFFICIENT], (_FAST, _FAST),
+                           rounds=2, workers=2, pgn_stream=stream,
+                           on_game=games.append)
+    assert (tmp_path / 'crashed').exists()
+
+    # Every game is played to the end once, whether it finished before the
+    # crash or was played again after it
+    assert result == (2, 4, 2, 0, None)
+    assert sorted(game.number for game in games) == list(range(8))
+    assert len(list(pgn.read_games(path))) == 8
+
+
+def test_run_match_sprt():
+    # The engines split every pair of games, so with wide error rates the
+    # test soon accepts that the first engine isn't 200 Elo stronger
+    result = run_match(['6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1'],
+                       (_FAST, _FAST), rounds=50, workers=1,
+                       sprt=(0, 200), alpha=0.45, beta=0.45)
+    assert result.sprt.decision == 'H0'
+    assert result.wins == result.losses
+    assert result.unplayed == 100 - result.wins - result.losses
+
+
+def test_main_match(tmp_path, capsys):
+    openings = tmp_path / 'openings.epd'
+    openings.write_text('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - -\n')
+    path = tmp_path / 'games.pgn'
+    assert main(['match', str(openings), '-e', 'name=a,depth=1', '-e',
+                 'name=b,depth=1', '-j', '1', '-o', str(path)]) == 0
+    output = capsys.readouterr().out
+    assert 'Score of a vs b: 1 - 1 - 0 [0.500] 2' in output
+    assert path.read_text().count('[Event ') == 2
+
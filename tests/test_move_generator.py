@@ -0,0 +1,169 @@
+# test_move_generator.py
+
+import random
+
+from ..cli_chess import attack_tables
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move import move_to_uci
+from ..cli_chess.move_generator import (attackers_of, check_info,
+                                        generate_legal_moves, is_checkmate,
+                                        is_stalemate)
+from ..cli_chess.square import SQUARE_INDICES
+
+EMPTY_ROW = ['   '] * 8
+
+
+def _legal_moves(gameboard, color):
+    return {move_to_uci(move) for move in generate_legal_moves(gameboard,
+                                                               color)}
+
+
+def test_sliding_attacks_match_ray_walks():
+    rook_directions = ((0, 1), (0, -1), (1, 0), (-1, 0))
+    bishop_directions = ((1, 1), (-1, -1), (1, -1), (-1, 1))
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        square = rng.randrange(64)
+        occupied = rng.getrandbits(64) & rng.getrandbits(64) | 1 << square
+        assert (attack_tables.rook_attacks(square, occupied) ==
+                attack_tables._ray_attacks(square, occupied, rook_directions))
+        assert (attack_tables.bishop_attacks(square, occupied) ==
+                attack_tables._ray_attacks(square, occupied,
+                                           bishop_directions))
+
+
+def test_starting_position_moves():
+    gameboard = Gameboard()
+    assert len(_legal_moves(gameboard, 'w')) == 20
+    assert len(_legal_moves(gameboard, 'b')) == 20
+    assert {'e2e4', 'g1f3', 'a2a3'} <= _legal_moves(gameboard, 'w')
+
+
+def test_castling():
+    board_state = [
+        ['R_b', '   ', '   ', '   ', 'K_b', '   ', '   ', 'R_b'],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['   ', '   ', '   ', '   ', '   ', 'B_b', '   ', '   '],
+        EMPTY_ROW,
+        ['R_w', '   ', '   ', '   ', 'K_w', '   ', '   ', 'R_w'],
+    ]
+
+    # The bishop on f3 attacks d1, so white can't castle queenside
+    gameboard = Gameboard(board_state)
+    assert 'e1g1' in _legal_moves(gameboard, 'w')
+    assert 'e1c1' not in _legal_moves(gameboard, 'w')
+    assert {'e8g8', 'e8c8'} <= _legal_moves(gameboard, 'b')
+
+    gameboard = Gameboard(board_state, castling_rights='Qk')
+    assert 'e1g1' not in _legal_moves(gameboard, 'w')
+    assert 'e8c8' not in _legal_moves(gameboard, 'b')
+
+    gameboard.play_move('e8', 'g8')
+    assert gameboard.get_square_piece('f8').symbol == 'R'
+    assert gameboard.get_square_piece('h8') is None
+    assert gameboard.castling_rights == Gameboard.WHITE_QUEENSIDE
+
+
+def test_en_passant():
+    board_state = [
+        ['   ', '   ', '   ', '   ', 'K_b', '   ', '   ', '   '],
+        ['   ', '   ', '   ', 'P_b', '   ', '   ', '   ', '   '],
+        EMPTY_ROW,
+        ['   ', '   ', '   ', '   ', 'P_w', '   ', '   ', '   '],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['   ', '   ', '   ', '   ', 'K_w', '   ', '   ', '   '],
+    ]
+    gameboard = Gameboard(board_state)
+    gameboard.play_move('d7', 'd5')
+    assert 'e5d6' in _legal_moves(gameboard, 'w')
+
+    gameboard.play_move('e5', 'd6')
+    assert gameboard.get_square_piece('d5') is None
+    assert gameboard.get_square_piece('d6').symbol == 'P'
+
+
+def test_en_passant_exposing_king_is_illegal():
+    board_state = [
+        EMPTY_ROW,
+        ['   ', '   ', '   ', 'P_b', '   ', '   ', '   ', '   '],
+        EMPTY_ROW,
+        ['K_w', '   ', '   ', '   ', 'P_w', '   ', '   ', 'R_b'],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['   ', '   ', '   ', '   ', 'K_b', '   ', '   ', '   '],
+    ]
+    gameboard = Gameboard(board_state)
+    gameboard.play_move('d7', 'd5')
+    assert 'e5d6' not in _legal_moves(gameboard, 'w')
+
+
+def test_promotions():
+    board_state = [
+        ['   ', '   ', '   ', 'N_b', '   ', '   ', '   ', 'K_b'],
+        ['   ', '   ', 'P_w', '   ', '   ', '   ', '   ', '   '],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['K_w', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+    ]
+    gameboard = Gameboard(board_state)
+    moves = _legal_moves(gameboard, 'w')
+    assert {'c7c8q', 'c7c8r', 'c7c8b', 'c7c8n'} <= moves
+    assert {'c7d8q', 'c7d8r', 'c7d8b', 'c7d8n'} <= moves
+    assert 'c7c8' not in moves
+
+    gameboard.play_move('c7', 'd8', 'N')
+    assert gameboard.get_square_piece('d8').symbol == 'N'
+    assert gameboard.get_square_piece('d8').color == 'w'
+
+
+def test_pinned_piece_and_check():
+    board_state = [
+        ['   ', '   ', '   ', '   ', 'R_b', '   ', '   ', 'K_b'],
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        EMPTY_ROW,
+        ['   ', '   ', '   ', '   ', 'N_w', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', 'K_w', '   ', '   ', '   '],
+    ]
+    gameboard = Gameboard(board_state)
+    moves = _legal_moves(gameboard, 'w')
+    assert not any(move.startswith('e2') for move in moves)
+    assert moves == {'e1d1', 'e1f1', 'e1d2', 'e1f2'}
+
+
+def test_attackers_and_pins():
+    gameboard = Gameboard.from_fen('4r1k1/8/8/b7/8/8/2BN4/4K2R w K - 0 1')
+    e1 = SQUARE_INDICES['e1']
+    assert attackers_of(gameboard, e1, 'b') == 1 << SQUARE_INDICES['e8']
+    assert attackers_of(gameboard, SQUARE_INDICES['e4'], 'w') == (
+        1 << SQUARE_INDICES['c2'] | 1 << SQUARE_INDICES['d2'])
+
+    info = check_info(gameboard, 'w')
+    assert info.king == e1
+    assert info.checkers == 1 << SQUARE_INDICES['e8']
+    # The check can be blocked on the e-file or the rook captured
+    assert info.check_mask == 0x1010101010101000
+    # The knight on d2 is pinned by the bishop on a5
+    assert info.pinned == 1 << SQUARE_INDICES['d2']
+    assert _legal_moves(gameboard, 'w') == {'e1d1', 'e1f1', 'e1f2', 'c2e4'}
+
+
+def test_checkmate_and_stalemate():
+    mate = Gameboard.from_fen('R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1')
+    assert is_checkmate(mate, 'b') and not is_stalemate(mate, 'b')
+    stalemate = Gameboard.from_fen('k7/2Q5/1K6/8/8/8/8/8 b - - 0 1')
+    assert is_stalemate(stalemate, 'b') and not is_checkmate(stalemate, 'b')
+    assert not is_checkmate(Gameboard(), 'w')
+    assert not is_stalemate(Gameboard(), 'w')
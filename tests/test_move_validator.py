@@ -2,44 +2,39 @@
 
 from ..cli_chess.gameboard import Gameboard
 from ..cli_chess import move_validator
+from ..cli_chess.square import SQUARE_INDICES
 
 
-def test_get_file_distance():
-    assert move_validator._get_file_dist('a', 'h') == 7
-    assert move_validator._get_file_dist('h', 'a') == 7
-
-
-def test_get_rank_distance():
-    assert move_validator._get_rank_dist('1', '8') == 7
-    assert move_validator._get_rank_dist('8', '1') == 7
+def _sq(square_coords):
+    return SQUARE_INDICES[square_coords]
 
 
 def test_is_horizontal_move():
-    assert move_validator._is_horizontal_move('a1', 'h1')
-    assert not move_validator._is_horizontal_move('a1', 'a1')
-    assert not move_validator._is_horizontal_move('a1', 'a8')
-    assert not move_validator._is_horizontal_move('e4', 'd5')
+    assert move_validator._is_horizontal_move(_sq('a1'), _sq('h1'))
+    assert not move_validator._is_horizontal_move(_sq('a1'), _sq('a1'))
+    assert not move_validator._is_horizontal_move(_sq('a1'), _sq('a8'))
+    assert not move_validator._is_horizontal_move(_sq('e4'), _sq('d5'))
 
 
 def test_is_vertical_move():
-    assert move_validator._is_vertical_move('a1', 'a8')
-    assert not move_validator._is_vertical_move('a1', 'a1')
-    assert not move_validator._is_vertical_move('a1', 'h1')
-    assert not move_validator._is_vertical_move('e4', 'd5')
+    assert move_validator._is_vertical_move(_sq('a1'), _sq('a8'))
+    assert not move_validator._is_vertical_move(_sq('a1'), _sq('a1'))
+    assert not move_validator._is_vertical_move(_sq('a1'), _sq('h1'))
+    assert not move_validator._is_vertical_move(_sq('e4'), _sq('d5'))
 
 
 def test_is_diagonal_move():
-    assert move_validator._is_diagonal_move('e4', 'd5')
-    assert move_validator._is_diagonal_move('a1', 'h8')
-    assert not move_validator._is_diagonal_move('e4', 'e4')
-    assert not move_validator._is_diagonal_move('e4', 'c5')
+    assert move_validator._is_diagonal_move(_sq('e4'), _sq('d5'))
+    assert move_validator._is_diagonal_move(_sq('a1'), _sq('h8'))
+    assert not move_validator._is_diagonal_move(_sq('e4'), _sq('e4'))
+    assert not move_validator._is_diagonal_move(_sq('e4'), _sq('c5'))
 
 
 def test_is_valid_knight_path():
-    assert move_validator._is_valid_knight_path('e4', 'c5')
-    assert move_validator._is_valid_knight_path('e4', 'f2')
-    assert not move_validator._is_valid_knight_path('e4', 'c6')
-    assert not move_validator._is_valid_knight_path('e4', 'h4')
+    assert move_validator._is_valid_knight_path(_sq('e4'), _sq('c5'))
+    assert move_validator._is_valid_knight_path(_sq('e4'), _sq('f2'))
+    assert not move_validator._is_valid_knight_path(_sq('e4'), _sq('c6'))
+    assert not move_validator._is_valid_knight_path(_sq('e4'), _sq('h4'))
 
 
 def test_is_valid_bishop_path():
@@ -55,13 +50,19 @@ def test_is_valid_bishop_path():
     ]
     gameboard = Gameboard(board_state)
 
-    assert move_validator._is_valid_bishop_path('d4', 'f6', gameboard)
-    assert move_validator._is_valid_bishop_path('d4', 'a7', gameboard)
-    assert move_validator._is_valid_bishop_path('d4', 'g1', gameboard)
+    assert move_validator._is_valid_bishop_path(_sq('d4'), _sq('f6'),
+                                                gameboard)
+    assert move_validator._is_valid_bishop_path(_sq('d4'), _sq('a7'),
+                                                gameboard)
+    assert move_validator._is_valid_bishop_path(_sq('d4'), _sq('g1'),
+                                                gameboard)
 
-    assert not move_validator._is_valid_bishop_path('d4', 'f4', gameboard)
-    assert not move_validator._is_valid_bishop_path('d4', 'b7', gameboard)
-    assert not move_validator._is_valid_bishop_path('d4', 'g7', gameboard)
+    assert not move_validator._is_valid_bishop_path(_sq('d4'), _sq('f4'),
+                                                    gameboard)
+    assert not move_validator._is_valid_bishop_path(_sq('d4'), _sq('b7'),
+                                                    gameboard)
+    assert not move_validator._is_valid_bishop_path(_sq('d4'), _sq('g7'),
+                                                    gameboard)
 
 
 def test_is_valid_rook_path():
@@ -77,12 +78,14 @@ def test_is_valid_rook_path():
     ]
     gameboard = Gameboard(board_state)
 
-    assert move_validator._is_valid_rook_path('d4', 'd8', gameboard)
-    assert move_validator._is_valid_rook_path('d4', 'a4', gameboard)
-    assert move_validator._is_valid_rook_path('d4', 'g4', gameboard)
+    assert move_validator._is_valid_rook_path(_sq('d4'), _sq('d8'), gameboard)
+    assert move_validator._is_valid_rook_path(_sq('d4'), _sq('a4'), gameboard)
+    assert move_validator._is_valid_rook_path(_sq('d4'), _sq('g4'), gameboard)
 
-    assert not move_validator._is_valid_rook_path('d4', 'e3', gameboard)
-    assert not move_validator._is_valid_rook_path('d4', 'h4', gameboard)
+    assert not move_validator._is_valid_rook_path(_sq('d4'), _sq('e3'),
+                                                  gameboard)
+    assert not move_validator._is_valid_rook_path(_sq('d4'), _sq('h4'),
+                                                  gameboard)
 
 
 def test_is_valid_queen_path():
@@ -98,12 +101,14 @@ def test_is_valid_queen_path():
     ]
     gameboard = Gameboard(board_state)
 
-    assert move_validator._is_valid_queen_path('d4', 'd8', gameboard)
-    assert move_validator._is_valid_queen_path('d4', 'g4', gameboard)
-    assert move_validator._is_valid_queen_path('d4', 'g7', gameboard)
+    assert move_validator._is_valid_queen_path(_sq('d4'), _sq('d8'), gameboard)
+    assert move_validator._is_valid_queen_path(_sq('d4'), _sq('g4'), gameboard)
+    assert move_validator._is_valid_queen_path(_sq('d4'), _sq('g7'), gameboard)
 
-    assert not move_validator._is_valid_queen_path('d4', 'e1', gameboard)
-    assert not move_validator._is_valid_queen_path('d4', 'h8', gameboard)
+    assert not move_validator._is_valid_queen_path(_sq('d4'), _sq('e1'),
+                                                   gameboard)
+    assert not move_validator._is_valid_queen_path(_sq('d4'), _sq('h8'),
+                                                   gameboard)
 
 
 def test_is_valid_king_path():
@@ -119,10 +124,55 @@ def test_is_valid_king_path():
     ]
     gameboard = Gameboard(board_state)
 
-    assert move_validator._is_valid_king_path('d4', 'c4')
-    assert move_validator._is_valid_king_path('d4', 'd5')
-    assert move_validator._is_valid_king_path('d4', 'c5')
-    assert move_validator._is_valid_king_path('d4', 'c4')
+    assert move_validator._is_valid_king_path(_sq('d4'), _sq('c4'))
+    assert move_validator._is_valid_king_path(_sq('d4'), _sq('d5'))
+    assert move_validator._is_valid_king_path(_sq('d4'), _sq('c5'))
+    assert move_validator._is_valid_king_path(_sq('d4'), _sq('c4'))
+
+    assert not move_validator._is_valid_king_path(_sq('d4'), _sq('d6'))
+    assert not move_validator._is_valid_king_path(_sq('d4'), _sq('f2'))
 
-    assert not move_validator._is_valid_king_path('d4', 'd6')
-    assert not move_validator._is_valid_king_path('d4', 'f2')
+
+def test_is_valid_pawn_path():
+    board_state = [
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', 'P_w', 'P_b', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', 'N_b'],
+        ['   ', '   ', '   ', 'P_w', '   ', '   ', 'P_w', '   '],
+        ['   ', '   ', '   ', '   ', '   ', '   ', '   ', '   '],
+    ]
+    gameboard = Gameboard(board_state, en_passant='f6')
+
+    assert move_validator._is_valid_pawn_path(_sq('d2'), _sq('d3'),
+                                              'w', gameboard)
+    assert move_validator._is_valid_pawn_path(_sq('d2'), _sq('d4'),
+                                              'w', gameboard)
+    assert move_validator._is_valid_pawn_path(_sq('g2'), _sq('h3'),
+                                              'w', gameboard)
+    assert move_validator._is_valid_pawn_path(_sq('e5'), _sq('f6'),
+                                              'w', gameboard)
+    assert move_validator._is_valid_pawn_path(_sq('f5'), _sq('f4'),
+                                              'b', gameboard)
+
+    assert not move_validator._is_valid_pawn_path(_sq('d2'), _sq('d1'),
+                                                  'w', gameboard)
+    assert not move_validator._is_valid_pawn_path(_sq('d2'), _sq('e3'),
+                                                  'w', gameboard)
+    assert not move_validator._is_valid_pawn_path(_sq('e5'), _sq('e7'),
+                                                  'w', gameboard)
+    assert not move_validator._is_valid_pawn_path(_sq('f5'), _sq('f3'),
+                                                  'b', gameboard)
+
+
+def test_is_legal_move_keeps_king_safe():
+    # The white knight on d2 is pinned and the king is in check
+    gameboard = Gameboard.from_fen('4r1k1/8/8/b7/8/8/2BN4/4K2R w K - 0 1')
+
+    assert move_validator.is_legal_move('c2', 'e4', 'w', gameboard)
+    assert move_validator.is_legal_move('e1', 'f2', 'w', gameboard)
+    assert not move_validator.is_legal_move('d2', 'e4', 'w', gameboard)
+    assert not move_validator.is_legal_move('h1', 'h8', 'w', gameboard)
+    assert not move_validator.is_legal_move('e1', 'e2', 'w', gameboard)
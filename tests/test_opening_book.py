@@ -0,0 +1,103 @@
+# test_opening_book.py
+
+import random
+import struct
+
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.main import main
+from ..cli_chess.move import move_from_uci, move_to_uci
+from ..cli_chess.opening_book import OpeningBook, polyglot_hash
+
+START_KEY = 0x463B96181691FC9C
+
+
+def _raw_move(uci):
+    move = move_from_uci(uci)
+    # Polyglot swaps the start and end squares
+    return (move >> 6 & 63) | (move & 63) << 6 | (move >> 12) << 12
+
+
+def _write_book(path, entries):
+    with open(path, 'wb') as file:
+        for key, uci, weight in sorted(entries):
+            file.write(struct.pack('>QHHI', key, _raw_move(uci), weight, 0))
+    return path
+
+
+def test_polyglot_hash():
+    # The reference keys from the Polyglot book format specification
+    gameboard = Gameboard()
+    assert polyglot_hash(gameboard) == START_KEY
+    for start, end, key in [('e2', 'e4', 0x823C9B50FD114196),
+                            ('d7', 'd5', 0x0756B94461C50FB0),
+                            ('e4', 'e5', 0x662FAFB965DB29D4),
+                            ('f7', 'f5', 0x22A48B5A8E47FF78),
+                            ('e1', 'e2', 0x652A607CA3F242C1),
+                            ('e8', 'f7', 0x00FDD303C946BDD9)]:
+        gameboard.play_move(start, end)
+        assert polyglot_hash(gameboard) == key
+
+    gameboard = Gameboard()
+    for start, end in [('a2', 'a4'), ('b7', 'b5'), ('h2', 'h4'), ('b5', 'b4'),
+                       ('c2', 'c4')]:
+        gameboard.play_move(start, end)
+    assert polyglot_hash(gameboard) == 0x3C8123EA7B067637
+
+
+def test_find_all(tmp_path):
+    path = _write_book(tmp_path / 'book.bin', [
+        (START_KEY - 1, 'a2a3', 1),
+        (START_KEY, 'e2e4', 10),
+        (START_KEY, 'd2d4', 5),
+        # Illegal in the position, e.g. because of a hash collision
+        (START_KEY, 'e2e5', 5),
+        (START_KEY + 1, 'h2h3', 1),
+    ])
+
+    with OpeningBook(path) as book:
+        assert len(book) == 5
+        entries = book.find_all(Gameboard())
+        assert sorted(move_to_uci(entry.move) for entry in entries) == [
+            'd2d4', 'e2e4']
+        assert {entry.weight for entry in entries} == {5, 10}
+
+        gameboard = Gameboard()
+        gameboard.play_move('g1', 'f3')
+        assert book.find_all(gameboard) == []
+        assert book.choose_move(gameboard) is None
+
+        moves = {move_to_uci(book.choose_move(Gameboard(), random.Random(seed)))
+                 for seed in range(20)}
+        assert moves == {'d2d4', 'e2e4'}
+
+
+def test_castling_moves(tmp_path):
+    gameboard = Gameboard.from_fen(
+        'r3k2r/pppppppp/8/8/8/8/PPPPPPPP/R3K2R w KQkq - 0 1')
+    # Polyglot writes castling as the king moving to the rook's square
+    path = _write_book(tmp_path / 'book.bin', [
+        (polyglot_hash(gameboard), 'e1h1', 1),
+        (polyglot_hash(gameboard), 'e1a1', 1),
+    ])
+    with OpeningBook(path) as book:
+        assert sorted(move_to_uci(entry.move)
+                      for entry in book.find_all(gameboard)) == ['e1c1',
+                                                                 'e1g1']
+
+
+def test_empty_book(tmp_path):
+    path = tmp_path / 'empty.bin'
+    path.write_bytes(b'')
+    with OpeningBook(path) as book:
+        assert len(book) == 0
+        assert book.choose_move(Gameboard()) is None
+
+
+def test_play_with_book(tmp_path, monkeypatch, capsys):
+    path = _write_book(tmp_path / 'book.bin', [(START_KEY, 'e2e4', 1)])
+    monkeypatch.setattr('builtins.input', lambda prompt: 'quit')
+    assert main(['play', '-c', 'b', '--book', str(path)]) == 0
+    assert 'The computer plays e2e4 (book)' in capsys.readouterr().out
+
+    assert main(['play', '--book', str(tmp_path / 'missing.bin')]) == 1
+
@@ -0,0 +1,74 @@
+# test_parallel_search.py
+
+import threading
+
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move_generator import generate_legal_moves
+from ..cli_chess.parallel_search import ParallelEngine
+
+
+def test_parallel_search_returns_legal_move():
+    gameboard = Gameboard()
+    with ParallelEngine(workers=2, hash_mb=1) as engine:
+        result = engine.search(gameboard, depth=3)
+        assert result.best_move in generate_legal_moves(gameboard, 'w')
+        assert result.depth >= 3
+        assert result.pv[0] == result.best_move
+        assert gameboard.ply == 0
+
+        # The helpers are reused for later searches
+        gameboard.make_move(result.best_move)
+        result = engine.search(gameboard, time_limit=0.2)
+        assert result.best_move in generate_legal_moves(gameboard, 'b')
+
+
+def test_shared_table_is_filled():
+    gameboard = Gameboard()
+    with ParallelEngine(workers=2, hash_mb=1) as engine:
+        engine.search(gameboard, depth=2)
+        assert engine.transposition_table.probe(gameboard.zobrist_hash)
+
+
+def test_helpers_search_the_given_position():
+    gameboard = Gameboard()
+    gameboard.play_move('e2', 'e4')
+    with ParallelEngine(workers=3, hash_mb=1) as engine:
+        for _ in range(3):
+            result = engine.search(gameboard, time_limit=0.2)
+            assert result.best_move in generate_legal_moves(gameboard, 'b')
+
+
+def test_search_goes_on_without_a_dead_helper():
+    gameboard = Gameboard()
+    with ParallelEngine(workers=3, hash_mb=1) as engine:
+        engine.search(gameboard, depth=2)
+        engine._helpers[1].process.kill()
+        result = engine.search(gameboard, depth=3)
+        assert result.best_move in generate_legal_moves(gameboard, 'w')
+        assert engine.workers == 2
+
+        # The remaining helper still takes part in later searches, and may
+        # die in the middle of one
+        engine.search(gameboard, depth=2)
+        assert list(engine._helpers) == [2]
+        timer = threading.Timer(0.1, engine._helpers[2].process.kill)
+        timer.start()
+        result = engine.search(gameboard, time_limit=0.5)
+        timer.join()
+        assert result.best_move in generate_legal_moves(gameboard, 'w')
+        assert engine.workers == 1
+
+
+def test_new_game_resets_the_helpers():
+    gameboard = Gameboard()
+    with ParallelEngine(workers=2, hash_mb=1) as engine:
+        for _ in range(3):
+            engine.search(gameboard, depth=3)
+        engine.new_game()
+        engine.search(gameboard, depth=3)
+
+        # All the processes stamp their entries with the same age
+        table = engine.transposition_table
+        ages = {data >> table._AGE_SHIFT & 63 for data in table._words[1::2]
+                if data}
+        assert ages == {table._age}
@@ -0,0 +1,53 @@
+# test_perft.py
+
+import pytest
+
+from ..cli_chess import perft
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.main import main
+
+
+@pytest.mark.parametrize('position_name', sorted(perft.REFERENCE_POSITIONS))
+def test_reference_positions(position_name):
+    position = perft.REFERENCE_POSITIONS[position_name]
+    gameboard = position.create_gameboard()
+
+    for depth in (1, 2):
+        assert (perft.perft(gameboard, depth) ==
+                position.node_counts[depth - 1])
+
+
+def test_deeper_perft():
+    for position_name in ('startpos', 'position3'):
+        position = perft.REFERENCE_POSITIONS[position_name]
+        assert (perft.perft(position.create_gameboard(), 3) ==
+                position.node_counts[2])
+
+
+def test_perft_leaves_board_unchanged():
+    gameboard = perft.REFERENCE_POSITIONS['kiwipete'].create_gameboard()
+    zobrist_hash = gameboard.zobrist_hash
+    perft.perft(gameboard, 2)
+    assert gameboard.zobrist_hash == zobrist_hash
+    assert gameboard.ply == 0
+
+
+def test_perft_divide():
+    divide = perft.perft_divide(Gameboard(), 2)
+    assert len(divide) == 20
+    assert divide['e2e4'] == 20
+    assert sum(divide.values()) == 400
+
+
+def test_run_benchmark():
+    [result] = perft.run_benchmark(['startpos'], 2)
+    assert result.passed
+    assert result.nodes == 400
+    assert result.nodes_per_second > 0
+
+
+def test_perft_command(capsys):
+    assert main(['perft', '2', '-p', 'startpos', '-p', 'position4']) == 0
+    output = capsys.readouterr().out
+    assert 'startpos' in output and 'position4' in output
+    assert 'FAILED' not in output
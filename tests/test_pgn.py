@@ -0,0 +1,143 @@
+# test_pgn.py
+
+import io
+
+import pytest
+
+from ..cli_chess import pgn
+from ..cli_chess.error import InvalidPgnError
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move import move_from_uci, move_to_uci
+from ..cli_chess.san import move_from_san, move_to_san
+
+SCHOLARS_MATE = '''[Event "Casual \\"blitz\\" game"]
+[Site "?"]
+[Result "1-0"]
+
+1. e4 e5 2. Qh5 {threatening mate} Nc6 (2... Nf6?? 3. Qxe5+) 3. Bc4 Nf6?? $4
+4. Qxf7# 1-0
+'''
+
+FROM_POSITION = '''[Event "Endgame"]
+[SetUp "1"]
+[FEN "4k3/P7/8/8/8/8/8/4K2R w K - 0 40"]
+
+40. a8=Q+ Kd7 41. O-O ; castles
+Kc7 *
+'''
+
+
+def _write(tmp_path, text, name='games.pgn'):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+def test_san_round_trip():
+    gameboard = Gameboard.from_fen(
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+    assert move_to_san(gameboard, move_from_uci('e1g1')) == 'O-O'
+    assert move_to_san(gameboard, move_from_uci('d5e6')) == 'dxe6'
+    assert move_to_san(gameboard, move_from_uci('e5f7')) == 'Nxf7'
+    assert move_from_san(gameboard, 'Nxf7') == move_from_uci('e5f7')
+    assert move_from_san(gameboard, '0-0-0') == move_from_uci('e1c1')
+
+    # Both rooks can go to d1 and f1 ...
+    gameboard = Gameboard.from_fen('4k3/8/8/8/8/8/8/R3K2R w - - 0 1')
+    gameboard.play_move('e1', 'e2')
+    gameboard.play_move('e8', 'e7')
+    assert move_to_san(gameboard, move_from_uci('a1d1')) == 'Rad1'
+    assert move_from_san(gameboard, 'Rhd1') == move_from_uci('h1d1')
+    with pytest.raises(ValueError):
+        move_from_san(gameboard, 'Rd1')
+    with pytest.raises(ValueError):
+        move_from_san(gameboard, 'Ke4')
+    with pytest.raises(ValueError):
+        move_from_san(gameboard, 'xyz')
+
+
+def test_read_games(tmp_path):
+    path = _write(tmp_path, SCHOLARS_MATE + '\n' + FROM_POSITION)
+    first, second = pgn.read_games(path)
+
+    assert first.headers['Event'] == 'Casual "blitz" game'
+    assert first.result == '1-0'
+    assert [move_to_uci(move) for move in first.moves] == [
+        'e2e4', 'e7e5', 'd1h5', 'b8c6', 'f1c4', 'g8f6', 'h5f7']
+
+    assert second.result == '*'
+    assert [move_to_uci(move) for move in second.moves] == [
+        'a7a8q', 'e8d7', 'e1g1', 'd7c7']
+    *_, gameboard = second.replay()
+    assert gameboard.to_fen() == 'Q7/2k5/8/8/8/8/8/5RK1 w - - 3 42'
+
+
+def test_invalid_games(tmp_path):
+    path = _write(tmp_path, SCHOLARS_MATE.replace('Qxf7#', 'Qxf8#') +
+                  FROM_POSITION)
+    with pytest.raises(InvalidPgnError):
+        list(pgn.read_games(path))
+    [game] = pgn.read_games(path, skip_invalid=True)
+    assert game.headers['Event'] == 'Endgame'
+
+
+def test_invalid_fen_tag(tmp_path):
+    path = _write(tmp_path, '[Event "Bad"]\n[FEN "not a fen"]\n\n1. e4 *\n'
+                  '\n' + SCHOLARS_MATE)
+    with pytest.raises(InvalidPgnError):
+        list(pgn.read_games(path))
+    [game] = pgn.read_games(path, skip_invalid=True)
+    assert game.result == '1-0'
+    assert list(pgn.map_games(_count_moves, [path], processes=2,
+                              skip_invalid=True)) == [7]
+
+
+def test_malformed_tag_pair(tmp_path):
+    path = _write(tmp_path, SCHOLARS_MATE + '\n[Event "Bad"]\n[Site]\n\n'
+                  '1. e4 *\n\n' + SCHOLARS_MATE)
+    with pytest.raises(InvalidPgnError, match='malformed tag pair'):
+        list(pgn.read_games(path))
+    games = list(pgn.read_games(path, skip_invalid=True))
+    assert [game.result for game in games] == ['1-0', '1-0']
+    assert list(pgn.map_games(_count_moves, [path], processes=2,
+                              skip_invalid=True)) == [7, 7]
+
+
+def test_write_and_read_back(tmp_path):
+    games = list(pgn.read_games(_write(tmp_path, SCHOLARS_MATE +
+                                       FROM_POSITION)))
+    stream = io.StringIO()
+    assert pgn.write_games(stream, games) == 2
+
+    text = stream.getvalue()
+    assert '1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0' in text
+    assert '40. a8=Q+ Kd7 41. O-O Kc7 *' in text
+    assert '[White "?"]' in text
+
+    read_back = list(pgn.read_games(_write(tmp_path, text, 'copy.pgn')))
+    assert [game.moves for game in read_back] == [game.moves for game in games]
+    assert [game.result for game in read_back] == ['1-0', '*']
+
+
+def test_split_file(tmp_path):
+    path = _write(tmp_path, (SCHOLARS_MATE + '\n' + FROM_POSITION) * 20)
+    ranges = pgn.split_file(path, chunk_bytes=300)
+    assert len(ranges) > 5
+    assert ranges[0][0] == 0 and ranges[-1][1] == path.stat().st_size
+
+    games = [game for start, end in ranges
+             for game in pgn.read_games(path, start, end)]
+    assert len(games) == 40
+    assert [game.moves for game in games] == [
+        game.moves for game in pgn.read_games(path)]
+
+
+def _count_moves(game):
+    return len(game.moves)
+
+
+def test_map_games(tmp_path):
+    path = _write(tmp_path, (SCHOLARS_MATE + FROM_POSITION) * 10)
+    counts = list(pgn.map_games(_count_moves, [path, path], processes=2,
+                                chunk_bytes=500))
+    assert counts == [7, 4] * 20
@@ -0,0 +1,44 @@
+# test_piece.py
+
+import copy
+import pickle
+
+import pytest
+
+from ..cli_chess.piece import ChessColor, Piece
+
+
+def test_pieces_are_interned():
+    assert Piece('K_w') is Piece('K_w')
+    assert Piece('K_w') is not Piece('K_b')
+    assert Piece.from_index(Piece('Q_b').index) is Piece('Q_b')
+    assert Piece.from_repr('   ') is None
+
+    for color in ChessColor.ORDER:
+        for symbol in Piece.ORDER:
+            piece = Piece(f'{symbol}_{color}')
+            assert (piece.symbol, piece.color) == (symbol, color)
+            assert piece.index == Piece.to_index(symbol, color)
+
+
+def test_pieces_are_immutable():
+    piece = Piece('N_b')
+    with pytest.raises(AttributeError):
+        piece.color = 'w'
+    with pytest.raises(AttributeError):
+        piece.owner = 'me'
+
+    assert copy.copy(piece) is piece
+    assert copy.deepcopy([piece])[0] is piece
+    assert pickle.loads(pickle.dumps(piece)) is piece
+
+
+def test_invalid_piece():
+    with pytest.raises(ValueError):
+        Piece('X_w')
+
+
+def test_extract_from_repr():
+    assert Piece.extract_symbol_from_repr('K_w') == 'K'
+    assert Piece.extract_color_from_repr('K_w') == 'w'
+    assert Piece.extract_symbol_from_repr('   ') == ' '
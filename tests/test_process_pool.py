@@ -0,0 +1,38 @@
+# test_process_pool.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..cli_chess import process_pool
+
+
+def test_map_bounded():
+    submitted = []
+    lock = threading.Lock()
+
+    def calls():
+        for index in range(20):
+            with lock:
+                submitted.append(index)
+            yield index, index + 1
+
+    def add(a, b):
+        time.sleep(0.001 * (a % 3))
+        return a + b
+
+    with ThreadPoolExecutor(2) as executor:
+        results = process_pool.map_bounded(executor, add, calls(), 3)
+        for index, result in enumerate(results):
+            assert result == 2 * index + 1
+            # No more than the window of calls is submitted ahead
+            assert len(submitted) <= index + 4
+    assert len(submitted) == 20
+    assert list(process_pool.map_bounded(executor, add, [], 3)) == []
+
+
+def test_open_pool():
+    with process_pool.open_pool(1) as executor:
+        assert executor is None
+    with process_pool.open_pool(2) as executor:
+        assert executor.submit(sum, [1, 2]).result() == 3
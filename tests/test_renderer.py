@@ -0,0 +1,84 @@
+# test_renderer.py
+
+import io
+import re
+
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move import move_from_uci
+from ..cli_chess.renderer import BoardRenderer
+
+_CURSOR_MOVE = re.compile(r'\x1b\[(\d+);(\d+)H')
+
+
+def test_render_plain():
+    renderer = BoardRenderer(io.StringIO(), ansi=False)
+    gameboard = Gameboard()
+    lines = renderer.render(gameboard).splitlines()
+    assert lines[0] == '8  r  n  b  q  k  b  n  r '
+    assert lines[4] == '4  .  .  .  .  .  .  .  . '
+    assert lines[7] == '1  R  N  B  Q  K  B  N  R '
+    assert lines[8] == '   a  b  c  d  e  f  g  h '
+
+    move = move_from_uci('e2e4')
+    gameboard.make_move(move)
+    lines = renderer.render(gameboard, move).splitlines()
+    assert lines[4] == '4  .  .  .  . [P] .  .  . '
+    assert lines[6] == '2  P  P  P  P [.] P  P  P '
+
+
+def test_render_flipped():
+    renderer = BoardRenderer(io.StringIO(), flipped=True, ansi=False)
+    lines = renderer.render(Gameboard()).splitlines()
+    assert lines[0] == '1  R  N  B  K  Q  B  N  R '
+    assert lines[7] == '8  r  n  b  k  q  b  n  r '
+    assert lines[8] == '   h  g  f  e  d  c  b  a '
+
+
+def test_draw_plain():
+    stream = io.StringIO()
+    renderer = BoardRenderer(stream, ansi=False)
+    gameboard = Gameboard()
+    renderer.draw(gameboard)
+    renderer.draw(gameboard)
+    # Every frame is written in full
+    assert stream.getvalue() == 2 * (renderer.render(gameboard) + '\n')
+    assert '\x1b' not in stream.getvalue()
+
+
+def test_draw_ansi_redraws_changed_squares():
+    stream = io.StringIO()
+    renderer = BoardRenderer(stream, ansi=True)
+    gameboard = Gameboard()
+    renderer.draw(gameboard)
+    assert stream.getvalue().startswith('\x1b[H\x1b[2J')
+
+    # Only the squares of the move are redrawn
+    stream.seek(0)
+    stream.truncate()
+    move = move_from_uci('e2e4')
+    gameboard.make_move(move)
+    renderer.draw(gameboard, move)
+    positions = _CURSOR_MOVE.findall(stream.getvalue())
+    # e4 and e2, then the line below the board
+    assert positions == [('5', '15'), ('7', '15'), ('10', '1')]
+
+    # The squares of the previous move lose their highlight
+    stream.seek(0)
+    stream.truncate()
+    move = move_from_uci('e7e5')
+    gameboard.make_move(move)
+    renderer.draw(gameboard, move)
+    assert len(_CURSOR_MOVE.findall(stream.getvalue())) == 5
+
+    # Nothing changed
+    stream.seek(0)
+    stream.truncate()
+    renderer.draw(gameboard, move)
+    assert _CURSOR_MOVE.findall(stream.getvalue()) == [('10', '1')]
+
+    # Flipping the board redraws it in full
+    stream.seek(0)
+    stream.truncate()
+    renderer.flipped = True
+    renderer.draw(gameboard, move)
+    assert stream.getvalue().startswith('\x1b[H\x1b[2J')
@@ -0,0 +1,130 @@
+# test_server.py
+
+import asyncio
+
+import pytest
+
+from ..cli_chess.move import move_to_uci
+from ..cli_chess.server import GREETING, GameServer, run_load, watch_game
+
+
+async def _connect(address):
+    reader, writer = await asyncio.open_connection(*address)
+    assert (await reader.readline()).decode().strip() == GREETING
+    return reader, writer
+
+
+async def _command(reader, writer, line):
+    writer.write(f'{line}\n'.encode())
+    return (await reader.readline()).decode().strip()
+
+
+def test_game_updates_are_pushed():
+    async def scenario():
+        server = GameServer()
+        await server.start()
+        white = await _connect(server.address)
+        black = await _connect(server.address)
+
+        reply = await _command(*white, 'new')
+        game_id = reply.split()[1]
+        assert reply.endswith('w KQkq - 0 1')
+        assert (await _command(*black, f'join {game_id}')).startswith('game ')
+
+        assert (await _command(*white, 'move e2e5')).startswith('error ')
+        assert (await _command(*black, 'new 8/8 w')).startswith('error ')
+        assert await _command(*white, 'move e2e4') == (
+            f'moved {game_id} e2e4 '
+            'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+        assert (await black[0].readline()).decode().startswith('moved ')
+
+        # Fool's mate, which both clients are told about
+        for move in ('f7f6', 'd2d4', 'g7g5', 'd1h5'):
+            await _command(*black, f'move {move}')
+            await white[0].readline()
+        assert (await black[0].readline()).decode().strip() == (
+            f'over {game_id} 1-0 checkmate')
+
+        stats = server.stats()
+        assert stats.games == 1 and stats.moves == 5
+        assert stats.latency_max > 0
+        for _, writer in (white, black):
+            writer.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_load_generator():
+    async def scenario():
+        server = GameServer()
+        await server.start()
+        results = await run_load(server.address, clients=20, moves=10)
+        while server.stats().connections:
+            await asyncio.sleep(0.01)
+        await server.close()
+        return results, server.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results['moves'] == 200 == stats.moves
+    assert stats.games == 0 and results['round_trip_p99'] > 0
+
+
+def test_watch_game():
+    async def scenario():
+        server = GameServer()
+        await server.start()
+        player = await _connect(server.address)
+        game_id = int((await _command(*player, 'new')).split()[1])
+
+        updates = []
+        joined = asyncio.Event()
+
+        def on_update(fen, last_move):
+            updates.append((fen.split()[0], last_move))
+            joined.set()
+
+        watcher = asyncio.create_task(
+            watch_game(server.address, game_id, on_update))
+        await joined.wait()
+        for move in ('f2f3', 'e7e5', 'g2g4', 'd8h4'):
+            await _command(*player, f'move {move}')
+        result = await watcher
+
+        with pytest.raises(ValueError):
+            await watch_game(server.address, game_id + 1, on_update)
+        player[1].close()
+        await server.close()
+        return updates, result
+
+    updates, result = asyncio.run(scenario())
+    assert result == '0-1 checkmate'
+    assert updates[0] == ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR', None)
+    assert [move_to_uci(move) for _, move in updates[1:]] == [
+        'f2f3', 'e7e5', 'g2g4', 'd8h4']
+
+
+def test_threefold_repetition_ends_game():
+    async def scenario():
+        server = GameServer()
+        await server.start()
+        player = await _connect(server.address)
+        game_id = (await _command(*player, 'new')).split()[1]
+        moves = ['g1f3', 'g8f6', 'f3g1', 'f6g8'] * 2
+        for move in moves:
+            assert (await _command(*player, f'move {move}')).startswith(
+                'moved ')
+        over = (await player[0].readline()).decode().strip()
+        # No more moves are played once the game is over
+        reply = await _command(*player, 'move g1f3')
+        position = await _command(*player, 'position')
+        player[1].close()
+        await server.close()
+        return game_id, over, reply, position, server.stats()
+
+    game_id, over, reply, position, stats = asyncio.run(scenario())
+    assert over == f'over {game_id} 1/2-1/2 threefold repetition'
+    assert reply == 'error game over'
+    assert position.startswith(
+        f'position {game_id} rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w')
+    assert stats.moves == 8
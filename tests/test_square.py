@@ -1,9 +1,63 @@
 # test_square.py
 
+from ..cli_chess import square
 from ..cli_chess.square import Square
 
 
 def test_is_valid_square():
     assert Square.is_valid_square('e4')
+    assert Square.is_valid_square('E4')
     assert not Square.is_valid_square('a9')
     assert not Square.is_valid_square('k2')
+    assert not Square.is_valid_square('ax')
+    assert not Square.is_valid_square('e')
+    assert not Square.is_valid_square('e4 ')
+
+
+def test_square_names_and_indices():
+    assert square.SQUARE_INDICES['a1'] == 0
+    assert square.SQUARE_INDICES['H8'] == 63
+    for index, name in enumerate(square.SQUARE_NAMES):
+        assert square.SQUARE_INDICES[name] == index
+        assert square.SQUARE_FILES[index] == square.FILE_INDICES[name[0]]
+        assert square.SQUARE_RANKS[index] == square.RANK_INDICES[name[1]]
+
+
+def test_distances():
+    def pair(start_coords, end_coords):
+        return (square.SQUARE_INDICES[start_coords] << 6 |
+                square.SQUARE_INDICES[end_coords])
+
+    assert square.FILE_DISTANCE[pair('a1', 'h1')] == 7
+    assert square.FILE_DISTANCE[pair('h1', 'a1')] == 7
+    assert square.RANK_DISTANCE[pair('a1', 'a8')] == 7
+    assert square.RANK_DISTANCE[pair('a8', 'a1')] == 7
+    assert square.DISTANCE[pair('b1', 'e3')] == 3
+
+
+def test_lines():
+    def pair(start_coords, end_coords):
+        return (square.SQUARE_INDICES[start_coords] << 6 |
+                square.SQUARE_INDICES[end_coords])
+
+    def squares(*coords):
+        bits = 0
+        for square_coords in coords:
+            bits |= 1 << square.SQUARE_INDICES[square_coords]
+        return bits
+
+    assert square.ORTHOGONAL[pair('a1', 'a8')]
+    assert not square.ORTHOGONAL[pair('a1', 'a1')]
+    assert not square.ORTHOGONAL[pair('a1', 'b2')]
+    assert square.DIAGONAL[pair('e4', 'd5')]
+    assert not square.DIAGONAL[pair('e4', 'e4')]
+    assert not square.DIAGONAL[pair('e4', 'c5')]
+
+    assert square.BETWEEN[pair('c3', 'f6')] == squares('d4', 'e5')
+    assert square.BETWEEN[pair('c3', 'd4')] == 0
+    assert square.BETWEEN[pair('c3', 'd5')] == 0
+    assert square.LINE[pair('c1', 'a3')] == squares('a3', 'b2', 'c1')
+    assert square.LINE[pair('b2', 'c1')] == squares('a3', 'b2', 'c1')
+    assert square.LINE[pair('b2', 'd4')] == squares(
+        'a1', 'b2', 'c3', 'd4', 'e5', 'f6', 'g7', 'h8')
+    assert square.LINE[pair('c3', 'd5')] == 0
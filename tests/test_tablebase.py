@@ -0,0 +1,76 @@
+# test_tablebase.py
+
+import pytest
+
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.main import main
+from ..cli_chess.move import move_to_uci
+from ..cli_chess.tablebase import Tablebase, TablebaseResult, generate_tables
+
+
+@pytest.fixture(scope='module')
+def tables_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('tables')
+    generate_tables(directory, ['KQK'], processes=1)
+    return directory
+
+
+def _probe(directory, fen):
+    with Tablebase(directory) as tables:
+        return tables.probe(Gameboard.from_fen(fen))
+
+
+def test_probe(tables_dir):
+    # Mated, mate in one, and mated in four moves
+    assert _probe(tables_dir, '8/8/8/8/8/8/1Q6/k1K5 b - - 0 1') == (
+        TablebaseResult(-1, 0))
+    assert _probe(tables_dir, 'k7/8/1K6/8/8/8/7Q/8 w - - 0 1') == (
+        TablebaseResult(1, 1))
+    assert _probe(tables_dir, '8/8/8/8/8/8/1Q6/K1k5 b - - 0 1') == (
+        TablebaseResult(-1, 8))
+    # The player who isn't to move is in check
+    assert _probe(tables_dir, '8/8/8/8/8/8/2Q5/K1k5 w - - 0 1') is None
+
+    # Stalemate, and the queen being captured
+    assert _probe(tables_dir, 'k7/2Q5/1K6/8/8/8/8/8 b - - 0 1') == (
+        TablebaseResult(0, None))
+    assert _probe(tables_dir, 'k7/1Q6/8/8/8/8/8/K7 b - - 0 1') == (
+        TablebaseResult(0, None))
+
+
+def test_probe_symmetry(tables_dir):
+    result = _probe(tables_dir, '8/8/8/3k4/8/8/8/KQ6 w - - 0 1')
+    assert result.wdl == 1
+    # Mirrored along both axes, and with the colors swapped
+    assert _probe(tables_dir, '6QK/8/8/8/4k3/8/8/8 w - - 0 1') == result
+    assert _probe(tables_dir, 'kq6/8/8/8/3K4/8/8/8 b - - 0 1') == result
+    # Endgames that aren't covered
+    assert _probe(tables_dir, '8/8/8/3k4/8/8/8/KR6 w - - 0 1') is None
+    assert _probe(tables_dir, '8/8/8/8/8/8/8/KQ3k1q w - - 0 1') is None
+    assert _probe(tables_dir, '8/8/8/3k4/8/8/8/KB6 w - - 0 1') == (
+        TablebaseResult(0, None))
+
+
+def test_best_move(tables_dir):
+    gameboard = Gameboard.from_fen('k7/8/1K6/8/8/8/7Q/8 w - - 0 1')
+    with Tablebase(tables_dir) as tables:
+        assert move_to_uci(tables.best_move(gameboard)) == 'h2h8'
+
+        # Playing the best moves mates in as many moves as the table says
+        gameboard = Gameboard.from_fen('8/8/8/3k4/8/8/8/KQ6 w - - 0 1')
+        plies = tables.probe(gameboard).dtm
+        for _ in range(plies):
+            gameboard.make_move(tables.best_move(gameboard))
+        assert tables.probe(gameboard) == TablebaseResult(-1, 0)
+
+
+def test_generate_tables_invalid(tmp_path):
+    with pytest.raises(ValueError):
+        generate_tables(tmp_path, ['KQ'])
+    with pytest.raises(ValueError):
+        generate_tables(tmp_path, ['KNBK'])
+
+
+def test_main_tablebase(tables_dir, capsys):
+    assert main(['tablebase', str(tables_dir), '-e', 'KQK']) == 0
+    assert 'already exist' in capsys.readouterr().out
@@ -0,0 +1,124 @@
+# test_tensor_export.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from ..cli_chess import pgn, process_pool
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.main import main
+from ..cli_chess.move import move_from_uci
+
+np = pytest.importorskip('numpy')
+
+from ..cli_chess import tensor_export  # noqa: E402
+
+_FENS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R b Kq - 1 8',
+    '8/8/8/8/8/8/8/K6k b - - 0 1',
+]
+
+
+def _reference_planes(gameboard):
+    """Encode a position square by square."""
+    planes = np.zeros((12, 8, 8), dtype=np.uint8)
+    board = gameboard.view()
+    for square in range(64):
+        piece_index = board.get_piece_index_at(square)
+        if piece_index is not None:
+            planes[piece_index, square >> 3, square & 7] = 1
+    return planes
+
+
+def test_packed_dtype():
+    assert tensor_export.PACKED_DTYPE.itemsize == Gameboard.PACKED_SIZE
+
+
+def test_encode_positions():
+    gameboards = [Gameboard.from_fen(fen) for fen in _FENS]
+    planes, features = tensor_export.encode_positions(gameboards)
+    assert planes.shape == (5, 12, 8, 8) and planes.dtype == np.uint8
+    for gameboard, position_planes in zip(gameboards, planes):
+        assert np.array_equal(position_planes, _reference_planes(gameboard))
+
+    # The white pawns are on rank 2 and the black king on e8. In the fourth
+    # position, black can't castle since its king has moved.
+    assert planes[0, 0, 1].tolist() == [1] * 8
+    assert planes[0, 11, 7, 4] == 1
+    assert features.tolist() == [[1, 1, 1, 1, 1], [1, 1, 1, 1, 1],
+                                 [1, 0, 0, 0, 0], [0, 1, 0, 0, 0],
+                                 [0, 0, 0, 0, 0]]
+
+
+def test_export_positions(tmp_path):
+    gameboard = Gameboard()
+    positions = [gameboard.pack()]
+    for text in ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5', 'a7a6', 'e1g1']:
+        gameboard.make_move(move_from_uci(text))
+        positions.append(gameboard.pack())
+    expected_planes, expected_features = tensor_export.encode_packed(
+        b''.join(positions))
+
+    for processes in (1, 2):
+        directory = tmp_path / str(processes)
+        shards = tensor_export.export_packed(positions, directory,
+                                             chunk_size=3,
+                                             processes=processes)
+        assert [shard.positions for shard in shards] == [3, 3, 2]
+        loaded = list(tensor_export.iter_shards(directory))
+        assert np.array_equal(np.concatenate([planes for planes, _ in loaded]),
+                              expected_planes)
+        assert np.array_equal(
+            np.concatenate([features for _, features in loaded]),
+            expected_features)
+    # After castling, white can't castle any more
+    assert expected_features[-1].tolist() == [0, 0, 0, 1, 1]
+
+
+def test_export_pgn_in_one_pool(tmp_path, monkeypatch):
+    games = tmp_path / 'games.pgn'
+    games.write_text('[Event "a"]\n\n1. e4 e5 2. Nf3 *\n\n'
+                     '[Event "b"]\n\n1. d4 *\n' * 10)
+    expected = tensor_export.export_pgn([games], tmp_path / '1',
+                                        chunk_size=7, processes=1)
+
+    pools = []
+
+    class CountedPool(ProcessPoolExecutor):
+        def __init__(self, processes):
+            pools.append(processes)
+            super().__init__(processes)
+
+    for module in (pgn, process_pool, tensor_export):
+        monkeypatch.setattr(module, 'ProcessPoolExecutor', CountedPool)
+    shards = tensor_export.export_pgn([games], tmp_path / '2', chunk_size=7,
+                                      processes=2)
+    # The games are read and the shards written by the same two processes
+    assert pools == [2]
+    assert [shard.positions for shard in shards] == [
+        shard.positions for shard in expected] == [7] * 8 + [4]
+    for (planes, features), (expected_planes, expected_features) in zip(
+            tensor_export.iter_shards(tmp_path / '2'),
+            tensor_export.iter_shards(tmp_path / '1'), strict=True):
+        assert np.array_equal(planes, expected_planes)
+        assert np.array_equal(features, expected_features)
+
+
+def test_main_export(tmp_path, capsys):
+    games = tmp_path / 'games.pgn'
+    games.write_text('[Event "a"]\n\n1. e4 e5 2. Nf3 *\n\n'
+                     '[Event "b"]\n\n1. d4 *\n')
+    positions = tmp_path / 'positions.epd'
+    positions.write_text('\n'.join(_FENS) + '\n')
+    output = tmp_path / 'output'
+    assert main(['export', str(games), str(positions), '-o', str(output),
+                 '--chunk-size', '4', '--processes', '1']) == 0
+    assert 'Exported 11 positions to 3 shards' in capsys.readouterr().out
+
+    planes, features = next(tensor_export.iter_shards(output))
+    assert planes.shape == (4, 12, 8, 8) and features.shape == (4, 5)
+    # The starting position of the first game
+    assert np.array_equal(planes[0], _reference_planes(Gameboard()))
@@ -0,0 +1,52 @@
+# test_transposition_table.py
+
+from ..cli_chess.transposition_table import TranspositionTable
+
+
+def test_size_follows_memory_budget():
+    table = TranspositionTable(1)
+    assert table.size_bytes == 1024 * 1024
+    assert table.num_entries == 1024 * 1024 // TranspositionTable.ENTRY_BYTES
+
+    # The number of buckets is rounded down to a power of two
+    assert TranspositionTable(1.5).size_bytes == 1024 * 1024
+
+
+def test_store_and_probe():
+    table = TranspositionTable(1)
+    key = 0x123456789ABCDEF0
+
+    assert table.probe(key) is None
+    table.store(key, 7, -1234, TranspositionTable.LOWER_BOUND, 0xABC)
+    entry = table.probe(key)
+    assert entry.depth == 7
+    assert entry.score == -1234
+    assert entry.bound == TranspositionTable.LOWER_BOUND
+    assert entry.move == 0xABC
+
+    table.clear()
+    assert table.probe(key) is None
+
+
+def test_replacement_policy():
+    table = TranspositionTable(1)
+    num_buckets = table.num_entries // TranspositionTable.BUCKET_ENTRIES
+    # Keys that map to the same bucket
+    deep, shallow, newer = 5, 5 + num_buckets, 5 + 2 * num_buckets
+
+    table.store(deep, 10, 0, TranspositionTable.EXACT, 1)
+    table.store(shallow, 2, 0, TranspositionTable.EXACT, 2)
+    assert table.probe(deep).move == 1
+    assert table.probe(shallow).move == 2
+
+    # The deep entry is kept, and the shallow one is always replaced
+    table.store(newer, 3, 0, TranspositionTable.EXACT, 3)
+    assert table.probe(deep).move == 1
+    assert table.probe(shallow) is None
+    assert table.probe(newer).move == 3
+
+    # Entries from an older search can be replaced regardless of depth
+    table.new_search()
+    table.store(shallow, 1, 0, TranspositionTable.EXACT, 4)
+    assert table.probe(deep) is None
+    assert table.probe(shallow).move == 4
@@ -0,0 +1,56 @@
+# test_uci.py
+
+import io
+
+from ..cli_chess import uci
+
+
+def _run(commands):
+    output = io.StringIO()
+    uci.run(io.StringIO(''.join(f'{command}\n' for command in commands)),
+            output)
+    return output.getvalue().splitlines()
+
+
+def test_handshake():
+    lines = _run(['uci', 'isready', 'quit'])
+    assert lines[0] == f'id name {uci.ENGINE_NAME}'
+    assert 'option name Hash type spin default 16 min 1 max 4096' in lines
+    assert lines[-2:] == ['uciok', 'readyok']
+
+
+def test_go_depth():
+    lines = _run(['setoption name Hash value 1',
+                  'position startpos moves e2e4 e7e5',
+                  'go depth 2', 'isready'])
+    assert 'readyok' in lines
+    assert lines[-1].startswith('bestmove ')
+    assert any(line.startswith('info depth 1 score cp ') for line in lines)
+
+
+def test_infinite_search_waits_for_stop():
+    lines = _run(['position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1',
+                  'go infinite', 'isready', 'stop'])
+    assert 'info depth 1 score mate 1 nodes' in ' '.join(lines)
+    # The mate is found at once, but the bestmove only comes after 'stop'
+    assert lines.index('readyok') < lines.index('bestmove a1a8')
+
+
+def test_invalid_commands():
+    lines = _run(['position startpos moves e2e5', 'position fen 8/8 w',
+                  'setoption name Foo', 'flip'])
+    assert lines[1].startswith('info string invalid position: ')
+    del lines[1]
+    assert lines == ["info string invalid position: illegal move: 'e2e5'",
+                     'info string unknown option: foo',
+                     'info string unknown command: flip']
+
+
+def test_allocate_time():
+    assert uci._allocate_time({'movetime': 1000}, 'w') == 0.95
+    assert uci._allocate_time({'wtime': 30000, 'btime': 1000}, 'w') == (
+        30 / uci.DEFAULT_MOVES_TO_GO - uci.MOVE_OVERHEAD)
+    assert uci._allocate_time({'wtime': 1000, 'btime': 1000,
+                               'movestogo': 1}, 'b') == (
+        0.5 - uci.MOVE_OVERHEAD)
+    assert uci._allocate_time({'depth': 5}, 'w') is None
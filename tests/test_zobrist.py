@@ -0,0 +1,55 @@
+# test_zobrist.py
+
+import random
+
+from ..cli_chess.gameboard import Gameboard
+from ..cli_chess.move_generator import generate_legal_moves
+from ..cli_chess.zobrist import compute_hash
+
+
+def test_hash_is_updated_incrementally():
+    gameboard = Gameboard()
+    hashes = [gameboard.zobrist_hash]
+    rng = random.Random(1)
+
+    for _ in range(60):
+        moves = generate_legal_moves(gameboard, gameboard.turn)
+        if not moves:
+            break
+        gameboard.make_move(rng.choice(moves))
+        assert gameboard.zobrist_hash == compute_hash(gameboard)
+        hashes.append(gameboard.zobrist_hash)
+
+    while gameboard.ply:
+        assert gameboard.zobrist_hash == hashes.pop()
+        gameboard.unmake_move()
+    assert gameboard.zobrist_hash == hashes.pop()
+
+
+def test_transpositions_have_equal_hashes():
+    first = Gameboard()
+    for start, end in (('g1', 'f3'), ('g8', 'f6'), ('b1', 'c3')):
+        first.play_move(start, end)
+
+    second = Gameboard()
+    for start, end in (('b1', 'c3'), ('g8', 'f6'), ('g1', 'f3')):
+        second.play_move(start, end)
+
+    assert first.zobrist_hash == second.zobrist_hash
+    assert first.zobrist_hash != Gameboard().zobrist_hash
+
+
+def test_side_to_move_castling_and_en_passant_change_hash():
+    assert (Gameboard().zobrist_hash !=
+            Gameboard(turn='b').zobrist_hash)
+    assert (Gameboard().zobrist_hash !=
+            Gameboard(castling_rights='Kkq').zobrist_hash)
+
+    gameboard = Gameboard()
+    gameboard.play_move('e2', 'e4')
+    board_state = [[piece and f'{piece.symbol}_{piece.color}' or '   '
+                    for piece in row] for row in gameboard.get_board()]
+    assert (gameboard.zobrist_hash ==
+            Gameboard(board_state, en_passant='e3', turn='b').zobrist_hash)
+    assert (gameboard.zobrist_hash !=
+            Gameboard(board_state, turn='b').zobrist_hash)